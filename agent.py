@@ -1,15 +1,32 @@
 """AI Agent using Agno framework with multi-agent capabilities."""
 
 import os
+import time
+import asyncio
 import logging
+import threading
+from contextlib import contextmanager
 from agno.agent import Agent
-from agno.models.google import Gemini
 from agno.models.groq import Groq as AgnoGroq
-from agno.tools.duckduckgo import DuckDuckGoTools
 from tools import LUMATools
-from config import SYSTEM_PROMPT, GROQ_API_KEY
+from search_cache import CachedDuckDuckGoTools
+from router import ModelRouter, ROUTE_SMALL, ROUTE_LARGE, classify_intent, needs_tools
+from providers import Provider, ProviderPool
+from config import (
+    SYSTEM_PROMPT,
+    GROQ_API_KEY,
+    ROUTER_ENABLED,
+    GROQ_SMALL_MODEL,
+    GROQ_LARGE_MODEL,
+    GEMINI_SMALL_MODEL,
+    GEMINI_LARGE_MODEL,
+    LLM_BASE_URL,
+    BUDGETS_ENABLED,
+    INTENT_BUDGETS
+)
 from database import MessageDatabase
-from tts_handler import TTSHandler
+from profiler import profiler
+from ui_events import ui
 import re
 
 # Suppress verbose Agno logs
@@ -22,124 +39,324 @@ logging.getLogger("httpx").setLevel(logging.ERROR)
 class LUMAAgent:
     """Advanced AI agent using Agno framework."""
     
-    def __init__(self, use_openai=False):
-        """Initialize the Agno agent with tools."""
-        # Get API keys
-        gemini_api_key = os.getenv("GEMINI_API_KEY")
+    def __init__(self, use_openai=False, tts=True, db_path="chat_history.db", async_tools=False):
+        """Initialize the Agno agent with tools.
+        
+        Args:
+            use_openai: Unused, kept for compatibility
+            tts: Speak replies (disable for text-only and benchmark runs)
+            db_path: SQLite file holding the conversation history
+            async_tools: Use coroutine tools, so cancelled turns stop their I/O
+                (only the async methods may be used then)
+        """
+        # Get API keys (a custom endpoint only replaces the Groq provider)
+        gemini_api_key = None if LLM_BASE_URL else os.getenv("GEMINI_API_KEY")
+        
+        # Per-stage durations of the most recent turn
+        self.last_timings = {}
+        self._turn = threading.local()
         
         # Initialize database
         self.db = None
+        self.db_path = db_path
         self._init_database()
         
-        # Initialize tools
-        tools = [LUMATools()]
+        # Initialize tools (search results are cached across turns and sessions)
+        self.search_tools = CachedDuckDuckGoTools()
+        self.luma_tools = LUMATools(db=self.db, async_tools=async_tools)
+        tools = [self.search_tools, self.luma_tools]
         
-        # Try Gemini first, fallback to Groq
+        # Gemini first (if configured), Groq as the fallback provider
+        providers = []
         if gemini_api_key:
             try:
-                # Use Gemini with web search capabilities
-                self.agent = Agent(
-                    model=Gemini(
-                        id="gemini-2.0-flash-exp",
-                        api_key=gemini_api_key
-                    ),
-                    description="You are an enthusiastic assistant with a flair for providing accurate information!",
-                    tools=[DuckDuckGoTools()],
-                    instructions=SYSTEM_PROMPT,
-                    markdown=True
-                )
-                logging.debug(f"AI Agent initialized (Gemini 2.0 Flash) with web search capabilities")
+                providers.append(self._init_gemini_provider(tools, gemini_api_key))
             except Exception as e:
                 logging.warning(f"Gemini failed: {e}")
-                self._init_groq_agent(tools)
-        else:
-            self._init_groq_agent(tools)
-        # Initialize TTS handler for this agent
-        try:
-            self.tts = TTSHandler()
-        except Exception as e:
-            logging.warning(f"TTS init failed: {e}")
-            self.tts = None
+        if GROQ_API_KEY or not providers:
+            providers.append(self._init_groq_provider(tools))
+        self.pool = ProviderPool(providers)
+        
+        # The preferred provider's large model is the default agent
+        self.agents = providers[0].agents
+        self.agent = self.agents[ROUTE_LARGE]
+        self.router = ModelRouter() if ROUTER_ENABLED else None
+        
+        # Output budget (max tokens, answer style) per intent; empty generates unbounded answers
+        self.budgets = INTENT_BUDGETS if BUDGETS_ENABLED else {}
+        self.truncated_answers = 0  # budgeted answers that stopped at max_tokens
+        self.tool_call_retries = 0  # runs repeated because max_tokens cut a tool call
+        
+        # Initialize TTS handler for this agent (imported lazily so text-only runs need no audio stack)
+        self.tts = None
+        if tts:
+            try:
+                from tts_handler import TTSHandler
+                self.tts = TTSHandler()
+            except Exception as e:
+                logging.warning(f"TTS init failed: {e}")
     
-    def _init_groq_agent(self, tools):
-        """Initialize Groq agent with Agno."""
-        self.agent = Agent(
-            model=AgnoGroq(id="llama-3.3-70b-versatile"),
+    def _make_agent(self, model, tools):
+        """Create an Agno agent for a model with LUMA's tools and instructions."""
+        return Agent(
+            model=model,
             description="You are an enthusiastic assistant with a flair for providing accurate information!",
-            tools=[DuckDuckGoTools()],
+            tools=tools,
             instructions=SYSTEM_PROMPT,
             markdown=True
         )
-        logging.debug(f"AI Agent initialized (Groq Llama 3.3 70B) with web search capabilities")
     
-    def get_response(self, user_input: str) -> str:
-        """Get response from AI using Agno."""
+    def _init_gemini_provider(self, tools, api_key):
+        """Initialize Gemini agents with Agno."""
+        # Imported lazily so builds without the Gemini stack still start
+        from agno.models.google import Gemini
+        
+        agents = {
+            ROUTE_SMALL: self._make_agent(Gemini(id=GEMINI_SMALL_MODEL, api_key=api_key), tools),
+            ROUTE_LARGE: self._make_agent(Gemini(id=GEMINI_LARGE_MODEL, api_key=api_key), tools),
+        }
+        logging.debug(f"AI Agent initialized (Gemini {GEMINI_SMALL_MODEL} / {GEMINI_LARGE_MODEL}) with web search capabilities")
+        return Provider("gemini", agents)
+    
+    def _init_groq_provider(self, tools):
+        """Initialize Groq agents with Agno."""
+        agents = {
+            ROUTE_SMALL: self._make_agent(AgnoGroq(id=GROQ_SMALL_MODEL, base_url=LLM_BASE_URL), tools),
+            ROUTE_LARGE: self._make_agent(AgnoGroq(id=GROQ_LARGE_MODEL, base_url=LLM_BASE_URL), tools),
+        }
+        logging.debug(f"AI Agent initialized (Groq {GROQ_SMALL_MODEL} / {GROQ_LARGE_MODEL}) with web search capabilities")
+        return Provider("groq", agents)
+    
+    def get_response(self, user_input: str, reply: str = None) -> str:
+        """Get response from AI using Agno.
+
+        Args:
+            user_input: The user's transcribed request
+            reply: A reply generated ahead of time (e.g. speculatively); skips the LLM call
+        """
+        self._turn.timings = timings = {}
+        started = time.perf_counter()
         try:
-            # Store user message in database
-            self.db.add_message("user", user_input)
+            if reply is None:
+                reply = self.generate_reply(user_input)
 
-            # Add recent history to context
-            recent_messages = self.db.get_recent_messages(5)  # Get last 5 messages
-            context = "\n".join([f"{msg['role']}: {msg['content']}" for msg in recent_messages])
+            # Store the exchange in the database (store formatted text)
+            with self._stage("db"):
+                self.db.add_message("user", user_input)
+                self.db.add_message("assistant", reply)
 
-            # Use Agno's run method to get response with context
-            full_input = f"{context}\n\nuser: {user_input}" if context else user_input
-            response = self.agent.run(full_input)
+            # Show the response before speaking
+            ui.message("🍃 LUMA", reply)
 
-            # Determine if any tools were used (but do not print to console)
-            tools_used = False
-            if hasattr(response, 'messages'):
-                for msg in response.messages:
-                    if hasattr(msg, 'role'):
-                        if msg.role == 'tool' or (hasattr(msg, 'tool_calls') and msg.tool_calls):
-                            tools_used = True
+            # Speak the formatted response if TTS is available
+            try:
+                if self.tts:
+                    # run speak async wrapper (blocking) so caller hears the TTS
+                    with self._stage("tts"):
+                        self.tts.speak(reply)
+            except Exception as e:
+                logging.warning(f"TTS speak failed: {e}")
 
-            if not tools_used and ("news" in user_input.lower() or "latest" in user_input.lower() or "current" in user_input.lower()):
-                # Keep as debug log only
-                logging.debug("No tools were used (expected web search)")
+            return reply
+        except Exception as e:
+            error_msg = f"Error: {str(e)}"
+            logging.error(error_msg)
+            timings['error'] = True
+            return "I apologize, but I encountered an error processing your request."
+        finally:
+            timings['total'] = time.perf_counter() - started
+            self.last_timings = timings
+            self._turn.timings = None
 
-            # Clean source parentheticals like (Source: ...) from raw content
-            raw_content = getattr(response, 'content', str(response))
-            raw_clean = re.sub(r"\(Source:.*?\)", "", raw_content, flags=re.IGNORECASE)
+    async def aget_response(self, user_input: str, reply: str = None) -> str:
+        """Async variant of get_response; speech plays without blocking the event loop.
 
-            # Format response to be more personal / conversational and remove markdown bullets
-            formatted = self._format_response(raw_clean)
+        Cancelling the calling task aborts the model stream or the speech.
 
-            # If this looks like a news query, summarize and pick one article to read (short)
-            if any(w in user_input.lower() for w in ("news", "latest", "current", "update", "breaking")):
-                # split into sentences and pick first 1-2 for brevity
-                sent_parts = re.split(r"(?<=[.!?])\\s+", formatted)
-                if len(sent_parts) > 1:
-                    # take first two sentences if available
-                    formatted = "Here's a quick summary: " + " ".join(sent_parts[:2]).strip()
-                else:
-                    formatted = "Here's a quick summary: " + formatted
+        Args:
+            user_input: The user's transcribed request
+            reply: A reply generated ahead of time; skips the LLM call
+        """
+        self._turn.timings = timings = {}
+        started = time.perf_counter()
+        try:
+            if reply is None:
+                reply = await self.agenerate_reply(user_input)
 
-            # Store assistant response in database (store formatted text)
-            self.db.add_message("assistant", formatted)
+            with self._stage("db"):
+                self.db.add_message("user", user_input)
+                self.db.add_message("assistant", reply)
 
-            # Print response before speaking
-            print(f"\n\n🍃 LUMA: {formatted}\n")
+            ui.message("🍃 LUMA", reply)
 
-            # Speak the formatted response if TTS is available
             try:
                 if self.tts:
-                    # run speak async wrapper (blocking) so caller hears the TTS
-                    self.tts.speak(formatted)
+                    with self._stage("tts"):
+                        await self.tts.aspeak(reply)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logging.warning(f"TTS speak failed: {e}")
 
-            return formatted
+            return reply
+        except asyncio.CancelledError:
+            timings['cancelled'] = True
+            raise
         except Exception as e:
-            error_msg = f"Error: {str(e)}"
-            logging.error(error_msg)
+            logging.error(f"Error: {str(e)}")
+            timings['error'] = True
             return "I apologize, but I encountered an error processing your request."
+        finally:
+            timings['total'] = time.perf_counter() - started
+            self.last_timings = timings
+            self._turn.timings = None
+
+    @contextmanager
+    def _stage(self, name):
+        """Time a pipeline stage for last_timings and attribute it in the profiler."""
+        started = time.perf_counter()
+        try:
+            with profiler.stage(name):
+                yield
+        finally:
+            timings = getattr(self._turn, 'timings', None)
+            if timings is not None:
+                timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+
+    def generate_reply(self, user_input: str, cancel=None) -> str:
+        """Run the model for a request and return the formatted reply.
+
+        Has no side effects (no database writes, printing or speech), so it can
+        run ahead of time on a provisional transcript. Each run streams on a
+        private copy of the provider's agent, so calls may overlap.
+
+        Args:
+            user_input: The user's transcribed request
+            cancel: Optional threading.Event; setting it aborts the model call
+                (raising providers.RunCancelledError)
+        """
+        prompt, route, reason, intent, budget = self._prepare_turn(user_input)
+
+        started = time.perf_counter()
+        with self._stage("llm"):
+            max_tokens, after_tools = (budget['max_tokens'], budget['after_tools']) if budget else (None, False)
+            response, provider = self.pool.run(prompt, route, max_tokens, cancel=cancel, after_tools=after_tools)
+            if not after_tools and self._cut_tool_call(response, max_tokens):
+                response, provider = self.pool.run(prompt, route, max_tokens, cancel=cancel, after_tools=True)
+        if self.router:
+            self.router.record(user_input, route, f"{reason}, {intent}, {provider}", time.perf_counter() - started)
+
+        return self._finish_turn(user_input, response, budget)
+
+    async def agenerate_reply(self, user_input: str) -> str:
+        """Async variant of generate_reply; the model streams on the running event loop.
+
+        Args:
+            user_input: The user's transcribed request
+        """
+        prompt, route, reason, intent, budget = self._prepare_turn(user_input)
+
+        started = time.perf_counter()
+        with self._stage("llm"):
+            max_tokens, after_tools = (budget['max_tokens'], budget['after_tools']) if budget else (None, False)
+            response, provider = await self.pool.arun(prompt, route, max_tokens, after_tools)
+            if not after_tools and self._cut_tool_call(response, max_tokens):
+                response, provider = await self.pool.arun(prompt, route, max_tokens, True)
+        if self.router:
+            self.router.record(user_input, route, f"{reason}, {intent}, {provider}", time.perf_counter() - started)
+
+        return self._finish_turn(user_input, response, budget)
+
+    def _prepare_turn(self, user_input: str):
+        """Build the model input and pick the route and output budget for a request.
+
+        Returns:
+            ``(prompt, route, reason, intent, budget)``; budget is None when unbounded
+        """
+        # Add recent history to context
+        with self._stage("context"):
+            recent_messages = self.db.get_recent_messages(5)  # Get last 5 messages
+            context = "\n".join([f"{msg['role']}: {msg['content']}" for msg in recent_messages])
+
+        # Use Agno's run method to get response with context
+        full_input = f"{context}\n\nuser: {user_input}" if context else user_input
+        
+        # Long pages and files fetched by tools are cut to the passages matching this request
+        self.luma_tools.set_query(user_input)
+        
+        # Size the answer before the call instead of cutting it afterwards
+        intent = classify_intent(user_input)
+        budget = self.budgets.get(intent)
+        if budget:
+            full_input = f"{full_input}\n\n(Answer style: {budget['style']})"
+            # max_tokens must not cut tool calls: for tool requests it only limits the answer after them
+            budget = dict(budget, after_tools=needs_tools(user_input))
+        
+        # Pick the model for this turn
+        if self.router:
+            route, reason = self.router.classify(user_input)
+        else:
+            route, reason = ROUTE_LARGE, "routing disabled"
+        return full_input, route, reason, intent, budget
+
+    @staticmethod
+    def _capped_messages(response, max_tokens):
+        """Return the assistant messages of a run that stopped at ``max_tokens``."""
+        if not max_tokens:
+            return []
+        return [msg for msg in getattr(response, 'messages', None) or []
+                if msg.role == 'assistant' and msg.metrics and msg.metrics.output_tokens >= max_tokens]
+
+    def _cut_tool_call(self, response, max_tokens):
+        """Whether max_tokens cut a tool call (or left no answer) of a request expected to need no tools.
+
+        The run is then repeated with the limit applied after the tool calls only.
+        """
+        capped = self._capped_messages(response, max_tokens)
+        if not capped:
+            return False
+        if any(msg.tool_calls for msg in capped) or not getattr(response, 'content', None):
+            logging.debug(f"A tool call stopped at max_tokens={max_tokens}, retrying with the limit after tools")
+            self.tool_call_retries += 1
+            return True
+        return False
+
+    def _finish_turn(self, user_input: str, response, budget) -> str:
+        """Turn a model run response into the reply that is shown and spoken."""
+        # Determine if any tools were used (but do not print to console)
+        tools_used = False
+        if hasattr(response, 'messages'):
+            for msg in response.messages:
+                if hasattr(msg, 'role'):
+                    if msg.role == 'tool' or (hasattr(msg, 'tool_calls') and msg.tool_calls):
+                        tools_used = True
+
+        if not tools_used and ("news" in user_input.lower() or "latest" in user_input.lower() or "current" in user_input.lower()):
+            # Keep as debug log only
+            logging.debug("No tools were used (expected web search)")
+
+        # Clean source parentheticals like (Source: ...) from raw content
+        raw_content = getattr(response, 'content', str(response))
+        raw_clean = re.sub(r"\(Source:.*?\)", "", raw_content, flags=re.IGNORECASE)
+
+        # Format response to be more personal / conversational and remove markdown bullets
+        with self._stage("format"):
+            formatted = self._format_response(raw_clean)
+            if budget:
+                # An answer that hit max_tokens ends mid-sentence: drop the fragment
+                if self._capped_messages(response, budget['max_tokens']):
+                    self.truncated_answers += 1
+                formatted = self._trim_to_sentence(formatted)
+
+        return formatted
     
     
     def _init_database(self):
         """Initialize the database connection."""
         if not self.db:
-            self.db = MessageDatabase()
+            self.db = MessageDatabase(self.db_path)
+            # Retention, archival and vacuum run on their own connection and thread
+            self.db.start_maintenance()
 
     def _format_response(self, content: str) -> str:
         """Convert model output (possibly markdown with bullets) into a friendly, spoken-style string.
@@ -187,11 +404,44 @@ class LUMAAgent:
         # No bullets found: return cleaned paragraphs joined by space
         return ' '.join(paragraphs)
     
+    @staticmethod
+    def _trim_to_sentence(text: str) -> str:
+        """Cut text after its last complete sentence, if it ends with a fragment."""
+        text = text.rstrip()
+        if not text or text.endswith(('.', '?', '!')):
+            return text
+        ends = list(re.finditer(r"[.!?](?=\s|$)", text))
+        return text[:ends[-1].end()] if ends else text
+    
+    def get_budget_stats(self):
+        """Get output budget statistics."""
+        return {
+            'truncated_answers': self.truncated_answers,
+            'tool_call_retries': self.tool_call_retries,
+        }
+
     def cleanup(self):
         """Cleanup resources."""
         if self.db:
+            logging.debug(f"History stats: {self.db.get_storage_stats()}")
             self.db.close()
             self.db = None
+        if getattr(self, 'pool', None):
+            logging.debug(f"Provider stats: {self.pool.get_stats()}")
+        if getattr(self, 'router', None):
+            logging.debug(f"Routing stats: {self.router.get_stats()}")
+        if getattr(self, 'budgets', None):
+            logging.debug(f"Budget stats: {self.get_budget_stats()}")
+        if getattr(self, 'luma_tools', None) and self.luma_tools.ranker:
+            logging.debug(f"Passage ranking stats: {self.luma_tools.ranker.get_stats()}")
+        if getattr(self, 'tts', None):
+            logging.debug(f"TTS stats: {self.tts.get_stats()}")
+            self.tts.cleanup()
+            self.tts = None
+        if getattr(self, 'search_tools', None):
+            logging.debug(f"Search cache stats: {self.search_tools.get_stats()}")
+            self.search_tools.cache.close()
+            self.search_tools = None
     
     def clear_history(self):
         """Clear conversation history."""
@@ -0,0 +1,213 @@
+"""Single asyncio event loop running capture, VAD/ASR, the agent and TTS."""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from config import TURN_HOLD_MIN_SECS, TURN_HOLD_MAX_SECS
+from endpointer import completeness
+from profiler import profiler
+from ui_events import ui
+
+
+class AsyncRuntime:
+    """Runs the assistant on one event loop instead of polling threads.
+
+    The PortAudio callback only fills the audio ring. VAD and endpointing
+    run in a single-thread executor (their state is sequential) whose
+    thread blocks on the ring's ready event and drains it, so the loop
+    awaits that work instead of polling and the callback never touches the
+    loop. The wake-word gate and ASR run in another executor so a long
+    transcription never delays the VAD. Each assembled turn is a task that
+    holds briefly for a follow-up segment, awaits the model through Agno's
+    async API and speaks on the same loop; a new segment cancels a turn
+    that has not started speaking and is merged with its text. Like the
+    threaded loop, the processor ignores the microphone while a reply plays
+    (its ``is_playing``), so segments never contain LUMA's own voice.
+    """
+
+    RING_WAIT_SECS = 0.1  # longest wait for audio before re-checking for a stop
+
+    def __init__(self, processor, transcriber, wake_gate, agent,
+                 hold_min_secs=TURN_HOLD_MIN_SECS, hold_max_secs=TURN_HOLD_MAX_SECS, max_wait_secs=30.0):
+        """Initialize the runtime.
+
+        Args:
+            processor: AudioProcessor providing the stream, ring, VAD and endpointer
+            transcriber: Transcriber for final transcripts
+            wake_gate: WakeWordGate deciding which segments are answered
+            agent: LUMAAgent answering the turns
+            hold_min_secs: Hold after a segment that sounds complete
+            hold_max_secs: Hold after a segment that sounds unfinished
+            max_wait_secs: Longest hold while the user keeps speaking
+        """
+        self.processor = processor
+        self.transcriber = transcriber
+        self.wake_gate = wake_gate
+        self.agent = agent
+        self.hold_min_secs = hold_min_secs
+        self.hold_max_secs = hold_max_secs
+        self.max_wait_secs = max_wait_secs
+
+        self._loop = None
+        self._quiet = None  # set while no segment is being spoken or transcribed
+        self._open_segments = 0
+        self._turn = None  # task answering the current turn
+        self._turn_text = ""
+        self._speaking = None  # turn task currently storing and speaking its reply
+        self._delivery_lock = None
+        self._tasks = set()
+        self._vad_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vad")
+        self._asr_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="asr")
+
+        # Statistics
+        self.segments = 0
+        self.turns = 0
+        self.delivered = 0
+        self.cancelled = 0
+
+    async def run(self):
+        """Process audio and answer turns until the processor is stopped."""
+        self._loop = asyncio.get_running_loop()
+        self._quiet = asyncio.Event()
+        self._quiet.set()
+        self._delivery_lock = asyncio.Lock()
+
+        processor = self.processor
+        if processor.is_playing is None and self.agent.tts is not None:
+            processor.is_playing = lambda: self.agent.tts.is_speaking
+        processor.on_speech_detected = self._on_segment
+        processor.on_speech_start = lambda: self._loop.call_soon_threadsafe(self._speech_started)
+        if not processor.running:
+            processor.start()
+
+        try:
+            while processor.running:
+                await self._loop.run_in_executor(self._vad_executor, self._drain_ring)
+        finally:
+            for task in list(self._tasks):
+                task.cancel()
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._vad_executor.shutdown(wait=False, cancel_futures=True)
+            self._asr_executor.shutdown(wait=False, cancel_futures=True)
+
+    def _drain_ring(self):
+        """Wait for audio, then run every queued chunk through the gate, VAD and endpointer (VAD thread).
+
+        Returns after RING_WAIT_SECS without audio so the loop can notice a stop.
+        """
+        ring = self.processor.ring
+        timeout = self.RING_WAIT_SECS
+        while True:
+            chunk = ring.acquire(timeout=timeout)
+            if chunk is None:
+                return
+            timeout = 0
+            try:
+                self.processor._process_chunk(chunk)
+            except Exception as e:
+                ui.error(f"Audio processing error: {e}")
+            finally:
+                ring.release()
+
+    def _speech_started(self):
+        self._open_segments += 1
+        self._quiet.clear()
+
+    def _on_segment(self, speech):
+        """Hand a finalized segment to the loop (VAD thread)."""
+        endpointer = self.processor.endpointer
+        # Taken now: the endpointer moves on to the next segment
+        transcript = endpointer.take_transcript() if endpointer else None
+        self._loop.call_soon_threadsafe(self._spawn, self._segment(speech, transcript))
+
+    def _spawn(self, coro):
+        task = self._loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _segment(self, speech, transcript):
+        """Gate and transcribe a segment, then add it to the current turn."""
+        self.segments += 1
+        try:
+            accepted, transcript = await self._loop.run_in_executor(
+                self._asr_executor, self.wake_gate.check, speech, transcript)
+            if accepted and transcript is None:
+                transcript = await self._loop.run_in_executor(self._asr_executor, self.transcriber, speech)
+            text = self.wake_gate.strip(transcript).strip() if accepted else ""
+        except Exception as e:
+            ui.error(f"Error processing speech: {str(e)}")
+            text = ""
+        self._open_segments = max(0, self._open_segments - 1)
+        if not self._open_segments:
+            self._quiet.set()
+
+        if not text:
+            if self._turn is None or self._turn.done():
+                profiler.end_turn()
+                ui.status("✨ Ready...")
+            else:
+                # A dropped segment does not end the turn still being answered
+                ui.status("LUMA is thinking...", style="blue", spinner=True)
+            return
+
+        ui.message("✨ You", text)
+        ui.status("LUMA is thinking...", style="blue", spinner=True)
+        if self._turn is not None and not self._turn.done() and self._turn is not self._speaking:
+            # The pending reply no longer answers everything the user said
+            self._turn.cancel()
+            self.cancelled += 1
+            text = f"{self._turn_text} {text}"
+            logging.debug(f"Merged a segment into the pending turn: {text!r}")
+        self._turn_text = text
+        self._turn = self._spawn(self._answer(text))
+
+    def hold_secs(self, text):
+        """Time to wait for another segment after ``text``."""
+        return self.hold_min_secs + (1.0 - completeness(text)) * (self.hold_max_secs - self.hold_min_secs)
+
+    async def _answer(self, text):
+        """Hold, generate and speak the reply to a turn."""
+        await asyncio.sleep(self.hold_secs(text))
+        try:
+            await asyncio.wait_for(self._quiet.wait(), self.max_wait_secs)
+        except asyncio.TimeoutError:
+            pass
+
+        self.turns += 1
+        try:
+            reply = await self.agent.agenerate_reply(text)
+        except Exception as e:
+            ui.error(f"Error getting AI response: {str(e)}")
+            reply = None
+
+        # Generation may overlap the previous reply, speech does not
+        async with self._delivery_lock:
+            self._speaking = asyncio.current_task()
+            try:
+                if reply is None:
+                    if self.agent.tts:
+                        await self.agent.tts.aspeak("I apologize, but I encountered an error processing your request.")
+                    return
+                with profiler.stage("agent"):
+                    await self.agent.aget_response(text, reply=reply)
+                self.delivered += 1
+            finally:
+                self._speaking = None
+                profiler.end_turn()
+                if self._turn is asyncio.current_task():
+                    ui.status("✨ Ready...")
+
+    def get_stats(self):
+        """Get turn statistics."""
+        return {
+            'segments': self.segments,
+            'turns': self.turns,
+            'delivered': self.delivered,
+            'cancelled_replies': self.cancelled,
+        }
+
+    def stop(self):
+        """Stop processing (thread-safe)."""
+        self.processor.running = False
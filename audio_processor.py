@@ -1,6 +1,8 @@
 """Audio processing with VAD (Voice Activity Detection)."""
 
-import queue
+import time
+import logging
+from collections import deque
 import numpy as np
 import sounddevice as sd
 from silero_vad import VADIterator, load_silero_vad
@@ -10,28 +12,54 @@ from config import (
     VAD_THRESHOLD,
     VAD_MIN_SILENCE,
     MAX_SPEECH_SECS,
-    LOOKBACK_CHUNKS
+    LOOKBACK_CHUNKS,
+    AUDIO_RING_CHUNKS,
+    ENERGY_GATE_ENABLED,
+    ENERGY_GATE_MARGIN_DB,
+    ENERGY_GATE_HANGOVER_CHUNKS,
+    ENERGY_GATE_PREROLL_CHUNKS,
+    PLAYBACK_TAIL_SECS
 )
+from audio_ring import ChunkRing
+from energy_gate import EnergyGate
+from profiler import profiler
+from ui_events import ui
 
 
 class AudioProcessor:
     """Handles audio input and voice activity detection."""
     
-    def __init__(self, on_speech_detected):
+    def __init__(self, on_speech_detected, endpointer=None, on_speech_start=None, is_playing=None):
         """Initialize audio processor.
         
         Args:
             on_speech_detected: Callback function when speech is detected
+            endpointer: Optional Endpointer deciding when a pause ends the turn
+            on_speech_start: Optional callback when the VAD detects the start of speech
+            is_playing: Optional function returning True while speech output plays;
+                the microphone is ignored meanwhile (and PLAYBACK_TAIL_SECS after)
+                so LUMA does not answer its own voice
         """
         self.on_speech_detected = on_speech_detected
+        self.endpointer = endpointer
+        self.on_speech_start = on_speech_start
+        self.is_playing = is_playing
+        self._muted_until = 0.0
+        self._muted = False
         self.running = False
-        self.audio_queue = None
         self.stream = None
         
+        # Preallocated chunk buffers filled by the PortAudio callback
+        self.ring = ChunkRing(AUDIO_RING_CHUNKS, CHUNK_SIZE)
+        self.overruns = 0
+        self.underruns = 0
+        
         # Speech buffer
         self.speech_buffer = np.empty(0, dtype=np.float32)
         self.lookback_size = LOOKBACK_CHUNKS * CHUNK_SIZE
         self.is_speaking = False
+        self.chunk_ms = 1000 * CHUNK_SIZE / SAMPLING_RATE
+        self._pause_ms = None  # silence so far while a pause awaits an endpoint decision
         
         # Initialize VAD
         self.vad_model = load_silero_vad(onnx=True)
@@ -39,30 +67,43 @@ class AudioProcessor:
             model=self.vad_model,
             sampling_rate=SAMPLING_RATE,
             threshold=VAD_THRESHOLD,
-            min_silence_duration_ms=VAD_MIN_SILENCE,
+            min_silence_duration_ms=endpointer.base_silence_ms if endpointer else VAD_MIN_SILENCE,
         )
+
+        # Energy pre-gate: skip VAD inference while the room is clearly silent
+        self.energy_gate = None
+        if ENERGY_GATE_ENABLED:
+            self.energy_gate = EnergyGate(
+                margin_db=ENERGY_GATE_MARGIN_DB,
+                hangover_chunks=ENERGY_GATE_HANGOVER_CHUNKS,
+            )
+        # Recently skipped chunks, replayed into the VAD when the gate opens
+        self._gate_context = deque(maxlen=ENERGY_GATE_PREROLL_CHUNKS)
+
+        # Statistics
+        self.chunks_processed = 0
+        self.vad_inferences = 0
+        self.chunks_skipped = 0
+        self.chunks_muted = 0
+        self._started_wall = None
+        self._started_cpu = None
     
     def _audio_callback(self, data, frames, time, status):
-        """Callback for audio input."""
-        if status:
-            print(f"Audio status: {status}")
+        """Callback for audio input.
         
-        try:
-            # Handle buffer overflow
-            if self.audio_queue.full():
-                try:
-                    self.audio_queue.get_nowait()
-                except queue.Empty:
-                    pass
-            
-            self.audio_queue.put((data.copy().flatten(), status))
-        except Exception as e:
-            print(f"Error in audio callback: {e}")
+        Runs on the PortAudio thread: it only copies the block into the ring
+        and counts glitches, without allocating or printing.
+        """
+        if status:
+            if status.input_overflow:
+                self.overruns += 1
+            if status.input_underflow:
+                self.underruns += 1
+        self.ring.write(data)
     
     def start(self):
         """Start audio stream."""
         self.running = True
-        self.audio_queue = queue.Queue(maxsize=5)
         
         # Start audio stream
         self.stream = sd.InputStream(
@@ -72,58 +113,151 @@ class AudioProcessor:
             callback=self._audio_callback
         )
         self.stream.start()
-        print("✅ Audio stream started")
+        self._started_wall = time.perf_counter()
+        self._started_cpu = time.process_time()
+        ui.success("Audio stream started")
     
     def process(self):
         """Process audio chunks and detect speech."""
         while self.running:
-            try:
-                # Get audio chunk
-                chunk, status = self.audio_queue.get(timeout=0.1)
-                
-                # Add to speech buffer
-                self.speech_buffer = np.concatenate((self.speech_buffer, chunk))
-                if not self.is_speaking:
-                    self.speech_buffer = self.speech_buffer[-self.lookback_size:]
-                
-                # VAD processing
-                speech_dict = self.vad_iterator(chunk)
-                
-                if speech_dict:
-                    if "start" in speech_dict and not self.is_speaking:
-                        self.is_speaking = True
-                        print("\r🎤 Listening...", end="", flush=True)
-                    
-                    elif "end" in speech_dict and self.is_speaking:
-                        self.is_speaking = False
-                        print("\r⏳ Processing...", end="", flush=True)
-                        
-                        # Call callback with speech buffer
-                        if len(self.speech_buffer) > 0:
-                            self.on_speech_detected(self.speech_buffer.copy())
-                        
-                        # Reset buffer
-                        self.speech_buffer = np.empty(0, dtype=np.float32)
-                        print("\r✨ Ready...", end="", flush=True)
-                
-                elif self.is_speaking:
-                    # Check max speech duration
-                    if (len(self.speech_buffer) / SAMPLING_RATE) > MAX_SPEECH_SECS:
-                        self.is_speaking = False
-                        self._soft_reset()
-                        
-                        # Process speech
-                        if len(self.speech_buffer) > 0:
-                            self.on_speech_detected(self.speech_buffer.copy())
-                        
-                        self.speech_buffer = np.empty(0, dtype=np.float32)
-                        print("\r✨ Ready...", end="", flush=True)
-            
-            except queue.Empty:
+            # Get audio chunk (a view into the ring, valid until released)
+            chunk = self.ring.acquire(timeout=0.1)
+            if chunk is None:
                 continue
+            
+            try:
+                self._process_chunk(chunk)
             except Exception as e:
-                print(f"\n❌ Audio processing error: {e}")
-                continue
+                ui.error(f"Audio processing error: {e}")
+            finally:
+                self.ring.release()
+    
+    def _process_chunk(self, chunk):
+        """Run a single audio chunk through the gate, VAD and speech buffer."""
+        self.chunks_processed += 1
+        if self._playback_mute():
+            self.chunks_muted += 1
+            return
+        
+        # Add to speech buffer
+        self.speech_buffer = np.concatenate((self.speech_buffer, chunk))
+        if not self.is_speaking:
+            self.speech_buffer = self.speech_buffer[-self.lookback_size:]
+        
+        # VAD processing
+        speech_dict = self._run_vad(chunk)
+        
+        if speech_dict:
+            if "start" in speech_dict and not self.is_speaking:
+                self.is_speaking = True
+                profiler.begin_turn("listening")
+                ui.status("🎤 Listening...")
+                if self.on_speech_start is not None:
+                    self.on_speech_start()
+            
+            elif "start" in speech_dict and self._pause_ms is not None:
+                # Speech resumed before the pause ended the turn
+                self.endpointer.on_resume(self._pause_ms)
+                self._pause_ms = None
+            
+            elif "end" in speech_dict and self.is_speaking:
+                if self.endpointer is None:
+                    self._finalize_turn()
+                else:
+                    # The VAD has already waited the base silence window
+                    self._pause_ms = self.endpointer.base_silence_ms
+                    self.endpointer.on_pause(self.speech_buffer)
+                    if self.endpointer.should_finalize(self._pause_ms):
+                        self._finalize_turn()
+        
+        elif self._pause_ms is not None:
+            self._pause_ms += self.chunk_ms
+            if self.endpointer.should_finalize(self._pause_ms):
+                self._finalize_turn()
+        
+        elif self.is_speaking:
+            # Check max speech duration
+            if (len(self.speech_buffer) / SAMPLING_RATE) > MAX_SPEECH_SECS:
+                self._soft_reset()
+                self._finalize_turn()
+    
+    def _finalize_turn(self):
+        """End the current turn and hand the buffered speech to the callback."""
+        self.is_speaking = False
+        ui.status("⏳ Processing...")
+        
+        if self.endpointer is not None and self._pause_ms is not None:
+            self.endpointer.on_finalize(self._pause_ms)
+        self._pause_ms = None
+        
+        # Call callback with speech buffer
+        if len(self.speech_buffer) > 0:
+            self.on_speech_detected(self.speech_buffer.copy())
+        
+        # Reset buffer (the callback's owner shows "Ready" once the turn is answered or dropped)
+        self.speech_buffer = np.empty(0, dtype=np.float32)
+    
+    def _playback_mute(self):
+        """Return True while speech output (plus its echo tail) is playing."""
+        now = time.monotonic()
+        if self.is_playing is not None and self.is_playing():
+            self._muted_until = now + PLAYBACK_TAIL_SECS
+        if now < self._muted_until:
+            if not self._muted:
+                self._muted = True
+                if self.is_speaking:
+                    # Speech captured before playback started is still the user's
+                    self._finalize_turn()
+                logging.debug("Microphone muted during playback")
+            return True
+        if self._muted:
+            # Start over without any of the playback in the VAD state or lookback
+            self._muted = False
+            self.vad_iterator.reset_states()
+            self.speech_buffer = np.empty(0, dtype=np.float32)
+            self._gate_context.clear()
+        return False
+    
+    def _run_vad(self, chunk):
+        """Run the VAD on a chunk unless the energy gate marks it as silence."""
+        if self.energy_gate is not None and not self.is_speaking:
+            if not self.energy_gate(chunk):
+                # Copy: the chunk's ring slot is reused once released
+                self._gate_context.append(chunk.copy())
+                self.chunks_skipped += 1
+                return None
+            
+            # Gate just opened: replay the preceding chunks so the VAD sees the onset
+            speech_dict = None
+            while self._gate_context:
+                self.vad_inferences += 1
+                speech_dict = self.vad_iterator(self._gate_context.popleft()) or speech_dict
+            self.vad_inferences += 1
+            return self.vad_iterator(chunk) or speech_dict
+        
+        self.vad_inferences += 1
+        return self.vad_iterator(chunk)
+    
+    def get_stats(self):
+        """Get audio processing statistics."""
+        stats = {
+            'chunks': self.chunks_processed,
+            'vad_inferences': self.vad_inferences,
+            'skipped_chunks': self.chunks_skipped,
+            'skip_ratio': self.chunks_skipped / max(self.chunks_processed, 1),
+            'muted_chunks': self.chunks_muted,
+            'noise_floor_db': self.energy_gate.noise_floor_db if self.energy_gate else None,
+            'cpu_percent': 0.0,
+            'overruns': self.overruns,
+            'underruns': self.underruns,
+            'dropped_chunks': self.ring.dropped,
+            'ring_max_fill': self.ring.max_fill,
+        }
+        if self._started_wall is not None:
+            wall = time.perf_counter() - self._started_wall
+            cpu = time.process_time() - self._started_cpu
+            stats['cpu_percent'] = 100.0 * cpu / max(wall, 1e-6)
+        return stats
     
     def _soft_reset(self):
         """Soft reset VAD iterator."""
@@ -141,4 +275,11 @@ class AudioProcessor:
     def cleanup(self):
         """Clean up resources."""
         self.stop()
+        stats = self.get_stats()
+        logging.debug(f"Audio stats: {stats}")
+        if stats['overruns'] or stats['dropped_chunks']:
+            logging.warning(
+                f"Audio capture glitches: {stats['overruns']} overruns, "
+                f"{stats['dropped_chunks']} dropped chunks"
+            )
         self.speech_buffer = np.empty(0, dtype=np.float32)
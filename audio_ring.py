@@ -0,0 +1,103 @@
+"""Preallocated single-producer / single-consumer ring of audio chunks."""
+
+import threading
+import numpy as np
+
+
+class ChunkRing:
+    """Fixed pool of chunk buffers shared by the PortAudio callback and the processor.
+
+    The callback (the only producer) copies each block into the next free
+    slot and publishes it by advancing the write counter; the processing
+    thread (the only consumer) reads the slot in place and advances the read
+    counter when done. Each counter is written by one thread only, so no lock
+    is needed and no buffer is allocated per block. When the consumer falls
+    behind and every slot is in use, the new block is dropped and counted.
+    """
+
+    def __init__(self, capacity, chunk_size, dtype=np.float32):
+        """Initialize the ring.
+
+        Args:
+            capacity: Number of chunk slots
+            chunk_size: Samples per chunk
+            dtype: Sample type of the slots
+        """
+        self.capacity = capacity
+        self.chunk_size = chunk_size
+        self._slots = np.zeros((capacity, chunk_size), dtype=dtype)
+        self._lengths = np.zeros(capacity, dtype=np.int64)
+        self._write = 0  # only advanced by the producer
+        self._read = 0   # only advanced by the consumer
+        self._ready = threading.Event()
+
+        # Statistics
+        self.written = 0
+        self.dropped = 0
+        self.short_blocks = 0
+        self.max_fill = 0
+
+    def __len__(self):
+        return self._write - self._read
+
+    def write(self, data):
+        """Copy one block into the next free slot (producer side).
+
+        Args:
+            data: Array of ``chunk_size`` samples, or ``(frames, 1)`` as delivered by PortAudio
+
+        Returns:
+            False if the ring was full and the block was dropped
+        """
+        fill = self._write - self._read
+        if fill >= self.capacity:
+            self.dropped += 1
+            return False
+
+        index = self._write % self.capacity
+        slot = self._slots[index]
+        frames = min(len(data), self.chunk_size)
+        if data.ndim > 1:
+            slot[:frames] = data[:frames, 0]
+        else:
+            slot[:frames] = data[:frames]
+        if frames < self.chunk_size:
+            self.short_blocks += 1
+        self._lengths[index] = frames
+
+        self._write += 1
+        self.written += 1
+        if fill + 1 > self.max_fill:
+            self.max_fill = fill + 1
+        self._ready.set()
+        return True
+
+    def acquire(self, timeout=None):
+        """Return a view of the oldest unread chunk, or None on timeout (consumer side).
+
+        The view stays valid until ``release`` is called; copy it to keep it longer.
+        """
+        if self._write == self._read:
+            self._ready.clear()
+            # Re-check after clearing so a block published in between is not missed
+            if self._write == self._read and not self._ready.wait(timeout):
+                return None
+            if self._write == self._read:
+                return None
+        index = self._read % self.capacity
+        return self._slots[index, :self._lengths[index]]
+
+    def release(self):
+        """Hand the chunk returned by ``acquire`` back to the producer."""
+        self._read += 1
+
+    def get_stats(self):
+        """Get ring statistics."""
+        return {
+            'capacity': self.capacity,
+            'fill': len(self),
+            'max_fill': self.max_fill,
+            'written': self.written,
+            'dropped': self.dropped,
+            'short_blocks': self.short_blocks,
+        }
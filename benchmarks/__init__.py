@@ -0,0 +1 @@
+"""Benchmarks for LUMA components and builds."""
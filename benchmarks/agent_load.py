@@ -0,0 +1,118 @@
+"""Headless text-mode load test of LUMAAgent against the mock LLM server.
+
+Runs N simulated users concurrently, each with its own LUMAAgent (TTS off,
+own history database) sending the lines of a text corpus to get_response.
+The model is served by benchmarks/mock_llm_server.py with scripted latency,
+so the report isolates LUMA's own overhead: history reads and writes,
+context building, routing, Agno orchestration and response formatting.
+
+Usage:
+    python -m benchmarks.agent_load --users 8 --turns 20 --first-token-ms 200 --token-ms 5
+    python -m benchmarks.agent_load corpus.txt --users 4
+"""
+
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+import threading
+import statistics
+import time
+
+from benchmarks.mock_llm_server import MockLLMServer
+
+DEFAULT_CORPUS = [
+    "hello there",
+    "what time is it",
+    "tell me a joke about computers",
+    "how are you today",
+    "give me a quick tip for staying focused while working from home",
+    "what's your name",
+    "suggest a name for a small orange cat",
+    "thanks a lot",
+]
+
+STAGES = ('context', 'llm', 'format', 'db', 'total')
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def run_user(agent, lines, turns, results):
+    """Send ``turns`` lines from the corpus and collect per-turn timings."""
+    for i in range(turns):
+        agent.get_response(lines[i % len(lines)])
+        results.append(agent.last_timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('corpus', nargs='?', help="Text file with one request per line")
+    parser.add_argument('--users', type=int, default=4, help="Concurrent simulated users")
+    parser.add_argument('--turns', type=int, default=10, help="Turns per user")
+    parser.add_argument('--first-token-ms', type=float, default=200)
+    parser.add_argument('--token-ms', type=float, default=5)
+    parser.add_argument('--chunk-tokens', type=int, default=1, help="Tokens per streamed event")
+    args = parser.parse_args()
+
+    lines = DEFAULT_CORPUS
+    if args.corpus:
+        with open(args.corpus, encoding='utf-8') as f:
+            lines = [line.strip() for line in f if line.strip()]
+
+    server = MockLLMServer(first_token_ms=args.first_token_ms, token_ms=args.token_ms,
+                           chunk_tokens=args.chunk_tokens).start()
+
+    # Configure LUMA before it is imported: mock endpoint, no rendering
+    os.environ['LUMA_LLM_BASE_URL'] = server.base_url
+    os.environ['LUMA_HEADLESS'] = '1'
+    os.environ.setdefault('GROQ_API_KEY', 'mock')
+    workdir = tempfile.mkdtemp(prefix='luma-load-')
+    os.chdir(workdir)  # history and search cache files stay out of the project
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from agent import LUMAAgent
+
+    agents = [LUMAAgent(tts=False, db_path=f"user-{i}.db") for i in range(args.users)]
+    results = []
+    threads = [threading.Thread(target=run_user, args=(agent, lines, args.turns, results))
+               for agent in agents]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    for agent in agents:
+        agent.cleanup()
+    server.stop()
+    os.chdir(os.path.dirname(workdir))
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    errors = sum(1 for r in results if r.get('error'))
+    mock = server.get_stats()
+    print(f"users={args.users} turns={len(results)} errors={errors} wall={wall:.2f}s "
+          f"throughput={len(results) / wall:.1f} turns/s")
+    print(f"{'stage':<10}{'mean (ms)':>12}{'p50 (ms)':>12}{'p95 (ms)':>12}")
+    for stage in STAGES:
+        values = [1000 * r[stage] for r in results if stage in r]
+        if values:
+            print(f"{stage:<10}{statistics.mean(values):>12.2f}"
+                  f"{_percentile(values, 0.5):>12.2f}{_percentile(values, 0.95):>12.2f}")
+
+    # Time spent in the model call beyond what the mock server itself took
+    llm = [r['llm'] for r in results if 'llm' in r]
+    total = [r['total'] for r in results if 'total' in r]
+    if llm and mock['requests']:
+        service = mock['avg_service_secs']
+        print(f"mock service  {1000 * service:.2f} ms/request over {mock['requests']} requests")
+        print(f"orchestration {1000 * (statistics.mean(llm) - service):.2f} ms/turn (llm stage minus mock service)")
+        print(f"agent overhead {1000 * (statistics.mean(total) - service):.2f} ms/turn (total minus mock service)")
+
+
+if __name__ == '__main__':
+    main()
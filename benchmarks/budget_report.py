@@ -0,0 +1,126 @@
+"""Tokens and latency of unbounded answers versus per-intent output budgets.
+
+Sends the same requests to LUMAAgent twice against the mock LLM server:
+once with budgets disabled (the model writes a full answer) and once with
+INTENT_BUDGETS (max tokens and answer style chosen from the request's
+intent). Every turn first calls a tool (get_current_time), then the mock
+replies with a long multi-bullet answer and stops at ``max_tokens``, so
+the report shows generated tokens and model latency per intent, plus how
+many answers were truncated at the limit (and how many runs were repeated
+because the limit cut a tool call). For requests that need tools (news,
+history) the limit applies only to the answer after the tool call. A real
+model also follows the style instruction, ending its answer before the
+limit rather than at it.
+
+Usage:
+    python -m benchmarks.budget_report --first-token-ms 200 --token-ms 10
+    python -m benchmarks.budget_report requests.txt --runs 3
+"""
+
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+import statistics
+
+from benchmarks.mock_llm_server import MockLLMServer
+
+DEFAULT_REQUESTS = [
+    "what's the latest news about the mars mission",
+    "any breaking news today",
+    "what time is it",
+    "hello there",
+    "did i tell you about my trip last week",
+    "give me a tip for sleeping better",
+    "write a short poem about autumn",
+]
+
+# A typical unconstrained news answer: several bullets with sources
+LONG_REPLY = " ".join(
+    f"- Story {i}: officials confirmed on Monday that the project reached its next milestone "
+    f"after weeks of delays, and analysts expect further announcements later this month (Source: Example News)."
+    for i in range(1, 13)
+)
+
+
+def run_requests(agent, server, requests, runs):
+    """Return ``{intent: [(tokens, llm_secs, spoken_words, truncated, retries), ...]}`` for the requests."""
+    from router import classify_intent
+
+    results = {}
+    for _ in range(runs):
+        for text in requests:
+            before = server.get_stats()['completion_tokens']
+            budget_before = agent.get_budget_stats()
+            reply = agent.get_response(text)
+            tokens = server.get_stats()['completion_tokens'] - before
+            budget_after = agent.get_budget_stats()
+            results.setdefault(classify_intent(text), []).append(
+                (tokens, agent.last_timings.get('llm', 0.0), len(reply.split()),
+                 budget_after['truncated_answers'] - budget_before['truncated_answers'],
+                 budget_after['tool_call_retries'] - budget_before['tool_call_retries']))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('requests', nargs='?', help="Text file with one request per line")
+    parser.add_argument('--runs', type=int, default=2, help="Repetitions of the request set")
+    parser.add_argument('--first-token-ms', type=float, default=200)
+    parser.add_argument('--token-ms', type=float, default=10)
+    args = parser.parse_args()
+
+    requests = DEFAULT_REQUESTS
+    if args.requests:
+        with open(args.requests, encoding='utf-8') as f:
+            requests = [line.strip() for line in f if line.strip()]
+
+    server = MockLLMServer(first_token_ms=args.first_token_ms, token_ms=args.token_ms,
+                           chunk_tokens=4, reply=LONG_REPLY, tool_call='get_current_time').start()
+
+    # Configure LUMA before it is imported: mock endpoint, no rendering
+    os.environ['LUMA_LLM_BASE_URL'] = server.base_url
+    os.environ['LUMA_HEADLESS'] = '1'
+    os.environ.setdefault('GROQ_API_KEY', 'mock')
+    workdir = tempfile.mkdtemp(prefix='luma-budgets-')
+    os.chdir(workdir)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from agent import LUMAAgent
+    from config import INTENT_BUDGETS
+
+    agent = LUMAAgent(tts=False, db_path="before.db")
+    agent.budgets = {}
+    before = run_requests(agent, server, requests, args.runs)
+    agent.cleanup()
+
+    agent = LUMAAgent(tts=False, db_path="after.db")
+    agent.budgets = INTENT_BUDGETS
+    after = run_requests(agent, server, requests, args.runs)
+    agent.cleanup()
+
+    server.stop()
+    os.chdir(os.path.dirname(workdir))
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{'intent':<12}{'tokens before':>15}{'tokens after':>14}"
+          f"{'llm ms before':>15}{'llm ms after':>14}{'words spoken':>14}{'truncated':>11}{'retries':>9}")
+    totals = {'before': [0, 0.0], 'after': [0, 0.0]}
+    for intent in before:
+        b, a = before[intent], after.get(intent, [])
+        for name, rows in (('before', b), ('after', a)):
+            totals[name][0] += sum(r[0] for r in rows)
+            totals[name][1] += sum(r[1] for r in rows)
+        print(f"{intent:<12}{statistics.mean(r[0] for r in b):>15.0f}{statistics.mean(r[0] for r in a):>14.0f}"
+              f"{1000 * statistics.mean(r[1] for r in b):>15.0f}{1000 * statistics.mean(r[1] for r in a):>14.0f}"
+              f"{statistics.mean(r[2] for r in a):>14.0f}{sum(r[3] for r in a):>11}{sum(r[4] for r in a):>9}")
+
+    (tokens_before, secs_before), (tokens_after, secs_after) = totals['before'], totals['after']
+    print(f"total tokens {tokens_before} -> {tokens_after} "
+          f"({100 * (1 - tokens_after / max(tokens_before, 1)):.0f}% fewer), "
+          f"model time {secs_before:.2f}s -> {secs_after:.2f}s, "
+          f"{sum(r[3] for rows in after.values() for r in rows)} answers truncated")
+
+
+if __name__ == '__main__':
+    main()
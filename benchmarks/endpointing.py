@@ -0,0 +1,116 @@
+"""End-of-turn latency benchmark on recorded fixtures.
+
+Feeds 16 kHz mono WAV recordings (one user turn each, trimmed of trailing
+silence) through AudioProcessor chunk by chunk, followed by silence, and
+reports how long after the end of speech each endpointing mode finalizes
+the turn. Fixtures are processed in order with one endpointer per mode, so
+the adaptive pause window learns from earlier recordings like it would
+for a single speaker.
+
+Usage:
+    python -m benchmarks.endpointing path/to/fixtures --tail-secs 4
+"""
+
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+from config import (
+    CHUNK_SIZE,
+    SAMPLING_RATE,
+    VAD_MIN_SILENCE,
+    ENDPOINT_BASE_SILENCE_MS,
+    ENDPOINT_COMPLETE_SILENCE_MS
+)
+from energy_gate import EnergyGate
+from endpointer import Endpointer
+from audio_processor import AudioProcessor
+
+
+def speech_end_sample(audio, floor_margin_db=35.0):
+    """Return the sample index where the last loud chunk of a recording ends."""
+    levels = [EnergyGate.measure(audio[i:i + CHUNK_SIZE])[0]
+              for i in range(0, len(audio) - CHUNK_SIZE + 1, CHUNK_SIZE)]
+    threshold = max(levels) - floor_margin_db
+    last = max(i for i, level in enumerate(levels) if level > threshold)
+    return (last + 1) * CHUNK_SIZE
+
+
+def run_fixture(processor, audio, tail_secs, rng):
+    """Feed one recording plus trailing silence, return finalization sample indices."""
+    finalized = []
+    processor.on_speech_detected = lambda buffer: finalized.append(processor.chunks_processed * CHUNK_SIZE)
+    start_sample = processor.chunks_processed * CHUNK_SIZE
+
+    tail = (rng.standard_normal(int(tail_secs * SAMPLING_RATE)) * 1e-4).astype(np.float32)
+    signal = np.concatenate((audio, tail))
+    asr_secs = 0.0
+    for i in range(0, len(signal) - CHUNK_SIZE + 1, CHUNK_SIZE):
+        processor._process_chunk(signal[i:i + CHUNK_SIZE])
+        if processor.endpointer is not None:
+            # Partial ASR is charged as wall time, not as audio time
+            started = time.perf_counter()
+            processor.endpointer.wait_for_partial()
+            asr_secs += time.perf_counter() - started
+    return [s - start_sample for s in finalized], asr_secs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare end-of-turn latency of endpointing modes")
+    parser.add_argument('fixtures', help="Directory of 16 kHz mono .wav files")
+    parser.add_argument('--tail-secs', type=float, default=VAD_MIN_SILENCE / 1000 + 1.0)
+    args = parser.parse_args()
+
+    files = sorted(Path(args.fixtures).glob('*.wav'))
+    if not files:
+        parser.error(f"No .wav fixtures in {args.fixtures}")
+
+    recordings = []
+    for path in files:
+        audio, rate = sf.read(path, dtype='float32', always_2d=True)
+        if rate != SAMPLING_RATE:
+            parser.error(f"{path.name}: expected {SAMPLING_RATE} Hz, got {rate}")
+        audio = audio[:, 0]
+        recordings.append((path.name, audio, speech_end_sample(audio)))
+
+    from transcriber import Transcriber
+    transcriber = Transcriber()
+
+    print(f"{'mode':<10}{'median (ms)':>14}{'p90 (ms)':>12}{'split':>8}{'missed':>8}{'asr (ms)':>10}")
+    for mode in ('fixed', 'adaptive'):
+        endpointer = Endpointer(
+            transcriber,
+            mode=mode,
+            base_silence_ms=ENDPOINT_BASE_SILENCE_MS,
+            complete_silence_ms=ENDPOINT_COMPLETE_SILENCE_MS,
+            max_silence_ms=VAD_MIN_SILENCE,
+        )
+        processor = AudioProcessor(None, endpointer)
+        rng = np.random.default_rng(0)
+
+        latencies, split, missed, asr_total = [], 0, 0, 0.0
+        for name, audio, end in recordings:
+            finalized, asr_secs = run_fixture(processor, audio, args.tail_secs, rng)
+            asr_total += asr_secs
+            if not finalized:
+                missed += 1
+                continue
+            if len(finalized) > 1:
+                split += 1
+            latencies.append(1000 * (finalized[-1] - end) / SAMPLING_RATE)
+        endpointer.cleanup()
+
+        if latencies:
+            p90 = float(np.percentile(latencies, 90))
+            print(f"{mode:<10}{statistics.median(latencies):>14.0f}{p90:>12.0f}"
+                  f"{split:>8}{missed:>8}{1000 * asr_total / len(recordings):>10.0f}")
+        else:
+            print(f"{mode:<10}{'-':>14}{'-':>12}{split:>8}{missed:>8}{'-':>10}")
+
+
+if __name__ == '__main__':
+    main()
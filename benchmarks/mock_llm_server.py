@@ -0,0 +1,254 @@
+"""Local OpenAI/Groq-compatible chat completions server with scripted latency.
+
+Answers ``POST /openai/v1/chat/completions`` (the path the Groq SDK uses)
+and ``POST /v1/chat/completions`` with a canned reply, either as one JSON
+body or streamed as server-sent events. Latency is simulated with a
+time-to-first-token delay plus a per-token delay, and ``max_tokens`` is
+honoured. With ``fail_status`` every request fails with that HTTP status,
+to exercise failover. With ``tool_call`` the first completion of a turn
+calls that tool (when the request offers it) and the completion after the
+tool result gets the reply. Point LUMA at it with ``LUMA_LLM_BASE_URL=http://127.0.0.1:PORT``.
+
+Usage:
+    python -m benchmarks.mock_llm_server --port 8089 --first-token-ms 300 --token-ms 10
+"""
+
+import sys
+import json
+import time
+import uuid
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = (
+    "Sure! Here is a short answer. The weather today is mild with a light breeze "
+    "and a few clouds in the afternoon. It should stay dry until the evening, "
+    "so it is a good day for a walk. Let me know if you want more details."
+)
+
+
+class MockLLMServer:
+    """Threaded mock of a chat completions endpoint."""
+
+    def __init__(self, host='127.0.0.1', port=0, first_token_ms=300, token_ms=10,
+                 chunk_tokens=1, reply=DEFAULT_REPLY, fail_status=None, tool_call=None):
+        """Initialize the server (port 0 picks a free port).
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on
+            first_token_ms: Delay before the first token (or the whole non-streamed reply)
+            token_ms: Delay per generated token after the first
+            chunk_tokens: Tokens per streamed event
+            reply: Text returned for every request, split on whitespace into tokens
+            fail_status: HTTP status returned (after first_token_ms) instead of a reply
+            tool_call: Name of a tool called (without arguments) before replying
+        """
+        self.first_token = first_token_ms / 1000
+        self.token_delay = token_ms / 1000
+        self.chunk_tokens = max(1, chunk_tokens)
+        self.tokens = reply.split(' ')
+        self.fail_status = fail_status
+        self.tool_call = tool_call
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.requests = 0
+        self.service_secs = 0.0
+        self.completion_tokens = 0
+
+        handler = type('Handler', (_Handler,), {'mock': self})
+        self.httpd = _Server((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def record(self, secs, completion_tokens=0):
+        with self._lock:
+            self.requests += 1
+            self.service_secs += secs
+            self.completion_tokens += completion_tokens
+
+    def get_stats(self):
+        """Get request count, simulated service time and generated tokens."""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'service_secs': self.service_secs,
+                'completion_tokens': self.completion_tokens,
+                'avg_service_secs': self.service_secs / max(self.requests, 1),
+            }
+
+
+class _Server(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients dropping connections (cancelled or losing hedged requests) are expected
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Request handler; ``mock`` is set to the owning MockLLMServer."""
+
+    protocol_version = 'HTTP/1.1'
+    mock = None
+    TOOL_CALL_TOKENS = 12  # completion tokens a tool call is billed as
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if self.path.rstrip('/') not in ('/openai/v1/chat/completions', '/v1/chat/completions'):
+            self._send_json(404, {'error': {'message': f"Unknown path {self.path}"}})
+            return
+
+        started = time.perf_counter()
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        tokens = self.mock.tokens
+        if self.mock.fail_status:
+            time.sleep(self.mock.first_token)
+            self._send_json(self.mock.fail_status, {'error': {'message': "Mock failure", 'type': 'server_error'}})
+            self.mock.record(time.perf_counter() - started)
+            return
+        max_tokens = body.get('max_tokens') or body.get('max_completion_tokens')
+        finish_reason = 'stop'
+        tool_call = self._tool_call(body, max_tokens)
+        if tool_call is not None:
+            tokens = [''] * min(self.TOOL_CALL_TOKENS, max_tokens or self.TOOL_CALL_TOKENS)
+            finish_reason = 'tool_calls' if len(tokens) == self.TOOL_CALL_TOKENS else 'length'
+        elif max_tokens and max_tokens < len(tokens):
+            tokens = tokens[:max_tokens]
+            finish_reason = 'length'
+
+        completion = {
+            'id': f"chatcmpl-{uuid.uuid4().hex}",
+            'created': int(time.time()),
+            'model': body.get('model', 'mock'),
+            'system_fingerprint': 'mock',
+        }
+        usage = {
+            'prompt_tokens': sum(len(str(m.get('content', '')).split()) for m in body.get('messages', [])),
+            'completion_tokens': len(tokens),
+        }
+        usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+
+        try:
+            if body.get('stream'):
+                self._stream(completion, tokens, finish_reason, usage, tool_call)
+            else:
+                time.sleep(self.mock.first_token + self.mock.token_delay * max(len(tokens) - 1, 0))
+                self._send_json(200, dict(
+                    completion,
+                    object='chat.completion',
+                    choices=[{
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': None, 'tool_calls': [tool_call]}
+                        if tool_call else {'role': 'assistant', 'content': ' '.join(tokens)},
+                        'finish_reason': finish_reason,
+                    }],
+                    usage=usage,
+                ))
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client cancelled the request
+        finally:
+            self.mock.record(time.perf_counter() - started, len(tokens))
+
+    def _tool_call(self, body, max_tokens):
+        """Return the tool call the completion answers with, or None to reply.
+
+        A call cut by ``max_tokens`` gets truncated (invalid) JSON arguments.
+        """
+        name = self.mock.tool_call
+        messages = body.get('messages') or []
+        offered = {tool.get('function', {}).get('name') for tool in body.get('tools') or []}
+        if name not in offered or (messages and messages[-1].get('role') == 'tool'):
+            return None
+        cut = max_tokens and max_tokens < self.TOOL_CALL_TOKENS
+        return {'index': 0, 'id': f"call_{uuid.uuid4().hex[:12]}", 'type': 'function',
+                'function': {'name': name, 'arguments': '{' if cut else '{}'}}
+
+    def _stream(self, completion, tokens, finish_reason, usage, tool_call=None):
+        """Send the reply (or the tool call) as server-sent events."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def event(delta, finish=None, extra=None):
+            chunk = dict(completion, object='chat.completion.chunk',
+                         choices=[{'index': 0, 'delta': delta, 'finish_reason': finish}])
+            if extra:
+                chunk.update(extra)
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+
+        time.sleep(self.mock.first_token)
+        event({'role': 'assistant', 'content': ''})
+        if tool_call is not None:
+            time.sleep(self.mock.token_delay * max(len(tokens) - 1, 0))
+            event({'tool_calls': [tool_call]})
+            tokens = []
+        step = self.mock.chunk_tokens
+        for i in range(0, len(tokens), step):
+            if i:
+                time.sleep(self.mock.token_delay * step)
+            text = ' '.join(tokens[i:i + step])
+            event({'content': text if i == 0 else ' ' + text})
+        event({}, finish_reason, {'x_groq': {'id': completion['id'], 'usage': usage}, 'usage': usage})
+        self._write_chunk("data: [DONE]\n\n")
+        self._write_chunk("")
+
+    def _write_chunk(self, text):
+        data = text.encode('utf-8')
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--first-token-ms', type=float, default=300)
+    parser.add_argument('--token-ms', type=float, default=10)
+    parser.add_argument('--chunk-tokens', type=int, default=1, help="Tokens per streamed event")
+    parser.add_argument('--fail-status', type=int, help="Fail every request with this HTTP status")
+    parser.add_argument('--tool-call', help="Call this tool before replying, when the request offers it")
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.host, args.port, args.first_token_ms, args.token_ms, args.chunk_tokens,
+                           fail_status=args.fail_status, tool_call=args.tool_call)
+    print(f"Mock LLM server listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
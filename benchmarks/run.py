@@ -0,0 +1,330 @@
+"""Micro-benchmarks of LUMA's hot components with regression thresholds.
+
+Each benchmark times one component in isolation and reports metrics in
+milliseconds (best of several repeats, which is the least noisy estimate):
+
+    audio     AudioProcessor chunk loop (energy gate + VAD) on 10 s of synthetic audio
+    asr       Transcriber on the first 1 and 4 seconds and all 10 s of fixtures/speech.wav
+    database  MessageDatabase insert, recent read and search at 1k/10k/50k messages
+    format    LUMAAgent._format_response on large markdown replies
+    browse    browse_url text extraction and passage selection on fixtures/article.html
+
+Every benchmark runs ``--rounds`` times and the median is compared with
+benchmarks/baselines.json; the run fails (exit code 1) when a metric is
+slower than its baseline by more than the threshold, when a benchmark
+raises, or when a baselined metric was not measured. Benchmarks whose
+optional dependencies are not installed (ImportError) are skipped; a skip
+of a benchmark with baselines also fails the run unless --allow-skips is
+given. Baselines depend on the machine: record them with --update on the
+machine that runs the comparison.
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run database format --threshold 0.25
+    python -m benchmarks.run --allow-skips          # without the audio stack
+    python -m benchmarks.run --update
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import wave
+import tempfile
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINES_PATH = os.path.join(BENCH_DIR, 'baselines.json')
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a function returning ``{metric: milliseconds}`` as a benchmark."""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def timed(func, repeat=5, number=None, min_round_secs=0.05):
+    """Best milliseconds per call of ``func`` over ``repeat`` rounds of ``number`` calls.
+
+    Without ``number``, rounds are sized like timeit's autorange so fast
+    calls are not dominated by timer and scheduling noise.
+    """
+    if number is None:
+        number = 1
+        while True:
+            started = time.perf_counter()
+            for _ in range(number):
+                func()
+            if time.perf_counter() - started >= min_round_secs:
+                break
+            number *= 2
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append(1000 * (time.perf_counter() - started) / number)
+    return min(samples)
+
+
+def synthetic_speech(secs, rate=16000, seed=0):
+    """Deterministic speech-like signal: syllable-rate bursts of harmonics over low noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(secs * rate)) / rate
+    pitch = 140 + 20 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)  # ~4 syllables per second
+    signal = 0.3 * voiced * envelope + 0.003 * rng.standard_normal(len(t))
+    return signal.astype(np.float32)
+
+
+def recorded_speech(path=os.path.join(FIXTURES_DIR, 'speech.wav')):
+    """Recorded 16 kHz mono speech as float32 samples.
+
+    speech.wav is the ~10 s English reading shipped as an example by the
+    Moonshine ASR project (MIT licensed, Useful Sensors).
+    """
+    with wave.open(path, 'rb') as f:
+        frames = f.readframes(f.getnframes())
+    return np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+@benchmark('audio')
+def bench_audio():
+    from config import CHUNK_SIZE, SAMPLING_RATE
+    from audio_processor import AudioProcessor
+
+    # Speech and silence alternate so both the gate and the VAD paths are exercised
+    silence = (0.001 * np.random.default_rng(1).standard_normal(2 * SAMPLING_RATE)).astype(np.float32)
+    signal = np.concatenate([silence, synthetic_speech(3), silence, synthetic_speech(3, seed=1)])
+    chunks = [signal[i:i + CHUNK_SIZE] for i in range(0, len(signal) - CHUNK_SIZE + 1, CHUNK_SIZE)]
+
+    processor = AudioProcessor(lambda speech: None)
+
+    def loop():
+        for chunk in chunks:
+            processor._process_chunk(chunk)
+
+    loop()  # warm up the ONNX session
+    ms = timed(loop, repeat=5)
+    processor.cleanup()
+    return {
+        'audio.chunk_loop_10s': ms,
+        'audio.per_chunk': ms / len(chunks),
+    }
+
+
+@benchmark('asr')
+def bench_asr():
+    from transcriber import Transcriber
+
+    speech = recorded_speech()
+    transcriber = Transcriber()  # warms up on one second of silence
+    if not transcriber(speech).strip():
+        raise RuntimeError("empty transcript of the speech fixture")
+    results = {}
+    for secs in (1, 4, 10):
+        clip = speech[:secs * 16000]  # 10 s is the whole recording
+        results[f'asr.transcribe_{secs}s'] = timed(lambda: transcriber(clip), repeat=3)
+    transcriber.cleanup()
+    return results
+
+
+@benchmark('database')
+def bench_database():
+    from database import MessageDatabase
+
+    # Word frequencies follow Zipf's law like real conversations; common words are unselective
+    rng = np.random.default_rng(2)
+    vocabulary = [f"word{i}" for i in range(5000)]
+    workdir = tempfile.mkdtemp(prefix='luma-bench-')
+    results = {}
+    try:
+        for size in (1_000, 10_000, 50_000):
+            path = os.path.join(workdir, f'history-{size}.db')
+            db = MessageDatabase(path)
+            # Bulk-load the table directly (the FTS triggers still index every row)
+            start = datetime.now() - timedelta(days=30)
+            rows = [
+                ('user' if i % 2 == 0 else 'assistant',
+                 " ".join(vocabulary[min(j, len(vocabulary)) - 1] for j in rng.zipf(1.2, 12)),
+                 (start + timedelta(seconds=50 * i)).isoformat())
+                for i in range(size)
+            ]
+            with db._lock:
+                db.conn.executemany('INSERT INTO messages (role, content, timestamp) VALUES (?, ?, ?)', rows)
+                db.conn.commit()
+
+            label = f'{size // 1000}k'
+            results[f'database.insert_{label}'] = timed(
+                lambda: db.add_message('user', 'remind me about the dentist on friday'), repeat=5)
+            results[f'database.recent_{label}'] = timed(lambda: db.get_recent_messages(5), repeat=5)
+            if db.fts_enabled:
+                results[f'database.search_{label}'] = timed(
+                    lambda: db.search_messages('word40 word120'), repeat=5)
+            db.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+@benchmark('format')
+def bench_format():
+    from agent import LUMAAgent
+
+    rng = np.random.default_rng(3)
+    words = "the council approved a new plan for cycling lanes and bus routes across town".split()
+
+    def markdown(bullets):
+        lines = ["**Here's what I found:**", ""]
+        for i in range(bullets):
+            text = " ".join(words[j] for j in rng.integers(0, len(words), 18))
+            lines.append(f"- **Item {i}:** {text}")
+        lines += ["", "Let me know if you want more details."]
+        return "\n".join(lines)
+
+    results = {}
+    for bullets in (100, 1000, 5000):
+        content = markdown(bullets)
+        # _format_response uses no instance state
+        results[f'format.markdown_{bullets}_bullets'] = timed(
+            lambda: LUMAAgent._format_response(None, content), repeat=5)
+    return results
+
+
+@benchmark('browse')
+def bench_browse():
+    from config import BROWSE_MAX_CHARS
+    from tools import LUMATools
+
+    with open(os.path.join(FIXTURES_DIR, 'article.html'), encoding='utf-8') as f:
+        html = f.read()
+    tools = LUMATools()
+    text = LUMATools._extract_text(html)
+    tools.set_query("what's the latest news about the mars rover sample")
+    return {
+        'browse.extract_text': timed(lambda: LUMATools._extract_text(html), repeat=5),
+        'browse.select_passages': timed(lambda: tools._select(text, BROWSE_MAX_CHARS), repeat=5),
+    }
+
+
+def load_baselines(path=BASELINES_PATH):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(baselines, path=BASELINES_PATH):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({metric: round(ms, 4) for metric, ms in sorted(baselines.items())}, f, indent=2)
+        f.write("\n")
+
+
+def compare(results, baselines, threshold):
+    """Print results against baselines and return the metrics that regressed."""
+    regressions = []
+    print(f"{'metric':<36}{'ms':>12}{'baseline':>12}{'change':>10}")
+    for metric, ms in results.items():
+        baseline = baselines.get(metric)
+        if baseline is None:
+            print(f"{metric:<36}{ms:>12.3f}{'-':>12}{'new':>10}")
+            continue
+        change = ms / baseline - 1 if baseline else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(metric)
+            flag = "  REGRESSION"
+        print(f"{metric:<36}{ms:>12.3f}{baseline:>12.3f}{100 * change:>+9.0f}%{flag}")
+    return regressions
+
+
+def unmeasured(names, results, baselines):
+    """Return ``{benchmark: [metric, ...]}`` of baselined metrics the run did not produce."""
+    missing = {}
+    for metric in sorted(baselines):
+        name = metric.split('.', 1)[0]
+        if name in names and metric not in results:
+            missing.setdefault(name, []).append(metric)
+    return missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('benchmarks', nargs='*', help=f"Benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help="Allowed slowdown over the baseline before failing (0.5 = 50%%)")
+    parser.add_argument('--rounds', type=int, default=3,
+                        help="Runs of each benchmark; the median of the rounds is reported")
+    parser.add_argument('--update', action='store_true', help="Store the results as the new baselines")
+    parser.add_argument('--allow-skips', action='store_true',
+                        help="Do not fail when a benchmark with baselines is skipped for a missing dependency")
+    parser.add_argument('--baselines', default=BASELINES_PATH, help="Baselines JSON file")
+    args = parser.parse_args()
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+    # Run LUMA modules without terminal rendering, with the project on the path
+    os.environ.setdefault('LUMA_HEADLESS', '1')
+    sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+    names = args.benchmarks or list(BENCHMARKS)
+    samples = {}
+    skipped = {}
+    failed = {}
+    for name in names:
+        try:
+            for _ in range(args.rounds):
+                for metric, ms in BENCHMARKS[name]().items():
+                    samples.setdefault(metric, []).append(ms)
+        except ImportError as e:
+            # Optional dependency (audio stack, ASR model) not installed
+            skipped[name] = str(e)
+            print(f"Skipping {name}: {e}")
+        except Exception as e:
+            failed[name] = f"{type(e).__name__}: {e}"
+            print(f"FAILED {name}: {failed[name]}")
+    results = {metric: statistics.median(values) for metric, values in samples.items()}
+
+    baselines = load_baselines(args.baselines)
+    regressions = compare(results, baselines, args.threshold)
+
+    problems = []
+    for name, metrics in unmeasured(names, results, baselines).items():
+        if name in failed:
+            continue
+        if name in skipped:
+            print(f"SKIPPED {name}: {len(metrics)} baselined metric(s) not measured ({skipped[name]})")
+            if not args.allow_skips:
+                problems.append(f"{name} skipped")
+        else:
+            print(f"MISSING {name}: {', '.join(metrics)}")
+            problems.append(f"{name} did not report {len(metrics)} baselined metric(s)")
+    problems += [f"{name} failed" for name in failed]
+
+    if args.update:
+        baselines.update(results)
+        save_baselines(baselines, args.baselines)
+        print(f"Baselines updated in {args.baselines}")
+    elif regressions:
+        problems.append(f"{len(regressions)} metric(s) regressed by more than {100 * args.threshold:.0f}%")
+    if problems:
+        print("; ".join(problems))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Cold-start benchmark for built LUMA artifacts.
+
+Launches each artifact, waits for the "Ready" line on stdout and reports the
+time to ready and the resident memory of the whole process tree (the onefile
+bootloader runs the app in a child process). Artifacts must be built with
+``python build.py --console`` so their output can be read.
+
+Usage:
+    python -m benchmarks.startup onefile=dist/LUMA.exe fast=dist/LUMA/LUMA.exe --runs 3
+"""
+
+import argparse
+import statistics
+import subprocess
+import threading
+import time
+
+import psutil
+
+READY_MARKER = "Ready"
+
+
+def _tree_rss(process):
+    """Return the resident memory of a process and its children in bytes."""
+    try:
+        procs = [process] + process.children(recursive=True)
+    except psutil.NoSuchProcess:
+        return 0
+    total = 0
+    for proc in procs:
+        try:
+            total += proc.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return total
+
+
+def measure(path, timeout=180.0):
+    """Launch an artifact once and measure its startup.
+
+    Returns:
+        dict: ``ready_secs``, ``rss_at_ready_mb`` and ``peak_rss_mb``
+    """
+    ready = threading.Event()
+    start = time.perf_counter()
+    proc = subprocess.Popen([path], stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            stdin=subprocess.DEVNULL, text=True, errors='replace')
+    ps_proc = psutil.Process(proc.pid)
+
+    def read_output():
+        for line in proc.stdout:
+            if READY_MARKER in line:
+                ready.set()
+
+    threading.Thread(target=read_output, daemon=True).start()
+
+    peak = 0
+    try:
+        while not ready.is_set():
+            if proc.poll() is not None:
+                raise RuntimeError(f"{path} exited with code {proc.returncode} before becoming ready")
+            if time.perf_counter() - start > timeout:
+                raise TimeoutError(f"{path} not ready after {timeout:.0f}s")
+            peak = max(peak, _tree_rss(ps_proc))
+            ready.wait(0.05)
+        ready_secs = time.perf_counter() - start
+        rss = _tree_rss(ps_proc)
+        peak = max(peak, rss)
+    finally:
+        if proc.poll() is None:
+            for child in ps_proc.children(recursive=True):
+                child.kill()
+            proc.kill()
+        proc.wait()
+
+    return {
+        'ready_secs': ready_secs,
+        'rss_at_ready_mb': rss / 2**20,
+        'peak_rss_mb': peak / 2**20,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure LUMA time-to-ready per build profile")
+    parser.add_argument('artifacts', nargs='+', help="name=path of a built artifact")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=180.0)
+    args = parser.parse_args()
+
+    print(f"{'profile':<12}{'ready (s)':>12}{'rss (MB)':>12}{'peak (MB)':>12}")
+    for spec in args.artifacts:
+        name, _, path = spec.partition('=')
+        path = path or name
+        runs = [measure(path, args.timeout) for _ in range(args.runs)]
+        print(f"{name:<12}"
+              f"{statistics.median(r['ready_secs'] for r in runs):>12.2f}"
+              f"{statistics.median(r['rss_at_ready_mb'] for r in runs):>12.1f}"
+              f"{max(r['peak_rss_mb'] for r in runs):>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Time-to-first-audio benchmark of the TTS backends.
+
+Synthesizes the same texts with every installed backend and reports the
+time until the first audio bytes arrive and until the clip is complete.
+Each backend gets one untimed warm-up call (engine start, connection).
+
+Usage:
+    python -m benchmarks.tts_latency --runs 3
+    python -m benchmarks.tts_latency texts.txt --backends espeak pyttsx3
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from tts_handler import BACKENDS, create_backends
+
+DEFAULT_TEXTS = [
+    "Sure, it's ten past three.",
+    "Here's a quick summary: the weather will be mild today with a light breeze in the afternoon.",
+    "I found three articles about the launch. The first one says the rocket lifted off on schedule "
+    "and reached orbit about ten minutes later.",
+    "You're welcome!",
+]
+
+
+def measure(backend, text):
+    """Return ``(first_audio_secs, total_secs, bytes)`` for one synthesis.
+
+    Raises:
+        RuntimeError: If the backend produced no audio
+    """
+    started = time.perf_counter()
+    first = None
+    size = 0
+    for chunk in backend.stream(text):
+        if first is None:
+            first = time.perf_counter() - started
+        size += len(chunk)
+    if first is None or size == 0:
+        raise RuntimeError("no audio produced")
+    return first, time.perf_counter() - started, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('texts', nargs='?', help="Text file with one utterance per line")
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), help="Backends to compare")
+    parser.add_argument('--runs', type=int, default=3, help="Repetitions of the text set")
+    args = parser.parse_args()
+
+    texts = DEFAULT_TEXTS
+    if args.texts:
+        with open(args.texts, encoding='utf-8') as f:
+            texts = [line.strip() for line in f if line.strip()]
+
+    backends = create_backends(args.backends)
+    missing = [name for name in args.backends if name not in {b.name for b in backends}]
+    if missing:
+        print(f"Skipping unavailable backends: {', '.join(missing)}")
+
+    print(f"{'backend':<10}{'first p50 (ms)':>16}{'first p90 (ms)':>16}{'total p50 (ms)':>16}{'failed':>8}")
+    for backend in backends:
+        try:
+            measure(backend, texts[0])
+        except Exception as e:
+            print(f"{backend.name:<10} warm-up failed: {e}")
+            continue
+
+        firsts, totals, failed = [], [], 0
+        for _ in range(args.runs):
+            for text in texts:
+                try:
+                    first, total, _ = measure(backend, text)
+                except Exception:
+                    failed += 1
+                    continue
+                firsts.append(1000 * first)
+                totals.append(1000 * total)
+
+        if firsts:
+            print(f"{backend.name:<10}{statistics.median(firsts):>16.0f}"
+                  f"{float(np.percentile(firsts, 90)):>16.0f}{statistics.median(totals):>16.0f}{failed:>8}")
+        else:
+            print(f"{backend.name:<10}{'-':>16}{'-':>16}{'-':>16}{failed:>8}")
+
+
+if __name__ == '__main__':
+    main()
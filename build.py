@@ -1,20 +1,71 @@
 """Build script for creating LUMA distributable package."""
 
-import PyInstaller.__main__
+import argparse
 import os
 import shutil
 import zipfile
 
-def build_exe():
-    """Build the LUMA executable."""
+# Modules pulled in transitively by the pinned requirements but never used at runtime.
+# torch/torchaudio stay in: silero_vad imports both.
+HEAVY_EXCLUDES = [
+    'tensorflow', 'transformers', 'accelerate', 'bertviz', 'matplotlib',
+    'librosa', 'numba', 'llvmlite', 'sklearn', 'scipy', 'pyarrow', 'streamlit',
+    'IPython', 'ipykernel', 'jupyter_client', 'jupyter_core', 'tornado', 'zmq',
+    'torchvision', 'torch.utils.tensorboard', 'triton', 'tkinter',
+    'pymongo', 'boto3', 'botocore', 'sqlalchemy', 'fastapi', 'uvicorn',
+]
+
+# Modules only needed by optional LLM providers (Groq is always bundled as the fallback)
+PROVIDER_MODULES = {
+    'gemini': ['agno.models.google', 'google.genai', 'google.generativeai'],
+}
+
+# Build profiles
+#   onefile: single self-extracting executable (unpacks to a temp dir on every launch)
+#   fast:    onedir layout, unused providers and heavy modules excluded, bytecode
+#            precompiled. optimize=1 keeps docstrings, which Agno uses as tool descriptions.
+PROFILES = {
+    'onefile': {'onefile': True, 'strip_unused': False, 'optimize': 0},
+    'fast': {'onefile': False, 'strip_unused': True, 'optimize': 1},
+}
+
+
+def configured_providers():
+    """Return the optional LLM providers that have an API key available at build time."""
+    return [name for name in PROVIDER_MODULES if os.getenv(f'{name.upper()}_API_KEY')]
+
+
+def build_exe(profile='onefile', providers=None, console=False):
+    """Build the LUMA executable.
+
+    Args:
+        profile: Name of the build profile (see PROFILES)
+        providers: Optional LLM providers to bundle (defaults to those with API keys set)
+        console: Keep the console window (needed for the startup benchmark)
+    """
+    options = PROFILES[profile]
     args = [
         'main.py',
         '--name=LUMA',
-        '--noconsole',
-        '--onefile',
+        '--onefile' if options['onefile'] else '--onedir',
         '--clean',
+        '--noconfirm',
         '--noupx'  # Disable UPX compression which often triggers antiviruses
     ]
+    if not console:
+        args.append('--noconsole')
+
+    if options['optimize']:
+        args.append(f"--optimize={options['optimize']}")
+
+    if options['strip_unused']:
+        if providers is None:
+            providers = configured_providers()
+        excludes = list(HEAVY_EXCLUDES)
+        for name, modules in PROVIDER_MODULES.items():
+            if name not in providers:
+                excludes.extend(modules)
+        args.extend(f'--exclude-module={module}' for module in excludes)
 
     # Only add optional files if they exist to avoid PyInstaller errors
     if os.path.exists('version.txt'):
@@ -26,26 +77,30 @@ def build_exe():
 
     for fname in ('LICENSE', 'README.md'):
         if os.path.exists(fname):
-            # On Windows PyInstaller uses semicolon to separate src and dest
-            args.append(f'--add-data={fname};.')
+            # PyInstaller separates src and dest with the platform path separator
+            args.append(f'--add-data={fname}{os.pathsep}.')
 
+    import PyInstaller.__main__
     PyInstaller.__main__.run(args)
 
-def create_distribution():
+def create_distribution(profile='onefile'):
     """Create a ZIP distribution package."""
     # Create dist directory if it doesn't exist
     if not os.path.exists('dist'):
         os.makedirs('dist')
-    
+
     # Create a temporary directory for the package
     package_dir = 'dist/LUMA_package'
     if os.path.exists(package_dir):
         shutil.rmtree(package_dir)
     os.makedirs(package_dir)
-    
-    # Copy the executable
-    shutil.copy('dist/LUMA.exe', package_dir)
-    
+
+    # Copy the executable (or the whole onedir bundle)
+    if PROFILES[profile]['onefile']:
+        shutil.copy('dist/LUMA.exe', package_dir)
+    else:
+        shutil.copytree('dist/LUMA', os.path.join(package_dir, 'LUMA'))
+
     # Create an example config file
     with open(f'{package_dir}/build_config.py.example', 'w') as f:
         f.write('''"""Build configuration with embedded API keys."""
@@ -54,7 +109,7 @@ def create_distribution():
 GROQ_API_KEY = "your-groq-api-key-here"
 GEMINI_API_KEY = "your-google-api-key-here"  # Optional
 ''')
-    
+
     # Create the ZIP file
     with zipfile.ZipFile('dist/LUMA.zip', 'w', zipfile.ZIP_DEFLATED) as zipf:
         for root, _, files in os.walk(package_dir):
@@ -64,5 +119,13 @@ GEMINI_API_KEY = "your-google-api-key-here"  # Optional
                 zipf.write(file_path, arcname)
 
 if __name__ == '__main__':
-    build_exe()
-    create_distribution()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build the LUMA distributable")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='onefile')
+    parser.add_argument('--provider', action='append', choices=sorted(PROVIDER_MODULES),
+                        help="Optional LLM provider to bundle (repeatable, 'fast' profile only)")
+    parser.add_argument('--console', action='store_true',
+                        help="Keep the console window (required by benchmarks/startup.py)")
+    cli_args = parser.parse_args()
+
+    build_exe(cli_args.profile, cli_args.provider, cli_args.console)
+    create_distribution(cli_args.profile)
@@ -0,0 +1,352 @@
+"""Background build job queue for the LUMA web builder.
+
+PyInstaller builds run on a bounded pool of worker threads instead of the
+Flask request thread. Clients submit a job, poll its status (or stream its
+log) and download the artifact once the build has finished.
+"""
+
+import uuid
+import time
+import queue
+import shutil
+import logging
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+
+# Top-level modules that belong to the build tooling rather than the application
+BUILD_TOOLING = {'build.py', 'build_jobs.py', 'web_builder.py', 'build_config.py'}
+
+# Log markers emitted by PyInstaller, mapped to a rough progress percentage
+PROGRESS_MARKERS = [
+    ('Analyzing', 10),
+    ('Processing module hooks', 30),
+    ('Looking for dynamic libraries', 50),
+    ('Building PYZ', 65),
+    ('Building PKG', 75),
+    ('Building EXE', 85),
+    ('completed successfully', 95),
+]
+
+SPEC_TEMPLATE = '''# -*- mode: python ; coding: utf-8 -*-
+
+block_cipher = None
+
+a = Analysis(['main.py'],
+             pathex=[r'{build_dir}'],
+             binaries=[],
+             datas=[('build_config.py', '.')],
+             hiddenimports=['build_config'],
+             hookspath=[],
+             runtime_hooks=[],
+             excludes=[],
+             win_no_prefer_redirects=False,
+             win_private_assemblies=False,
+             cipher=block_cipher,
+             noarchive=False)
+
+pyz = PYZ(a.pure, a.zipped_data,
+          cipher=block_cipher)
+
+exe = EXE(pyz,
+          a.scripts,
+          a.binaries,
+          a.zipfiles,
+          a.datas,
+          [],
+          name='LUMA',
+          debug=False,
+          bootloader_ignore_signals=False,
+          strip=False,
+          upx=True,
+          upx_exclude=[],
+          runtime_tmpdir=None,
+          console=False)
+'''
+
+
+def project_files(source_dir):
+    """Files copied into every build directory: the application's top-level modules and requirements.txt."""
+    modules = sorted(path.name for path in Path(source_dir).glob('*.py') if path.name not in BUILD_TOOLING)
+    return modules + ['requirements.txt']
+
+
+class QueueFullError(Exception):
+    """Raised when the build queue cannot accept more jobs."""
+
+
+class BuildJob:
+    """State of a single executable build."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    EXPIRED = 'expired'
+
+    def __init__(self, groq_key, google_key=''):
+        self.id = uuid.uuid4().hex
+        self.groq_key = groq_key
+        self.google_key = google_key
+        self.status = self.QUEUED
+        self.progress = 0
+        self.logs = []
+        self.error = None
+        self.build_dir = None
+        self.artifact_path = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        """Whether the job has reached a terminal state."""
+        return self.status in (self.SUCCEEDED, self.FAILED, self.EXPIRED)
+
+    def to_dict(self, queue_position=None):
+        """Serialize the job for the status endpoint."""
+        return {
+            'id': self.id,
+            'status': self.status,
+            'progress': self.progress,
+            'queue_position': queue_position,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'log_lines': len(self.logs),
+        }
+
+
+class BuildQueue:
+    """Bounded worker pool running PyInstaller builds in the background."""
+
+    def __init__(self, max_workers=2, max_queued=20, artifact_ttl=3600,
+                 source_dir='.'):
+        """Initialize the queue and start its worker and cleanup threads.
+
+        Args:
+            max_workers: Number of builds allowed to run concurrently
+            max_queued: Number of jobs allowed to wait for a worker
+            artifact_ttl: Seconds a finished job and its artifact are kept
+            source_dir: Directory containing the LUMA sources
+        """
+        self.max_workers = max_workers
+        self.artifact_ttl = artifact_ttl
+        self.source_dir = source_dir
+        self.jobs = {}
+        self._pending = queue.Queue(maxsize=max_queued)
+        self._waiting = []  # job ids in submission order, for queue positions
+        self._lock = threading.Lock()
+        self._log_updated = threading.Condition(self._lock)
+        self._running = True
+
+        self._workers = []
+        for i in range(max_workers):
+            worker = threading.Thread(target=self._worker, name=f"build-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+        self._janitor = threading.Thread(target=self._cleanup_loop, name="build-janitor", daemon=True)
+        self._janitor.start()
+
+    def submit(self, groq_key, google_key=''):
+        """Queue a new build and return its job.
+
+        Raises:
+            QueueFullError: If the queue already holds ``max_queued`` jobs
+        """
+        job = BuildJob(groq_key, google_key)
+        with self._lock:
+            try:
+                self._pending.put_nowait(job)
+            except queue.Full:
+                raise QueueFullError("Build queue is full, try again later")
+            self.jobs[job.id] = job
+            self._waiting.append(job.id)
+        return job
+
+    def get(self, job_id):
+        """Return the job with the given id, or None."""
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def queue_position(self, job):
+        """Return the 1-based position of a queued job, or None once it has started."""
+        with self._lock:
+            try:
+                return self._waiting.index(job.id) + 1
+            except ValueError:
+                return None
+
+    def status(self, job_id):
+        """Return the serialized status of a job, or None if unknown."""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        return job.to_dict(self.queue_position(job))
+
+    def wait(self, job_id, timeout=None):
+        """Block until a job has finished (or ``timeout`` passed) and return it, or None if unknown."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._log_updated:
+            while True:
+                job = self.jobs.get(job_id)
+                if job is None or job.finished:
+                    return job
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return job
+                self._log_updated.wait(remaining)
+
+    def stream_logs(self, job_id, start=0, timeout=1.0):
+        """Yield log lines of a job as they are produced until it finishes."""
+        index = start
+        while True:
+            with self._log_updated:
+                job = self.jobs.get(job_id)
+                if job is None:
+                    return
+                if index >= len(job.logs) and not job.finished:
+                    self._log_updated.wait(timeout)
+                lines = job.logs[index:]
+                done = job.finished
+            for line in lines:
+                yield line
+            index += len(lines)
+            if done and not lines:
+                return
+
+    def shutdown(self):
+        """Stop accepting work and let the worker threads exit."""
+        self._running = False
+        for _ in self._workers:
+            try:
+                self._pending.put_nowait(None)
+            except queue.Full:
+                break
+
+    def _append_log(self, job, line):
+        """Record a log line and update the job progress."""
+        with self._log_updated:
+            job.logs.append(line)
+            for marker, progress in PROGRESS_MARKERS:
+                if marker in line and progress > job.progress:
+                    job.progress = progress
+            self._log_updated.notify_all()
+
+    def _finish(self, job, status, error=None):
+        """Move a job into a terminal state."""
+        with self._log_updated:
+            job.status = status
+            job.error = error
+            job.finished_at = time.time()
+            if status == BuildJob.SUCCEEDED:
+                job.progress = 100
+            # API keys are only needed for the build itself
+            job.groq_key = job.google_key = None
+            self._log_updated.notify_all()
+
+    def _worker(self):
+        """Pull jobs off the queue and build them."""
+        while self._running:
+            job = self._pending.get()
+            if job is None:
+                break
+            with self._lock:
+                if job.id in self._waiting:
+                    self._waiting.remove(job.id)
+                job.status = BuildJob.RUNNING
+                job.started_at = time.time()
+            try:
+                self._build(job)
+            except Exception as e:
+                logging.warning(f"Build {job.id} failed: {e}")
+                self._finish(job, BuildJob.FAILED, str(e))
+
+    def _build(self, job):
+        """Run PyInstaller for a job inside its own build directory."""
+        build_dir = Path(tempfile.mkdtemp(prefix='luma-build-'))
+        job.build_dir = build_dir
+
+        # Create build_config.py with API keys
+        with open(build_dir / 'build_config.py', 'w') as f:
+            f.write(f'''"""Build configuration with embedded API keys."""
+GROQ_API_KEY = {job.groq_key!r}
+GEMINI_API_KEY = {job.google_key!r}
+''')
+
+        # Copy necessary files to the build directory
+        for file in project_files(self.source_dir):
+            src = Path(self.source_dir) / file
+            if src.exists():
+                shutil.copy(src, build_dir / file)
+
+        spec_path = build_dir / 'LUMA.spec'
+        with open(spec_path, 'w') as f:
+            f.write(SPEC_TEMPLATE.format(build_dir=build_dir))
+
+        process = subprocess.Popen([
+            'pyinstaller',
+            '--clean',
+            '--noconfirm',
+            '--workpath', str(build_dir / 'build'),
+            '--distpath', str(build_dir / 'dist'),
+            str(spec_path)
+        ], cwd=build_dir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, bufsize=1)
+
+        for line in process.stdout:
+            self._append_log(job, line.rstrip())
+        returncode = process.wait()
+
+        # Intermediate build files are not needed once PyInstaller exits
+        shutil.rmtree(build_dir / 'build', ignore_errors=True)
+
+        artifact = build_dir / 'dist' / 'LUMA.exe'
+        if not artifact.exists():
+            # PyInstaller on non-Windows hosts produces a bare binary
+            artifact = build_dir / 'dist' / 'LUMA'
+
+        if returncode == 0 and artifact.exists():
+            job.artifact_path = artifact
+            self._finish(job, BuildJob.SUCCEEDED)
+        else:
+            self._finish(job, BuildJob.FAILED, f"PyInstaller exited with code {returncode}")
+
+    def _cleanup_loop(self):
+        """Periodically remove artifacts of jobs older than the TTL."""
+        interval = max(1, min(60, self.artifact_ttl / 4))
+        while self._running:
+            time.sleep(interval)
+            self.cleanup_expired()
+
+    def cleanup_expired(self, now=None):
+        """Remove build directories of finished jobs past their TTL and forget very old jobs.
+
+        Succeeded jobs become EXPIRED; failed jobs keep their status and error
+        so the status endpoint can still report why the build failed.
+
+        Returns:
+            Number of build directories removed
+        """
+        now = now or time.time()
+        removed = []
+        with self._lock:
+            for job_id, job in list(self.jobs.items()):
+                if not job.finished or job.finished_at is None:
+                    continue
+                age = now - job.finished_at
+                if age > self.artifact_ttl and job.build_dir is not None:
+                    if job.status == BuildJob.SUCCEEDED:
+                        job.status = BuildJob.EXPIRED
+                    job.artifact_path = None
+                    removed.append(job.build_dir)
+                    job.build_dir = None
+                if age > 2 * self.artifact_ttl:
+                    del self.jobs[job_id]
+
+        for build_dir in removed:
+            shutil.rmtree(build_dir, ignore_errors=True)
+        return len(removed)
@@ -9,6 +9,7 @@ load_dotenv()
 DEFAULT_MODEL = "moonshine/base"
 LOOKBACK_CHUNKS = 4
 CHUNK_SIZE = 512
+AUDIO_RING_CHUNKS = 32  # preallocated capture buffers, ~1 s at 512-sample chunks
 SAMPLING_RATE = 16000
 MAX_BUFFER_SIZE = SAMPLING_RATE * 30  # 30 seconds
 
@@ -18,7 +19,34 @@ MIN_REFRESH_SECS = 0.2
 USER_SILENCE_THRESHOLD = 2.0
 MIN_SPEECH_LENGTH = 0.5
 VAD_THRESHOLD = 0.3
+WAKE_WORD = os.getenv("LUMA_WAKE_WORD", "")  # e.g. "hey luma"; empty answers every utterance
+WAKE_WORD_WINDOW_SECS = 1.5  # start of each utterance transcribed to spot the wake word
+WAKE_WORD_THRESHOLD = 0.75  # fuzzy match similarity (0-1)
+WAKE_WORD_FOLLOW_UP_SECS = 5.0  # after a bare wake phrase, the next utterance starting this soon needs none
 VAD_MIN_SILENCE = 3000
+PLAYBACK_TAIL_SECS = 0.4  # the microphone stays ignored this long after speech output ends (room echo)
+
+# End-of-turn detection ("adaptive" finalizes complete utterances early, "fixed" always waits VAD_MIN_SILENCE)
+ENDPOINT_MODE = os.getenv("LUMA_ENDPOINT_MODE", "adaptive")
+ENDPOINT_BASE_SILENCE_MS = 250
+ENDPOINT_COMPLETE_SILENCE_MS = 400
+
+# Speculative replies: start the LLM on a pause's provisional transcript (adaptive endpointing only)
+SPECULATION_ENABLED = os.getenv("LUMA_SPECULATION", "0") == "1"
+SPECULATION_MIN_WORDS = 2
+
+# Turn assembly: finalized utterances are held briefly and back-to-back ones sent as one request
+TURN_HOLD_MIN_SECS = 0.3  # after an utterance that sounds complete
+TURN_HOLD_MAX_SECS = 1.5  # after an utterance that trails off ("and", "the", ...)
+
+# Run capture, VAD/ASR, the agent and TTS on one asyncio event loop (also enabled with --async)
+ASYNC_RUNTIME = os.getenv("LUMA_ASYNC", "0") == "1"
+
+# Energy pre-gate (skips VAD inference on clearly silent chunks)
+ENERGY_GATE_ENABLED = True
+ENERGY_GATE_MARGIN_DB = 9.0
+ENERGY_GATE_HANGOVER_CHUNKS = 8  # ~256 ms at 512-sample chunks
+ENERGY_GATE_PREROLL_CHUNKS = LOOKBACK_CHUNKS
 
 # API Configuration
 try:
@@ -26,9 +54,85 @@ try:
 except ImportError:
     GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
+# Web Builder Configuration
+BUILD_MAX_WORKERS = int(os.getenv("LUMA_BUILD_MAX_WORKERS", "2"))
+BUILD_MAX_QUEUED = int(os.getenv("LUMA_BUILD_MAX_QUEUED", "20"))
+BUILD_ARTIFACT_TTL = int(os.getenv("LUMA_BUILD_ARTIFACT_TTL", "3600"))  # seconds
+
+# Model Routing (simple turns go to a fast small model, complex/tool turns to the large one)
+ROUTER_ENABLED = os.getenv("LUMA_ROUTER", "1") == "1"
+ROUTER_MAX_SMALL_WORDS = 8  # longer requests always use the large model
+ROUTER_LOG_PATH = os.getenv("LUMA_ROUTER_LOG")  # optional JSONL log of routing decisions
+GROQ_SMALL_MODEL = "llama-3.1-8b-instant"
+GROQ_LARGE_MODEL = "llama-3.3-70b-versatile"
+GEMINI_SMALL_MODEL = "gemini-2.0-flash-lite"
+GEMINI_LARGE_MODEL = "gemini-2.0-flash-exp"
+LLM_BASE_URL = os.getenv("LUMA_LLM_BASE_URL")  # Groq-compatible endpoint (e.g. benchmarks/mock_llm_server.py), disables Gemini
+
+# Output budgets per intent, chosen before the model call so only what is spoken gets generated
+# (for requests that need tools, max_tokens only limits the answer that follows the tool results)
+BUDGETS_ENABLED = os.getenv("LUMA_BUDGETS", "1") == "1"
+INTENT_BUDGETS = {
+    "news": {
+        "max_tokens": 160,
+        "style": "Summarize only the most relevant story in at most two short spoken sentences, no lists.",
+    },
+    "time": {"max_tokens": 40, "style": "Answer in one short sentence."},
+    "chit-chat": {"max_tokens": 60, "style": "Reply in one or two short, friendly sentences."},
+    "history": {"max_tokens": 120, "style": "Answer in at most two short sentences."},
+    "generation": {"max_tokens": 600, "style": "Keep it short enough to be read aloud, no markdown."},
+    "answer": {"max_tokens": 250, "style": "Answer in at most three short spoken sentences, no lists."},
+}
+
+# LLM Provider Failover
+PROVIDER_HEDGING = os.getenv("LUMA_HEDGING", "1") == "1"  # fire a secondary provider if the primary is slow
+PROVIDER_TIMEOUT = 30.0  # seconds to wait for any answer
+HEDGE_DEFAULT_DELAY = 2.0  # seconds without a first token before hedging (until p95 is known)
+HEDGE_MIN_DELAY = 0.5
+HEDGE_MAX_DELAY = 6.0
+BREAKER_FAILURE_THRESHOLD = 3  # consecutive failures that open a provider's circuit
+BREAKER_RESET_SECS = 30.0
+
+# Web Browsing Tools
+BROWSE_TIMEOUT = 10  # seconds per page
+BROWSE_MAX_CHARS = 1000  # characters returned per page
+BROWSE_URLS_DEADLINE = 12  # seconds for a whole browse_urls batch
+BROWSE_PER_HOST_LIMIT = 2  # concurrent connections per host
+READ_FILE_MAX_CHARS = 2000  # characters returned per file
+
+# Passage ranking: long pages and files are cut to the passages that best match the request
+PASSAGE_RANKING = os.getenv("LUMA_PASSAGES", "1") == "1"
+PASSAGE_CHARS = 300  # target passage length
+PASSAGE_BM25_K1 = 1.2
+PASSAGE_BM25_B = 0.75
+
+# Search Cache
+SEARCH_CACHE_PATH = "search_cache.db"
+SEARCH_CACHE_TTL = 6 * 3600  # seconds for web search results
+NEWS_CACHE_TTL = 15 * 60  # seconds for news results
+
+# Conversation History Maintenance
+HISTORY_RETENTION_DAYS = int(os.getenv("LUMA_HISTORY_RETENTION_DAYS", "30"))  # days kept hot, 0 keeps everything
+HISTORY_ARCHIVE = os.getenv("LUMA_HISTORY_ARCHIVE", "1") == "1"  # compress older days into the archive instead of deleting them
+HISTORY_MAINTENANCE_INTERVAL = 6 * 3600  # seconds between maintenance runs
+HISTORY_VACUUM_PAGES = 2000  # free pages returned to the OS per run (~8 MB)
+
+# Terminal UI
+UI_REFRESH_HZ = 15  # status line redraws per second at most
+UI_HEADLESS = os.getenv("LUMA_HEADLESS", "0") == "1"  # disable all terminal rendering
+
+# Profiling (enable with --profile N or the /profile command)
+PROFILE_DIR = "profiles"
+PROFILE_INTERVAL_MS = 5
+
 # TTS Configuration
 TTS_SPEED = 1.0
-TTS_VOICE = "en"
+TTS_VOICE = "en"  # voice of the local engines
+TTS_BACKEND = os.getenv("LUMA_TTS_BACKEND", "edge")  # "edge" (online), "espeak" or "pyttsx3" (offline)
+TTS_FALLBACKS = os.getenv("LUMA_TTS_FALLBACKS", "espeak,pyttsx3").split(",")  # tried in order when the backend fails
+TTS_TIMEOUT = 8.0  # seconds a backend may take to synthesize a clip before falling back
+TTS_RETRY_SECS = 60  # a failed backend is tried last for this long
+EDGE_TTS_VOICE = "en-US-AriaNeural"
 
 # System Prompt
 SYSTEM_PROMPT = """Hi! I'm LUMA, your friendly AI assistant! 👋 I'm here to chat and help you stay informed.
@@ -46,6 +150,12 @@ CRITICAL INSTRUCTIONS:
    - Search requests
    - Real-time information needs
 
+   To read several search results, call browse_urls once with all of the URLs
+   instead of calling browse_url for each one.
+
+   When the user asks about earlier conversations ("what did I say about..."),
+   use search_history (with a date range for "last week", "yesterday", ...).
+
 3. Response Format:
    - Clean bullet points (use proper Markdown)
    - Brief summary of each result
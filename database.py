@@ -1,8 +1,20 @@
 """SQLite database management for LUMA."""
 
+import os
+import re
+import json
+import zlib
+import logging
 import sqlite3
-from datetime import datetime
+import threading
+from datetime import datetime, date, timedelta
 import atexit
+from config import (
+    HISTORY_RETENTION_DAYS,
+    HISTORY_ARCHIVE,
+    HISTORY_MAINTENANCE_INTERVAL,
+    HISTORY_VACUUM_PAGES
+)
 
 class MessageDatabase:
     """Manages chat history in SQLite database."""
@@ -11,23 +23,33 @@ class MessageDatabase:
         """Initialize database connection and create tables if needed."""
         self.db_path = db_path
         self.conn = None
+        # The connection is shared by the audio, speculation and worker threads
+        self._lock = threading.RLock()
+        self._maintenance_thread = None
+        self._stop_maintenance = threading.Event()
         self._connect()
         atexit.register(self.close)
     
     def _connect(self):
         """Create database connection."""
-        if not self.conn:
-            self.conn = sqlite3.connect(self.db_path)
-            self._init_db()
+        with self._lock:
+            if not self.conn:
+                self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._init_db()
     
     def close(self):
         """Close database connection."""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        self._stop_maintenance.set()
+        with self._lock:
+            if self.conn:
+                self.conn.close()
+                self.conn = None
     
     def _init_db(self):
         """Create the messages table if it doesn't exist."""
+        if self.conn.execute('PRAGMA page_count').fetchone()[0] == 0:
+            # New database: let maintenance return freed pages to the OS incrementally
+            self.conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
         self.conn.execute('''
             CREATE TABLE IF NOT EXISTS messages (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -36,28 +58,344 @@ class MessageDatabase:
                 timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages(timestamp)')
+        # Older days, one compressed row per day (see archive_old_messages)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS messages_archive (
+                day TEXT PRIMARY KEY,
+                message_count INTEGER NOT NULL,
+                first_id INTEGER NOT NULL,
+                last_id INTEGER NOT NULL,
+                data BLOB NOT NULL
+            )
+        ''')
         self.conn.commit()
+        self._init_fts()
+    
+    def _init_fts(self):
+        """Create the full-text index over messages and the triggers keeping it in sync."""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+        ).fetchone()
+        try:
+            self.conn.executescript('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+                    content, content='messages', content_rowid='id', tokenize='porter unicode61'
+                );
+                CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+                    INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+                END;
+                CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+                    INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                END;
+                CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages BEGIN
+                    INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                    INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+                END;
+            ''')
+            if not exists:
+                # Index history written before full-text search existed
+                self.conn.execute("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')")
+            self.conn.commit()
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            # SQLite built without FTS5: search falls back to LIKE
+            logging.warning(f"Full-text search unavailable: {e}")
+            self.fts_enabled = False
     
     def add_message(self, role: str, content: str):
         """Add a new message to the database."""
-        self._connect()
-        self.conn.execute(
-            'INSERT INTO messages (role, content, timestamp) VALUES (?, ?, ?)',
-            (role, content, datetime.now().isoformat())
-        )
-        self.conn.commit()
+        with self._lock:
+            self._connect()
+            self.conn.execute(
+                'INSERT INTO messages (role, content, timestamp) VALUES (?, ?, ?)',
+                (role, content, datetime.now().isoformat())
+            )
+            self.conn.commit()
     
     def get_recent_messages(self, limit: int = 10) -> list:
         """Get the most recent messages from the database."""
-        self._connect()
-        cursor = self.conn.execute(
-            'SELECT role, content FROM messages ORDER BY timestamp DESC LIMIT ?',
-            (limit,)
-        )
-        return [{'role': role, 'content': content} for role, content in cursor.fetchall()]
+        with self._lock:
+            self._connect()
+            # Ids follow insertion order, so this reads the last rows of the
+            # primary key regardless of how much history has accumulated
+            cursor = self.conn.execute(
+                'SELECT role, content FROM messages ORDER BY id DESC LIMIT ?',
+                (limit,)
+            )
+            return [{'role': role, 'content': content} for role, content in cursor.fetchall()]
     
     def clear_history(self):
         """Clear all message history."""
-        self._connect()
-        self.conn.execute('DELETE FROM messages')
-        self.conn.commit()
\ No newline at end of file
+        with self._lock:
+            self._connect()
+            self.conn.execute('DELETE FROM messages')
+            self.conn.execute('DELETE FROM messages_archive')
+            self.conn.commit()
+    
+    def search_messages(self, query: str, limit: int = 5, since: str = None,
+                        until: str = None, role: str = None) -> list:
+        """Search past messages, best matches first.
+        
+        Args:
+            query: Free-text query; any of its words may match
+            limit: Maximum number of results
+            since: Only messages at or after this ISO timestamp/date
+            until: Only messages before this ISO timestamp/date
+            role: Only messages from this role ("user" or "assistant")
+            
+        Returns:
+            List of dicts with role, timestamp, snippet and score (lower is better);
+            archived days are only scanned when the hot table has too few matches
+        """
+        words = re.findall(r"\w+", query.lower())
+        if not words:
+            return []
+        
+        # Ids grow with timestamps, so time bounds also become rowid bounds
+        # the full-text index can apply before ranking
+        first_id = 'coalesce((SELECT id FROM messages WHERE timestamp >= ? ORDER BY timestamp LIMIT 1), 1e18)'
+        filters, params = [], []
+        if since:
+            filters += ['m.timestamp >= ?', f'{{id}} >= {first_id}']
+            params += [since, since]
+        if until:
+            filters += ['m.timestamp < ?', f'{{id}} < {first_id}']
+            params += [until, until]
+        if role:
+            filters.append('m.role = ?')
+            params.append(role)
+        where = ''.join(f' AND {f}' for f in filters)
+        
+        with self._lock:
+            self._connect()
+            if self.fts_enabled:
+                # Quote every word so user text cannot inject FTS query syntax
+                match = ' OR '.join(f'"{w}"' for w in words)
+                cursor = self.conn.execute(
+                    f'''SELECT m.role, m.timestamp,
+                              snippet(messages_fts, 0, '[', ']', '...', 16),
+                              bm25(messages_fts)
+                       FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid
+                       WHERE messages_fts MATCH ?{where.format(id='messages_fts.rowid')}
+                       ORDER BY rank LIMIT ?''',
+                    [match, *params, limit]
+                )
+            else:
+                like = ' OR '.join('m.content LIKE ?' for _ in words)
+                cursor = self.conn.execute(
+                    f'''SELECT m.role, m.timestamp, m.content, 0.0 FROM messages m
+                       WHERE ({like}){where.format(id='m.id')} ORDER BY m.id DESC LIMIT ?''',
+                    [*(f'%{w}%' for w in words), *params, limit]
+                )
+            results = [
+                {'role': sender, 'timestamp': timestamp, 'snippet': snippet, 'score': score}
+                for sender, timestamp, snippet, score in cursor.fetchall()
+            ]
+        if len(results) < limit:
+            # Days past the retention window are only in the archive, which has no index
+            results += self._search_archive(words, limit - len(results), since, until, role)
+        return results
+    
+    def _search_archive(self, words: list, limit: int, since: str = None,
+                        until: str = None, role: str = None) -> list:
+        """Scan archived days (newest first) for messages containing any of ``words``.
+        
+        Results use the same fields as search_messages; the score is minus
+        the number of query words a message contains.
+        """
+        filters, params = [], []
+        if since:
+            filters.append('day >= ?')
+            params.append(since[:10])
+        if until:
+            filters.append('day <= ?')
+            params.append(until[:10])
+        where = f" WHERE {' AND '.join(filters)}" if filters else ''
+        with self._lock:
+            self._connect()
+            days = self.conn.execute(
+                f'SELECT data FROM messages_archive{where} ORDER BY day DESC', params
+            ).fetchall()
+        
+        wanted = set(words)
+        results = []
+        for (data,) in days:
+            matches = []
+            for _, sender, content, timestamp in json.loads(zlib.decompress(data)):
+                if (since and timestamp < since) or (until and timestamp >= until) or (role and sender != role):
+                    continue
+                found = wanted & set(re.findall(r"\w+", content.lower()))
+                if found:
+                    matches.append({'role': sender, 'timestamp': timestamp,
+                                    'snippet': self._snippet(content, found), 'score': -float(len(found))})
+            # Best matches of the newest days first
+            results += sorted(matches, key=lambda m: m['score'])
+            if len(results) >= limit:
+                break
+        return results[:limit]
+    
+    @staticmethod
+    def _snippet(content: str, words: set, size: int = 16) -> str:
+        """Up to ``size`` words of ``content`` around its first match, matches in brackets."""
+        tokens = content.split()
+        hits = [i for i, token in enumerate(tokens) if words & set(re.findall(r"\w+", token.lower()))]
+        start = max(0, hits[0] - size // 2) if hits else 0
+        shown = [f"[{t}]" if i in hits else t for i, t in enumerate(tokens[start:start + size], start)]
+        return ('...' if start else '') + ' '.join(shown) + ('...' if start + size < len(tokens) else '')
+    
+    def _maintenance_connect(self):
+        """Open a separate connection so maintenance never holds the shared one."""
+        return sqlite3.connect(self.db_path, timeout=30)
+    
+    def archive_old_messages(self, retention_days: int = HISTORY_RETENTION_DAYS,
+                             archive: bool = HISTORY_ARCHIVE) -> int:
+        """Move messages older than the retention window out of the hot table.
+        
+        Each day is rolled into one zlib-compressed JSON row of
+        ``messages_archive`` (or simply deleted when ``archive`` is False) and
+        committed on its own, so the hot table stays small and concurrent
+        writers are only blocked briefly.
+        
+        Args:
+            retention_days: Days of history kept in ``messages``; 0 keeps everything
+            archive: Keep a compressed copy of the rolled-up days
+            
+        Returns:
+            Number of messages moved out of the hot table
+        """
+        if retention_days <= 0:
+            return 0
+        cutoff = (date.today() - timedelta(days=retention_days)).isoformat()
+        moved = 0
+        conn = self._maintenance_connect()
+        try:
+            days = [row[0] for row in conn.execute(
+                'SELECT DISTINCT substr(timestamp, 1, 10) FROM messages WHERE timestamp < ?', (cutoff,)
+            )]
+            for day in days:
+                end = (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+                with conn:
+                    rows = conn.execute(
+                        'SELECT id, role, content, timestamp FROM messages '
+                        'WHERE timestamp >= ? AND timestamp < ? ORDER BY id', (day, end)
+                    ).fetchall()
+                    if not rows:
+                        continue
+                    if archive:
+                        existing = conn.execute(
+                            'SELECT data FROM messages_archive WHERE day = ?', (day,)
+                        ).fetchone()
+                        if existing:
+                            rows = json.loads(zlib.decompress(existing[0])) + [list(r) for r in rows]
+                        conn.execute(
+                            'INSERT OR REPLACE INTO messages_archive VALUES (?, ?, ?, ?, ?)',
+                            (day, len(rows), rows[0][0], rows[-1][0],
+                             zlib.compress(json.dumps(rows).encode('utf-8'), 9))
+                        )
+                    deleted = conn.execute(
+                        'DELETE FROM messages WHERE timestamp >= ? AND timestamp < ?', (day, end)
+                    ).rowcount
+                    moved += deleted
+            if moved:
+                # Merge the full-text index segments left behind by the deletes
+                with conn:
+                    conn.execute("INSERT INTO messages_fts(messages_fts) VALUES ('optimize')")
+        except sqlite3.OperationalError as e:
+            logging.warning(f"History archival failed: {e}")
+        finally:
+            conn.close()
+        return moved
+    
+    def get_archived_messages(self, day: str) -> list:
+        """Return the archived messages of a day (YYYY-MM-DD)."""
+        with self._lock:
+            self._connect()
+            row = self.conn.execute(
+                'SELECT data FROM messages_archive WHERE day = ?', (day,)
+            ).fetchone()
+        if row is None:
+            return []
+        return [
+            {'id': msg_id, 'role': role, 'content': content, 'timestamp': timestamp}
+            for msg_id, role, content, timestamp in json.loads(zlib.decompress(row[0]))
+        ]
+    
+    def vacuum(self, max_pages: int = HISTORY_VACUUM_PAGES) -> int:
+        """Return up to ``max_pages`` free pages to the OS and report how many were freed.
+        
+        Databases created before incremental auto-vacuum was enabled are
+        converted once with a full VACUUM.
+        """
+        conn = self._maintenance_connect()
+        try:
+            before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                logging.info("Converting chat history to incremental auto-vacuum")
+                conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                conn.execute('VACUUM')
+            else:
+                # executescript steps the pragma to completion (execute frees a single page)
+                conn.executescript(f'PRAGMA incremental_vacuum({int(max_pages)});')
+            return before - conn.execute('PRAGMA freelist_count').fetchone()[0]
+        except sqlite3.OperationalError as e:
+            logging.warning(f"History vacuum failed: {e}")
+            return 0
+        finally:
+            conn.close()
+    
+    def run_maintenance(self, retention_days: int = HISTORY_RETENTION_DAYS,
+                        archive: bool = HISTORY_ARCHIVE,
+                        vacuum_pages: int = HISTORY_VACUUM_PAGES) -> dict:
+        """Apply the retention policy, vacuum and return the storage statistics."""
+        moved = self.archive_old_messages(retention_days, archive)
+        freed = self.vacuum(vacuum_pages)
+        stats = self.get_storage_stats()
+        logging.debug(f"History maintenance: archived {moved} messages, freed {freed} pages, {stats}")
+        return stats
+    
+    def start_maintenance(self, interval: float = HISTORY_MAINTENANCE_INTERVAL, **kwargs):
+        """Run maintenance now and then every ``interval`` seconds in the background.
+        
+        Args:
+            interval: Seconds between runs
+            **kwargs: Passed to run_maintenance
+        """
+        if self._maintenance_thread is not None:
+            return
+        
+        def loop():
+            while not self._stop_maintenance.is_set():
+                try:
+                    self.run_maintenance(**kwargs)
+                except Exception as e:
+                    logging.warning(f"History maintenance failed: {e}")
+                self._stop_maintenance.wait(interval)
+        
+        self._maintenance_thread = threading.Thread(target=loop, name="history-maintenance", daemon=True)
+        self._maintenance_thread.start()
+    
+    def get_storage_stats(self) -> dict:
+        """Get file size and row counts of the hot and archived history."""
+        conn = self._maintenance_connect()
+        try:
+            page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+            page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+            free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            hot, oldest = conn.execute('SELECT count(*), min(timestamp) FROM messages').fetchone()
+            days, archived, archive_bytes = conn.execute(
+                'SELECT count(*), coalesce(sum(message_count), 0), coalesce(sum(length(data)), 0) '
+                'FROM messages_archive'
+            ).fetchone()
+        finally:
+            conn.close()
+        return {
+            'file_bytes': os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0,
+            'used_bytes': (page_count - free_pages) * page_size,
+            'free_bytes': free_pages * page_size,
+            'hot_messages': hot,
+            'oldest_hot': oldest,
+            'archived_messages': archived,
+            'archived_days': days,
+            'archive_bytes': archive_bytes,
+        }
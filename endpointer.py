@@ -0,0 +1,199 @@
+"""Adaptive end-of-turn detection."""
+
+import re
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# Words that almost never end a finished sentence
+TRAILING_WORDS = {
+    'and', 'but', 'or', 'so', 'because', 'the', 'a', 'an', 'to', 'of', 'with',
+    'for', 'in', 'on', 'at', 'my', 'your', 'is', 'are', 'was', 'if', 'then',
+    'that', 'um', 'uh', 'like', 'about', 'from', 'what', 'which',
+}
+
+# Words that open a question
+QUESTION_OPENERS = {
+    'what', 'who', 'when', 'where', 'why', 'how', 'which', 'is', 'are', 'can',
+    'could', 'would', 'should', 'do', 'does', 'did', 'will', 'have', 'has',
+}
+
+
+def completeness(text):
+    """Estimate how likely a partial transcript is a finished utterance.
+
+    Returns:
+        float: 0.0 (clearly unfinished) to 1.0 (clearly finished)
+    """
+    words = re.findall(r"[a-z']+", text.lower())
+    if not words:
+        return 0.5
+    if words[-1] in TRAILING_WORDS:
+        return 0.0
+
+    stripped = text.rstrip()
+    score = 0.4
+    if stripped.endswith(('.', '!', '?')):
+        score += 0.4
+    if words[0] in QUESTION_OPENERS and (stripped.endswith('?') or len(words) >= 3):
+        score += 0.2
+    if len(words) < 2:
+        score -= 0.2
+    return max(0.0, min(1.0, score))
+
+
+class Endpointer:
+    """Decides how much trailing silence finalizes a turn.
+
+    The VAD reports a pause after ``base_silence_ms``. The buffered speech is
+    then transcribed in the background: a clearly complete utterance is
+    finalized after ``complete_silence_ms``, an unfinished one after a window
+    derived from the speaker's own mid-turn pauses, and anything uncertain
+    after ``max_silence_ms``.
+    """
+
+    def __init__(self, transcribe=None, mode="adaptive", base_silence_ms=250,
+                 complete_silence_ms=400, max_silence_ms=3000, min_pause_samples=5,
+                 partial_callback=None, resume_callback=None, gate=None):
+        """Initialize the endpointer.
+
+        Args:
+            transcribe: Callable returning text for a float32 speech buffer
+            mode: "adaptive", or "fixed" to always wait ``max_silence_ms``
+            base_silence_ms: Silence after which the VAD reports a pause
+            complete_silence_ms: Silence that finalizes a complete utterance
+            max_silence_ms: Silence that always finalizes a turn
+            min_pause_samples: Mid-turn pauses needed before adapting to the speaker
+            partial_callback: Called with the provisional transcript of each pause
+            resume_callback: Called when speech resumes after such a pause
+            gate: Optional callable; a pause's speech is only transcribed when it returns
+                True for it (e.g. WakeWordGate.screen), so ignored speech costs no ASR
+        """
+        self.transcribe = transcribe
+        self.mode = mode
+        self.base_silence_ms = base_silence_ms if mode == "adaptive" else max_silence_ms
+        self.complete_silence_ms = complete_silence_ms
+        self.max_silence_ms = max_silence_ms
+        self.min_pause_samples = min_pause_samples
+        self.partial_callback = partial_callback
+        self.resume_callback = resume_callback
+        self.gate = gate
+
+        # Lengths of pauses after which the speaker carried on talking
+        self.pauses_ms = deque(maxlen=50)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="endpointer") \
+            if transcribe and mode == "adaptive" else None
+        self._partial = None
+
+        # Statistics
+        self.turns = 0
+        self.early_turns = 0
+        self.resumed_pauses = 0
+
+    def pause_window_ms(self):
+        """Silence window for unfinished utterances, adapted to the speaker."""
+        if len(self.pauses_ms) < self.min_pause_samples:
+            return self.max_silence_ms
+        p90 = float(np.percentile(self.pauses_ms, 90))
+        return int(min(self.max_silence_ms, max(2 * self.complete_silence_ms, 1.5 * p90)))
+
+    def on_pause(self, speech_buffer):
+        """Called when the VAD reports a pause inside a turn."""
+        self._partial = None
+        if self._executor is not None:
+            self._partial = self._executor.submit(self._transcribe_partial, speech_buffer.copy())
+            if self.partial_callback is not None:
+                self._partial.add_done_callback(self._notify_partial)
+
+    def _transcribe_partial(self, speech):
+        """Transcribe a pause's speech, or return None if the gate rejects it."""
+        if self.gate is not None and not self.gate(speech):
+            return None
+        return self.transcribe(speech)
+
+    def _notify_partial(self, future):
+        """Forward a finished provisional transcript unless the pause has ended."""
+        if future is not self._partial or future.cancelled() or future.exception():
+            return
+        if future.result() is None:
+            return
+        try:
+            self.partial_callback(future.result())
+        except Exception as e:
+            logging.warning(f"Partial transcript callback failed: {e}")
+
+    def on_resume(self, pause_ms):
+        """Called when speech resumes after a pause that did not end the turn."""
+        self.resumed_pauses += 1
+        self.pauses_ms.append(pause_ms)
+        if self._partial is not None:
+            self._partial.cancel()
+            self._partial = None
+        if self.resume_callback is not None:
+            self.resume_callback()
+
+    def required_silence_ms(self):
+        """Silence needed to finalize the current turn, given what is known so far."""
+        if self.mode != "adaptive":
+            return self.max_silence_ms
+        if self._partial is None or not self._partial.done():
+            return self.max_silence_ms
+        try:
+            text = self._partial.result()
+        except Exception as e:
+            logging.debug(f"Partial transcription failed: {e}")
+            return self.max_silence_ms
+        if text is None:
+            # Rejected by the gate: it may still grow into a request, so do not cut it short
+            return self.max_silence_ms
+
+        score = completeness(text)
+        if score >= 0.8:
+            return self.complete_silence_ms
+        if score <= 0.2:
+            return self.max_silence_ms
+        return self.pause_window_ms()
+
+    def should_finalize(self, pause_ms):
+        """Return True once the current pause is long enough to end the turn."""
+        return pause_ms >= self.required_silence_ms()
+
+    def on_finalize(self, pause_ms):
+        """Called when a turn has been finalized after ``pause_ms`` of silence."""
+        self.turns += 1
+        if pause_ms < self.max_silence_ms:
+            self.early_turns += 1
+
+    def wait_for_partial(self, timeout=None):
+        """Block until the pending partial transcription (if any) has finished."""
+        if self._partial is not None and not self._partial.cancelled():
+            try:
+                self._partial.result(timeout=timeout)
+            except Exception:
+                pass
+
+    def take_transcript(self, timeout=1.0):
+        """Return the transcript computed for the finalized turn, if any."""
+        partial, self._partial = self._partial, None
+        if partial is None or partial.cancelled():
+            return None
+        try:
+            return partial.result(timeout=timeout)
+        except Exception:
+            return None
+
+    def get_stats(self):
+        """Get endpointing statistics."""
+        return {
+            'mode': self.mode,
+            'turns': self.turns,
+            'early_turns': self.early_turns,
+            'resumed_pauses': self.resumed_pauses,
+            'pause_window_ms': self.pause_window_ms(),
+        }
+
+    def cleanup(self):
+        """Stop the background transcription worker."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
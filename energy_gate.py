@@ -0,0 +1,85 @@
+"""Cheap energy / zero-crossing pre-gate in front of the Silero VAD."""
+
+import numpy as np
+
+
+class EnergyGate:
+    """Decides per chunk whether the signal could contain speech.
+
+    Tracks the noise floor as the minimum level over a sliding window (word
+    gaps keep it low during speech) and only opens when a chunk is clearly
+    louder than it (or moderately louder with a fricative-like zero-crossing
+    rate). Once open it stays open for a hangover period so speech tails and
+    short pauses still reach the VAD.
+    """
+
+    def __init__(self, margin_db=9.0, hangover_chunks=8, zcr_threshold=0.25,
+                 floor_window_chunks=100, initial_floor_db=-60.0, rise_rate=0.1,
+                 min_floor_db=-90.0):
+        """Initialize the gate.
+
+        Args:
+            margin_db: How far above the noise floor a chunk must be to open the gate
+            hangover_chunks: Chunks the gate stays open after the last loud chunk
+            zcr_threshold: Zero-crossing rate above which quieter chunks count as speech
+            floor_window_chunks: Length of the minimum-tracking window (~3 s by default)
+            initial_floor_db: Noise floor assumed before the first chunk arrives
+            rise_rate: Smoothing factor used when the noise floor rises
+            min_floor_db: Lower bound of the noise floor estimate
+        """
+        self.margin_db = margin_db
+        self.hangover_chunks = hangover_chunks
+        self.zcr_threshold = zcr_threshold
+        self.rise_rate = rise_rate
+        self.min_floor_db = min_floor_db
+        self.noise_floor_db = initial_floor_db
+        self._levels = np.empty(floor_window_chunks)
+        self._level_index = None
+        self._hangover = 0
+
+    @staticmethod
+    def measure(chunk):
+        """Return the energy in dBFS and the zero-crossing rate of a chunk."""
+        energy = float(np.dot(chunk, chunk)) / max(len(chunk), 1)
+        level_db = 10.0 * np.log10(energy + 1e-12)
+        crossings = np.count_nonzero(np.signbit(chunk[1:]) != np.signbit(chunk[:-1]))
+        return level_db, crossings / max(len(chunk) - 1, 1)
+
+    def __call__(self, chunk):
+        """Return True if the chunk should be passed to the VAD."""
+        level_db, zcr = self.measure(chunk)
+        self._update_floor(level_db)
+        above_floor = level_db - self.noise_floor_db
+
+        active = above_floor > self.margin_db or (
+            above_floor > self.margin_db / 2 and zcr > self.zcr_threshold
+        )
+
+        if active:
+            self._hangover = self.hangover_chunks
+            return True
+        if self._hangover > 0:
+            self._hangover -= 1
+            return True
+        return False
+
+    def _update_floor(self, level_db):
+        """Move the noise floor towards the quietest recent level."""
+        if self._level_index is None:
+            # Seed the window with the first chunk instead of a guessed floor
+            self._levels.fill(level_db)
+            self.noise_floor_db = max(level_db, self.min_floor_db)
+            self._level_index = 0
+        self._levels[self._level_index] = level_db
+        self._level_index = (self._level_index + 1) % len(self._levels)
+        target = max(float(self._levels.min()), self.min_floor_db)
+
+        # Follow drops immediately, rises smoothly
+        if target < self.noise_floor_db:
+            self.noise_floor_db = target
+        else:
+            self.noise_floor_db += self.rise_rate * (target - self.noise_floor_db)
+
+    def reset(self):
+        """Close the gate without forgetting the noise floor."""
+        self._hangover = 0
@@ -6,19 +6,51 @@ An agentic voice assistant with tool calling capabilities.
 import os
 import sys
 import signal
+import asyncio
+import argparse
+import threading
 import atexit
 import logging
 from terminal_style import terminal
-from config import GROQ_API_KEY
+from config import (
+    GROQ_API_KEY,
+    ENDPOINT_MODE,
+    ENDPOINT_BASE_SILENCE_MS,
+    ENDPOINT_COMPLETE_SILENCE_MS,
+    VAD_MIN_SILENCE,
+    SPECULATION_ENABLED,
+    SPECULATION_MIN_WORDS,
+    MIN_SPEECH_LENGTH,
+    WAKE_WORD,
+    WAKE_WORD_WINDOW_SECS,
+    WAKE_WORD_THRESHOLD,
+    WAKE_WORD_FOLLOW_UP_SECS,
+    TURN_HOLD_MIN_SECS,
+    TURN_HOLD_MAX_SECS,
+    ASYNC_RUNTIME
+)
 from transcriber import Transcriber
 from agent import LUMAAgent
+from providers import RunCancelledError
 from audio_processor import AudioProcessor
+from endpointer import Endpointer
+from speculation import SpeculativeResponder
+from wake_word import WakeWordGate
+from turn_assembler import TurnAssembler
+from async_runtime import AsyncRuntime
+from profiler import profiler
+from ui_events import ui
 
 
 # Global variables
 running = True
 audio_processor = None
 transcriber = None
+endpointer = None
+speculator = None
+wake_gate = None
+assembler = None
+runtime = None
 agent = None
 
 
@@ -32,7 +64,7 @@ def signal_handler(sig, frame):
 
 def cleanup():
     """Clean up all resources."""
-    global audio_processor, transcriber, agent
+    global audio_processor, transcriber, endpointer, speculator, assembler, agent
     
     # Use debug-level logging for cleanup messages to avoid console spam
     logging.debug("Cleaning up resources...")
@@ -40,47 +72,192 @@ def cleanup():
     if audio_processor is not None:
         audio_processor.cleanup()
     
+    if assembler is not None:
+        logging.debug(f"Turn assembly stats: {assembler.get_stats()}")
+        assembler.cleanup()
+    
+    if runtime is not None:
+        logging.debug(f"Async runtime stats: {runtime.get_stats()}")
+    
+    if endpointer is not None:
+        endpointer.cleanup()
+    
+    if speculator is not None:
+        logging.debug(f"Speculation stats: {speculator.get_stats()}")
+        speculator.cleanup()
+    
+    if wake_gate is not None:
+        logging.debug(f"Wake word stats: {wake_gate.get_stats()}")
+    
     if transcriber is not None:
         transcriber.cleanup()
     
     if agent is not None:
         agent.cleanup()
     
+    logging.debug(f"UI stats: {ui.get_stats()}")
+    
     # No global TTS instance here; agent manages its own TTS
 
 
 def on_speech_detected(speech_buffer):
     """Callback when speech is detected and ready for processing."""
-    global transcriber, agent
+    global transcriber, endpointer, speculator, wake_gate, assembler
     
+    submitted = False
     try:
-        # Transcribe speech
-        transcription = transcriber(speech_buffer)
+        # Reuse the transcript the endpointer already computed for this turn
+        transcription = endpointer.take_transcript() if endpointer else None
+        
+        # Drop short blips and speech not addressed to LUMA before paying for ASR and the LLM
+        accepted, transcription = wake_gate.check(speech_buffer, transcription)
+        if not accepted:
+            if speculator:
+                speculator.cancel()
+            return
+        
+        if transcription is None:
+            with profiler.stage("asr"):
+                transcription = transcriber(speech_buffer)
+        transcription = wake_gate.strip(transcription)
         
         if transcription.strip():
-            print(f"\n\n✨ You: {transcription}")
-            print("🤖 LUMA is thinking...", end="", flush=True)
-            
-            try:
-                # Get AI response with tool calling (will handle printing and TTS)
-                response = agent.get_response(transcription)
-                
-            except Exception as e:
-                print(f"\n❌ Error getting AI response: {str(e)}")
-                # Let agent handle TTS for errors if available
-                try:
-                    if agent and hasattr(agent, 'tts') and agent.tts:
-                        agent.tts.speak("I apologize, but I encountered an error processing your request.")
-                except Exception:
-                    pass
+            ui.message("✨ You", transcription)
+            ui.status("LUMA is thinking...", style="blue", spinner=True)
+            # Back-to-back utterances are merged and answered on the assembler's thread
+            assembler.submit(transcription)
+            submitted = True
     
     except Exception as e:
-        print(f"\n❌ Error processing speech: {str(e)}")
+        ui.error(f"Error processing speech: {str(e)}")
+    finally:
+        if not submitted:
+            if assembler is not None:
+                assembler.speech_ended()
+                if assembler.busy:
+                    # A dropped segment does not end the turn still being answered
+                    ui.status("LUMA is thinking...", style="blue", spinner=True)
+            profiler.end_turn()
+
+
+def is_playing():
+    """Whether LUMA is speaking; the microphone is ignored meanwhile."""
+    return agent is not None and agent.tts is not None and agent.tts.is_speaking
+
+
+def show_ready():
+    """Show that every turn has been answered or dropped."""
+    ui.status("✨ Ready...")
+
+
+def generate_turn(text, cancel=None):
+    """Generate the reply to an assembled turn; returns None after reporting an error.
+
+    Setting ``cancel`` (the user said more) aborts the model call without an error.
+    """
+    try:
+        # Use the speculative reply if it was generated for this exact transcript
+        reply = speculator.claim(text, cancel=cancel) if speculator else None
+        if reply is None and not (cancel is not None and cancel.is_set()):
+            with profiler.stage("agent"):
+                reply = agent.generate_reply(text, cancel=cancel)
+        return reply
+    except RunCancelledError:
+        return None
+    except Exception as e:
+        ui.error(f"Error getting AI response: {str(e)}")
+        # Let agent handle TTS for errors if available
+        try:
+            if agent and hasattr(agent, 'tts') and agent.tts:
+                agent.tts.speak("I apologize, but I encountered an error processing your request.")
+        except Exception:
+            pass
+        profiler.end_turn()
+        return None
+
+
+def deliver_turn(text, reply):
+    """Store, print and speak the reply to an assembled turn."""
+    try:
+        with profiler.stage("agent"):
+            agent.get_response(text, reply=reply)
+    except Exception as e:
+        ui.error(f"Error getting AI response: {str(e)}")
+    finally:
+        profiler.end_turn()
+
+
+def speculate(partial):
+    """Start a speculative reply for a pause's transcript addressed to LUMA."""
+    if wake_gate.phrase and not wake_gate.armed and not wake_gate.match(partial):
+        return
+    speculator.speculate(wake_gate.strip(partial))
+
+
+def handle_command(command):
+    """Handle a typed terminal command."""
+    global running, audio_processor, transcriber
+    
+    parts = command.strip().split()
+    if not parts:
+        return
+    name, args = parts[0].lower(), parts[1:]
+    
+    if name == "/help":
+        ui.call(terminal.print_help)
+    elif name == "/stats":
+        if transcriber is not None:
+            ui.call(terminal.print_stats, transcriber.get_stats())
+        if agent is not None and agent.db is not None:
+            ui.call(terminal.print_history_stats, agent.db.get_storage_stats())
+    elif name == "/profile":
+        turns = int(args[0]) if args and args[0].isdigit() else 1
+        profiler.enable(turns)
+        ui.success(f"Profiling the next {turns} turn(s) into {profiler.output_dir}/")
+    elif name == "/exit":
+        running = False
+        if runtime is not None:
+            runtime.stop()
+        elif audio_processor is not None:
+            audio_processor.running = False
+    else:
+        ui.error(f"Unknown command: {name} (type /help)")
+
+
+def command_loop():
+    """Read commands from stdin while audio is processed on the main thread."""
+    while running:
+        try:
+            line = sys.stdin.readline()
+        except (OSError, ValueError):
+            return
+        if not line:
+            return
+        handle_command(line)
+
+
+def parse_args():
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="LUMA voice assistant")
+    parser.add_argument('--profile', type=int, metavar='N', default=0,
+                        help="Profile the next N turns into flamegraph files")
+    parser.add_argument('--headless', action='store_true',
+                        help="Disable all terminal output (errors are still logged)")
+    parser.add_argument('--async', dest='use_async', action='store_true', default=ASYNC_RUNTIME,
+                        help="Run capture, VAD/ASR, the agent and TTS on one asyncio event loop")
+    return parser.parse_args()
 
 
 def main():
     """Main function."""
-    global running, audio_processor, transcriber, agent
+    global running, audio_processor, transcriber, endpointer, speculator, wake_gate, assembler, runtime, agent
+    
+    args = parse_args()
+    if args.profile:
+        profiler.enable(args.profile)
+    if args.headless:
+        ui.headless = True
+    ui.start()
     
     # Register cleanup
     atexit.register(cleanup)
@@ -88,37 +265,81 @@ def main():
     
     try:
         # Print header
-        terminal.print_header()
+        ui.call(terminal.print_header)
         # Initialize components visibly
-        terminal.print_status("Initializing LUMA...", "yellow")
+        ui.status("Initializing LUMA...")
         # Check API keys
         if not GROQ_API_KEY:
-            terminal.print_error("GROQ_API_KEY not found in environment variables")
+            ui.error("GROQ_API_KEY not found in environment variables")
             sys.exit(1)
 
         transcriber = Transcriber()
-        agent = LUMAAgent()
-        terminal.print_success("LUMA initialized successfully!\n")
+        wake_gate = WakeWordGate(
+            transcriber,
+            phrase=WAKE_WORD,
+            window_secs=WAKE_WORD_WINDOW_SECS,
+            min_speech_secs=MIN_SPEECH_LENGTH,
+            threshold=WAKE_WORD_THRESHOLD,
+            follow_up_secs=WAKE_WORD_FOLLOW_UP_SECS,
+        )
+        agent = LUMAAgent(async_tools=args.use_async)
+        ui.success("LUMA initialized successfully!\n")
 
         # Initialize audio processor
-        terminal.print_status("Starting audio stream...", "yellow")
-        audio_processor = AudioProcessor(on_speech_detected)
+        ui.status("Starting audio stream...")
+        # The async runtime assembles turns itself and does not use speculative replies
+        if SPECULATION_ENABLED and not args.use_async:
+            speculator = SpeculativeResponder(agent, min_words=SPECULATION_MIN_WORDS)
+        endpointer = Endpointer(
+            transcriber,
+            mode=ENDPOINT_MODE,
+            base_silence_ms=ENDPOINT_BASE_SILENCE_MS,
+            complete_silence_ms=ENDPOINT_COMPLETE_SILENCE_MS,
+            max_silence_ms=VAD_MIN_SILENCE,
+            partial_callback=speculate if speculator else None,
+            resume_callback=speculator.cancel if speculator else None,
+            gate=wake_gate.screen,
+        )
+        if args.use_async:
+            audio_processor = AudioProcessor(None, endpointer, is_playing=is_playing)
+            runtime = AsyncRuntime(audio_processor, transcriber, wake_gate, agent)
+        else:
+            assembler = TurnAssembler(
+                generate_turn,
+                deliver_turn,
+                hold_min_secs=TURN_HOLD_MIN_SECS,
+                hold_max_secs=TURN_HOLD_MAX_SECS,
+                on_idle=show_ready,
+            )
+            audio_processor = AudioProcessor(on_speech_detected, endpointer, on_speech_start=assembler.speech_started,
+                                             is_playing=is_playing)
         audio_processor.start()
 
-        terminal.print_success("Ready! Speak your command...\n")
+        if WAKE_WORD:
+            ui.success(f"Ready! Say \"{WAKE_WORD}\" followed by your command...\n")
+        else:
+            ui.success("Ready! Speak your command...\n")
+        
+        # Typed commands (/help, /stats, /profile, /exit)
+        if sys.stdin and sys.stdin.isatty():
+            threading.Thread(target=command_loop, name="commands", daemon=True).start()
 
         # Start processing audio
-        audio_processor.process()
+        if runtime is not None:
+            asyncio.run(runtime.run())
+        else:
+            audio_processor.process()
         
     except KeyboardInterrupt:
-        print("\n\nShutting down...")
+        ui.status("Shutting down...")
     except Exception as e:
-        terminal.print_error(f"Error in main: {str(e)}")
+        ui.error(f"Error in main: {str(e)}")
         import traceback
         traceback.print_exc()
     finally:
         cleanup()
-        terminal.print_success("LUMA terminated. Goodbye!")
+        ui.success("LUMA terminated. Goodbye!")
+        ui.stop()
 
 
 if __name__ == "__main__":
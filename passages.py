@@ -0,0 +1,179 @@
+"""Query-relevant passage selection for long tool outputs (web pages, files)."""
+
+import re
+import math
+import time
+import logging
+import threading
+from collections import Counter
+from search_cache import STOPWORDS
+from config import PASSAGE_CHARS, PASSAGE_BM25_K1, PASSAGE_BM25_B
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Words too common in requests and pages to tell passages apart
+IGNORED_WORDS = STOPWORDS | {
+    'i', 'you', 'it', 'its', 'this', 'that', 'with', 'from', 'by', 'at', 'be', 'was',
+    'can', 'could', 'do', 'does', 'how', 'who', 'when', 'where', 'which', 'why',
+    'latest', 'news', 'read', 'page', 'website', 'file', 'find', 'look', 'out',
+}
+
+
+def terms(text):
+    """Lowercase content words of a text, with a crude plural/suffix folding."""
+    words = []
+    for word in _WORD.findall(text.lower()):
+        if word in IGNORED_WORDS:
+            continue
+        if len(word) > 4 and word.endswith('ies'):
+            word = word[:-3] + 'y'
+        elif len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+def split_passages(text, size=PASSAGE_CHARS):
+    """Split text into passages of about ``size`` characters on sentence boundaries."""
+    passages = []
+    current = ""
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        # Sentences longer than a passage (minified pages, tables) are cut hard
+        while len(sentence) > size:
+            if current:
+                passages.append(current)
+                current = ""
+            passages.append(sentence[:size])
+            sentence = sentence[size:]
+        if current and len(current) + 1 + len(sentence) > size:
+            passages.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        passages.append(current)
+    return passages
+
+
+class PassageRanker:
+    """Keeps the passages of a text that best match a query, within a character budget.
+
+    Passages are scored with Okapi BM25 over an index built from the text
+    itself, so no corpus or model is needed. Budget left after the matching
+    passages goes to their neighbours; the selection is returned in
+    document order, with " ... " marking skipped text.
+    """
+
+    def __init__(self, passage_chars=PASSAGE_CHARS, k1=PASSAGE_BM25_K1, b=PASSAGE_BM25_B):
+        """Initialize the ranker.
+
+        Args:
+            passage_chars: Target passage length in characters
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+        """
+        self.passage_chars = passage_chars
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.calls = 0
+        self.ranked = 0
+        self.passages = 0
+        self.total_secs = 0.0
+
+    def score(self, passages, query):
+        """Return the BM25 score of each passage for the query."""
+        query_terms = set(terms(query))
+        docs = [Counter(terms(p)) for p in passages]
+        if not query_terms or not docs:
+            return [0.0] * len(passages)
+
+        count = len(docs)
+        avg_len = sum(sum(d.values()) for d in docs) / count or 1.0
+        idf = {}
+        for term in query_terms:
+            df = sum(1 for d in docs if term in d)
+            idf[term] = math.log(1 + (count - df + 0.5) / (df + 0.5))
+
+        scores = []
+        for doc in docs:
+            length = sum(doc.values())
+            total = 0.0
+            for term in query_terms:
+                tf = doc.get(term)
+                if not tf:
+                    continue
+                total += idf[term] * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / avg_len))
+            scores.append(total)
+        return scores
+
+    def select(self, text, query, budget):
+        """Return the most relevant part of ``text`` for ``query`` in at most ``budget`` characters.
+
+        Falls back to the start of the text when there is no query or no
+        passage matches it.
+        """
+        started = time.perf_counter()
+        if len(text) <= budget:
+            return text
+
+        selected = None
+        passages = []
+        if query:
+            passages = split_passages(text, min(self.passage_chars, budget))
+            scores = self.score(passages, query)
+            if any(scores):
+                order = sorted(range(len(passages)), key=lambda i: -scores[i])
+                chosen, used = [], 0
+                for i in order:
+                    if scores[i] <= 0:
+                        break
+                    cost = len(passages[i]) + (5 if chosen else 0)
+                    if used + cost > budget:
+                        continue
+                    chosen.append(i)
+                    used += cost
+                # Spend what is left on the text around the best passages
+                for i in list(chosen):
+                    for neighbour in (i + 1, i - 1):
+                        if 0 <= neighbour < len(passages) and neighbour not in chosen:
+                            cost = len(passages[neighbour]) + 5
+                            if used + cost <= budget:
+                                chosen.append(neighbour)
+                                used += cost
+                selected = ""
+                previous = None
+                for i in sorted(chosen):
+                    # Contiguous passages read on, gaps are marked
+                    separator = "" if previous is None else " " if i == previous + 1 else " ... "
+                    selected += separator + passages[i]
+                    previous = i
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.calls += 1
+            self.passages += len(passages)
+            self.total_secs += elapsed
+            if selected:
+                self.ranked += 1
+        if selected:
+            logging.debug(f"Ranked {len(passages)} passages in {1000 * elapsed:.1f} ms")
+            return selected
+        return text[:budget] + "..."
+
+    def get_stats(self):
+        """Get ranking counts and time spent."""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'ranked': self.ranked,
+                'passages': self.passages,
+                'total_ms': 1000 * self.total_secs,
+                'avg_ms': 1000 * self.total_secs / max(self.calls, 1),
+            }
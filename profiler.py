@@ -0,0 +1,139 @@
+"""Opt-in sampling profiler producing per-turn collapsed-stack flamegraph files."""
+
+import os
+import sys
+import time
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from config import PROFILE_DIR, PROFILE_INTERVAL_MS
+
+
+class SamplingProfiler:
+    """Samples the stacks of all LUMA threads while a profiled turn is running.
+
+    Stacks are written in the collapsed format (``frame;frame;frame count``)
+    read by flamegraph.pl, speedscope and similar tools, one file per turn.
+    Each thread's current stage (asr, llm, tts, ...) is recorded as the root
+    frame of its stacks so stage boundaries show up directly in the graph;
+    threads outside any stage are labelled ``idle``.
+    """
+
+    def __init__(self, output_dir=PROFILE_DIR, interval_ms=PROFILE_INTERVAL_MS):
+        """Initialize the profiler.
+
+        Args:
+            output_dir: Directory receiving the ``.collapsed`` files
+            interval_ms: Sampling interval
+        """
+        self.output_dir = output_dir
+        self.interval = interval_ms / 1000
+        self.turns_remaining = 0
+        self.turn_id = 0
+        self._lock = threading.Lock()
+        self._samples = None
+        self._thread_stages = {}  # thread ident -> stage it is in
+        self._stages = []
+        self._turn_started = 0.0
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def active(self):
+        """Whether a turn is currently being sampled."""
+        return self._samples is not None
+
+    def enable(self, turns):
+        """Profile the next ``turns`` turns."""
+        with self._lock:
+            self.turns_remaining = turns
+        logging.info(f"Profiling the next {turns} turn(s) into {self.output_dir}")
+
+    def begin_turn(self, stage="turn"):
+        """Start sampling a turn if profiling is enabled."""
+        with self._lock:
+            if self.turns_remaining <= 0 or self.active:
+                return
+            self.turns_remaining -= 1
+            self.turn_id += 1
+            self._samples = Counter()
+            self._thread_stages = {threading.get_ident(): stage}
+            self._stages = [(stage, 0.0, threading.current_thread().name)]
+            self._turn_started = time.perf_counter()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self._thread.start()
+
+    def end_turn(self):
+        """Stop sampling the current turn and write its flamegraph file."""
+        if not self.active:
+            return None
+        self._stop.set()
+        self._thread.join()
+        with self._lock:
+            samples, self._samples = self._samples, None
+            stages = self._stages
+        return self._write(samples, stages)
+
+    @contextmanager
+    def stage(self, name):
+        """Attribute samples taken inside the block to a pipeline stage."""
+        if not self.active:
+            yield
+            return
+        ident = threading.get_ident()
+        thread_name = threading.current_thread().name
+        previous = self._thread_stages.get(ident)
+        self._thread_stages[ident] = name
+        self._stages.append((name, time.perf_counter() - self._turn_started, thread_name))
+        try:
+            yield
+        finally:
+            if previous is None:
+                self._thread_stages.pop(ident, None)
+            else:
+                self._thread_stages[ident] = previous
+            self._stages.append((f"/{name}", time.perf_counter() - self._turn_started, thread_name))
+
+    def _sample_loop(self):
+        """Collect stacks of every other thread until the turn ends."""
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            stages = dict(self._thread_stages)
+            frames = sys._current_frames()
+            samples = Counter()
+            for ident, frame in frames.items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(f"thread:{names.get(ident, ident)}")
+                stack.append(f"stage:{stages.get(ident, 'idle')}")
+                samples[";".join(reversed(stack))] += 1
+            del frames
+            with self._lock:
+                if self._samples is not None:
+                    self._samples.update(samples)
+
+    def _write(self, samples, stages):
+        """Write one turn's samples and stage timeline to disk."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"turn-{self.turn_id:04d}.collapsed")
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(path.replace('.collapsed', '.stages.txt'), 'w', encoding='utf-8') as f:
+            for name, offset, thread_name in stages:
+                f.write(f"{offset * 1000:10.1f} ms  {name}  ({thread_name})\n")
+        logging.info(f"Wrote profile for turn {self.turn_id} to {path}")
+        return path
+
+
+# Create a global instance
+profiler = SamplingProfiler()
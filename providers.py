@@ -0,0 +1,440 @@
+"""LLM provider pool with health tracking, circuit breaking and hedged requests."""
+
+import copy
+import time
+import queue
+import asyncio
+import logging
+import threading
+import contextvars
+from collections import deque
+from config import (
+    PROVIDER_HEDGING,
+    PROVIDER_TIMEOUT,
+    HEDGE_DEFAULT_DELAY,
+    HEDGE_MIN_DELAY,
+    HEDGE_MAX_DELAY,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_RESET_SECS
+)
+
+
+class ProviderUnavailableError(Exception):
+    """Raised when no provider produced an answer."""
+
+
+class RunCancelledError(Exception):
+    """Raised when the caller cancelled a run before it was answered."""
+
+
+def isolated_copy(agent, max_tokens=None, after_tools=False):
+    """Copy an Agno agent so a run can overlap others.
+
+    The model is copied shallowly: per-run tool state is private while the
+    underlying HTTP client (and its connection pool) stays shared.
+
+    Args:
+        agent: Agno agent to copy
+        max_tokens: Output token limit for runs of the copy (None keeps the model's)
+        after_tools: Apply ``max_tokens`` only to completions that follow tool
+            results (the answer), never to the ones that call the tools
+    """
+    model = copy.copy(agent.model)
+    if max_tokens is not None:
+        # Groq/OpenAI-style models call it max_tokens, Gemini max_output_tokens
+        names = [name for name in ('max_tokens', 'max_output_tokens') if hasattr(model, name)]
+        for name in names:
+            setattr(model, name, None if after_tools else max_tokens)
+        if after_tools:
+            for method in ('invoke', 'invoke_stream', 'ainvoke', 'ainvoke_stream'):
+                setattr(model, method, _limit_after_tools(model, getattr(model, method), names, max_tokens))
+    return agent.deep_copy(update={'model': model})
+
+
+def _limit_after_tools(model, invoke, names, max_tokens):
+    """Wrap a model call so the token limit is set only when the last message is a tool result."""
+    def call(messages, *args, **kwargs):
+        # The request parameters are read when the call (or coroutine) starts, before the next call
+        limit = max_tokens if messages and messages[-1].role == 'tool' else None
+        for name in names:
+            setattr(model, name, limit)
+        return invoke(messages, *args, **kwargs)
+    return call
+
+
+class CircuitBreaker:
+    """Stops sending requests to a provider after repeated failures."""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_secs=BREAKER_RESET_SECS):
+        """Initialize the breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_secs: Seconds before an open circuit lets a trial request through
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_secs = reset_secs
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def available(self):
+        """Return True if a request may be sent, without claiming a half-open trial."""
+        with self._lock:
+            if self.state == self.OPEN:
+                return time.monotonic() - self.opened_at >= self.reset_secs
+            return self.state == self.CLOSED
+
+    def allow(self):
+        """Return True if a request may be sent; an open circuit past its reset becomes half-open.
+
+        Call it only when the request is actually sent: the half-open state
+        admits no further requests until the trial's outcome is recorded.
+        """
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_secs:
+                self.state = self.HALF_OPEN
+                return True
+            return self.state == self.CLOSED
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class Provider:
+    """One LLM provider with an Agno agent per route and its health statistics."""
+
+    def __init__(self, name, agents, breaker=None):
+        """Initialize the provider.
+
+        Args:
+            name: Provider name used in logs and statistics
+            agents: Dict of route -> Agno agent
+            breaker: CircuitBreaker (a default one is created if omitted)
+        """
+        self.name = name
+        self.agents = agents
+        self.breaker = breaker or CircuitBreaker()
+        self.first_token_secs = deque(maxlen=50)
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+
+    def hedge_delay(self):
+        """Time to wait for a first token before hedging, from this provider's p95."""
+        with self._lock:
+            samples = sorted(self.first_token_secs)
+        if len(samples) < 5:
+            return HEDGE_DEFAULT_DELAY
+        p95 = samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+        return min(HEDGE_MAX_DELAY, max(HEDGE_MIN_DELAY, p95))
+
+    def run(self, prompt, route, cancel, on_first_token, max_tokens=None, after_tools=False):
+        """Stream a run and return the final Agno RunResponse.
+
+        Args:
+            prompt: Full model input
+            route: Route whose agent to use
+            cancel: threading.Event that aborts the stream when set
+            on_first_token: Called once when the first content arrives
+            max_tokens: Output token limit for this run (None keeps the model's)
+            after_tools: Limit only the completions that follow tool results
+        """
+        agent = isolated_copy(self.agents[route], max_tokens, after_tools)
+        started = time.perf_counter()
+        first = False
+        for chunk in agent.run(prompt, stream=True):
+            if cancel.is_set():
+                return None
+            content = getattr(chunk, 'content', None)
+            if not first and isinstance(content, str) and content:
+                first = True
+                with self._lock:
+                    self.first_token_secs.append(time.perf_counter() - started)
+                on_first_token()
+        if not first:
+            on_first_token()
+        return agent.run_response
+
+    async def arun(self, prompt, route, on_first_token, max_tokens=None, after_tools=False):
+        """Async variant of run, streamed on the caller's event loop (cancel the task to abort).
+
+        Args:
+            prompt: Full model input
+            route: Route whose agent to use
+            on_first_token: Called once when the first content arrives
+            max_tokens: Output token limit for this run (None keeps the model's)
+            after_tools: Limit only the completions that follow tool results
+        """
+        model = self.agents[route].model
+        if getattr(model, 'async_client', False) is None:
+            # Agno builds a new async client (and connection pool) per request unless one is set
+            model.async_client = model.get_async_client()
+        agent = isolated_copy(self.agents[route], max_tokens, after_tools)
+        started = time.perf_counter()
+        first = False
+        async for chunk in await agent.arun(prompt, stream=True):
+            content = getattr(chunk, 'content', None)
+            if not first and isinstance(content, str) and content:
+                first = True
+                with self._lock:
+                    self.first_token_secs.append(time.perf_counter() - started)
+                on_first_token()
+        if not first:
+            on_first_token()
+        return agent.run_response
+
+    def record_request(self):
+        # Claims the half-open trial if the circuit was waiting for one
+        self.breaker.allow()
+        with self._lock:
+            self.requests += 1
+
+    def record_success(self):
+        self.breaker.record_success()
+        with self._lock:
+            self.successes += 1
+
+    def record_failure(self):
+        self.breaker.record_failure()
+        with self._lock:
+            self.failures += 1
+
+    def get_stats(self):
+        """Get health statistics for this provider."""
+        with self._lock:
+            samples = list(self.first_token_secs)
+            requests, successes, failures = self.requests, self.successes, self.failures
+        return {
+            'state': self.breaker.state,
+            'requests': requests,
+            'successes': successes,
+            'failures': failures,
+            'avg_first_token_secs': sum(samples) / max(len(samples), 1),
+            'hedge_delay_secs': self.hedge_delay(),
+        }
+
+
+class ProviderPool:
+    """Runs turns on the healthiest provider, hedging and failing over to the next ones."""
+
+    CANCEL_POLL_SECS = 0.05  # how often a cancellable run checks its cancel event
+
+    def __init__(self, providers, hedging=PROVIDER_HEDGING, timeout=PROVIDER_TIMEOUT):
+        """Initialize the pool.
+
+        Args:
+            providers: Providers in order of preference
+            hedging: Fire a secondary request if the primary is slow to start answering
+            timeout: Longest time to wait for any answer
+        """
+        if not providers:
+            raise ValueError("ProviderPool needs at least one provider")
+        self.providers = providers
+        self.hedging = hedging
+        self.timeout = timeout
+
+        # Statistics
+        self.hedges = 0
+        self.secondary_wins = 0
+        self.failovers = 0
+
+    def run(self, prompt, route, max_tokens=None, cancel=None, after_tools=False):
+        """Run a prompt and return ``(run_response, provider_name)`` of the first answer.
+
+        Args:
+            prompt: Full model input
+            route: Route whose agent to use
+            max_tokens: Output token limit for this turn (None keeps the models')
+            cancel: Optional threading.Event; setting it abandons the run and stops its streams
+            after_tools: Apply ``max_tokens`` only to the answer that follows tool results
+
+        Raises:
+            ProviderUnavailableError: If every provider failed or timed out
+            RunCancelledError: If ``cancel`` was set before an answer arrived
+        """
+        candidates = [p for p in self.providers if p.breaker.available()]
+        if not candidates:
+            # Every circuit is open: still try the preferred provider
+            candidates = self.providers[:1]
+
+        events = queue.Queue()
+        stop = threading.Event()  # stops every stream of this run once it is over
+        started = []
+        errors = []
+
+        def launch(provider):
+            index = len(started)
+            started.append(provider)
+            provider.record_request()
+
+            def attempt():
+                try:
+                    response = provider.run(prompt, route, stop, lambda: events.put(('first', index, None)),
+                                            max_tokens, after_tools)
+                    events.put(('done', index, response))
+                except Exception as e:
+                    events.put(('error', index, e))
+
+            # Tools read per-turn state (the request being answered) from context variables
+            context = contextvars.copy_context()
+            threading.Thread(target=context.run, args=(attempt,), name=f"llm-{provider.name}",
+                             daemon=True).start()
+
+        launch(candidates[0])
+        deadline = time.monotonic() + self.timeout
+        hedge_at = time.monotonic() + candidates[0].hedge_delay()
+        first_token = False
+        finished = set()
+
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+
+                if cancel is not None and cancel.is_set():
+                    raise RunCancelledError()
+
+                can_hedge = self.hedging and not first_token and len(started) < len(candidates)
+                wait = min(deadline, hedge_at) - now if can_hedge else deadline - now
+                if cancel is not None:
+                    wait = min(wait, self.CANCEL_POLL_SECS)
+                try:
+                    kind, index, payload = events.get(timeout=max(wait, 0.0))
+                except queue.Empty:
+                    if can_hedge and time.monotonic() >= hedge_at:
+                        logging.debug(f"Hedging {started[0].name} with {candidates[len(started)].name}")
+                        self.hedges += 1
+                        launch(candidates[len(started)])
+                    continue
+
+                provider = started[index]
+                if kind == 'first':
+                    first_token = True
+                elif kind == 'done':
+                    provider.record_success()
+                    if index > 0:
+                        self.secondary_wins += 1
+                    return payload, provider.name
+                else:
+                    logging.warning(f"LLM provider {provider.name} failed: {payload}")
+                    provider.record_failure()
+                    errors.append(f"{provider.name}: {payload}")
+                    finished.add(index)
+                    if len(started) < len(candidates):
+                        # Fail over immediately instead of waiting for the hedge deadline
+                        self.failovers += 1
+                        first_token = False
+                        hedge_at = time.monotonic() + candidates[len(started)].hedge_delay()
+                        launch(candidates[len(started)])
+                    elif len(finished) == len(started):
+                        break
+
+            # Timed out: count the providers that never answered as failed
+            for index, provider in enumerate(started):
+                if index not in finished:
+                    provider.record_failure()
+                    errors.append(f"{provider.name}: timed out")
+            raise ProviderUnavailableError("; ".join(errors) or "no provider available")
+        finally:
+            # Losers (and cancelled runs) stop streaming at their next chunk
+            stop.set()
+
+    async def arun(self, prompt, route, max_tokens=None, after_tools=False):
+        """Async variant of run with the same hedging and failover; losing requests are cancelled.
+
+        Raises:
+            ProviderUnavailableError: If every provider failed or timed out
+        """
+        candidates = [p for p in self.providers if p.breaker.available()]
+        if not candidates:
+            candidates = self.providers[:1]
+
+        loop = asyncio.get_running_loop()
+        first_token = asyncio.Event()
+        tasks = {}  # running task -> index into started
+        started = []
+        errors = []
+
+        def launch(provider):
+            started.append(provider)
+            provider.record_request()
+            task = asyncio.ensure_future(provider.arun(prompt, route, first_token.set, max_tokens, after_tools))
+            tasks[task] = len(started) - 1
+
+        launch(candidates[0])
+        deadline = loop.time() + self.timeout
+        hedge_at = loop.time() + candidates[0].hedge_delay()
+
+        try:
+            while tasks:
+                now = loop.time()
+                if now >= deadline:
+                    break
+
+                can_hedge = self.hedging and not first_token.is_set() and len(started) < len(candidates)
+                wait = min(deadline, hedge_at) - now if can_hedge else deadline - now
+                done, _ = await asyncio.wait(tasks, timeout=max(wait, 0.0), return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if can_hedge and loop.time() >= hedge_at:
+                        logging.debug(f"Hedging {started[0].name} with {candidates[len(started)].name}")
+                        self.hedges += 1
+                        launch(candidates[len(started)])
+                    continue
+
+                for task in done:
+                    index = tasks.pop(task)
+                    provider = started[index]
+                    error = task.exception()
+                    if error is None:
+                        provider.record_success()
+                        if index > 0:
+                            self.secondary_wins += 1
+                        return task.result(), provider.name
+
+                    logging.warning(f"LLM provider {provider.name} failed: {error}")
+                    provider.record_failure()
+                    errors.append(f"{provider.name}: {error}")
+                    if len(started) < len(candidates):
+                        # Fail over immediately instead of waiting for the hedge deadline
+                        self.failovers += 1
+                        first_token.clear()
+                        hedge_at = loop.time() + candidates[len(started)].hedge_delay()
+                        launch(candidates[len(started)])
+
+            # Timed out: count the providers that never answered as failed
+            for index in tasks.values():
+                provider = started[index]
+                provider.record_failure()
+                errors.append(f"{provider.name}: timed out")
+            raise ProviderUnavailableError("; ".join(errors) or "no provider available")
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def get_stats(self):
+        """Get pool and per-provider statistics."""
+        return {
+            'hedges': self.hedges,
+            'secondary_wins': self.secondary_wins,
+            'failovers': self.failovers,
+            'providers': {p.name: p.get_stats() for p in self.providers},
+        }
@@ -0,0 +1,128 @@
+"""Latency-aware routing of turns between a small and a large LLM."""
+
+import re
+import json
+import time
+import logging
+import threading
+from config import ROUTER_MAX_SMALL_WORDS, ROUTER_LOG_PATH
+
+ROUTE_SMALL = "small"
+ROUTE_LARGE = "large"
+
+# Requests that need tools (search, browsing, files) or multi-step reasoning
+COMPLEX_PATTERNS = [
+    (r"\b(news|latest|current|recent|update|breaking|headlines?)\b", "search"),
+    (r"\b(search|look up|google|find out|browse|website|url|link)\b", "search"),
+    (r"\b(file|folder|directory|read)\b", "files"),
+    (r"\b(did i (say|tell|mention|ask)|we (talked|spoke)|remember when|last time)\b", "history"),
+    (r"\b(explain|compare|difference|analy[sz]e|summari[sz]e|recommend|plan)\b", "reasoning"),
+    (r"\b(why|how does|how do|how can|how would)\b", "reasoning"),
+    (r"\b(write|code|program|script|essay|email|story|poem)\b", "generation"),
+]
+
+# COMPLEX_PATTERNS reasons whose requests are answered through tool calls
+TOOL_REASONS = {"search", "files", "history"}
+
+# Requests a small model answers just as well
+SIMPLE_PATTERNS = [
+    (r"\b(what time|what's the time|what day|what date|today's date)\b", "time"),
+    (r"^(hi|hey|hello|yo|thanks|thank you|bye|goodbye|good (morning|afternoon|evening|night))\b", "chit-chat"),
+    (r"\b(how are you|who are you|what's up|what is your name|what's your name)\b", "chit-chat"),
+]
+
+# Kind of answer a request needs, used to pick its output budget (first match wins)
+INTENT_PATTERNS = [
+    (r"\b(news|latest|current|recent|update|breaking|headlines?)\b", "news"),
+    (r"\b(what time|what's the time|what day|what date|today's date)\b", "time"),
+    (r"\b(did i (say|tell|mention|ask)|we (talked|spoke)|remember when|last time)\b", "history"),
+    (r"\b(write|code|program|script|essay|email|story|poem)\b", "generation"),
+    (r"^(hi|hey|hello|yo|thanks|thank you|bye|goodbye|good (morning|afternoon|evening|night))\b", "chit-chat"),
+    (r"\b(how are you|who are you|what's up|what is your name|what's your name)\b", "chit-chat"),
+]
+DEFAULT_INTENT = "answer"
+
+
+def classify_intent(text):
+    """Return the intent of a transcription (one of INTENT_PATTERNS' labels or DEFAULT_INTENT)."""
+    lowered = text.lower().strip()
+    for pattern, intent in INTENT_PATTERNS:
+        if re.search(pattern, lowered):
+            return intent
+    return DEFAULT_INTENT
+
+
+def needs_tools(text):
+    """Whether a transcription is likely answered through tool calls (search, files, history)."""
+    lowered = text.lower().strip()
+    return any(re.search(pattern, lowered) for pattern, reason in COMPLEX_PATTERNS if reason in TOOL_REASONS)
+
+
+class ModelRouter:
+    """Classifies turns with local heuristics and tracks per-route latency."""
+
+    def __init__(self, max_small_words=ROUTER_MAX_SMALL_WORDS, log_path=ROUTER_LOG_PATH):
+        """Initialize the router.
+
+        Args:
+            max_small_words: Longest request that may go to the small model
+            log_path: Optional JSONL file receiving every routing decision
+        """
+        self.max_small_words = max_small_words
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self._stats = {route: {'turns': 0, 'total_secs': 0.0, 'max_secs': 0.0}
+                       for route in (ROUTE_SMALL, ROUTE_LARGE)}
+
+    def classify(self, text):
+        """Return ``(route, reason)`` for a transcription."""
+        lowered = text.lower().strip()
+
+        for pattern, reason in COMPLEX_PATTERNS:
+            if re.search(pattern, lowered):
+                return ROUTE_LARGE, reason
+
+        for pattern, reason in SIMPLE_PATTERNS:
+            if re.search(pattern, lowered):
+                return ROUTE_SMALL, reason
+
+        words = len(lowered.split())
+        if words <= self.max_small_words:
+            return ROUTE_SMALL, f"short ({words} words)"
+        return ROUTE_LARGE, f"long ({words} words)"
+
+    def record(self, text, route, reason, latency):
+        """Log a routing decision together with the observed model latency."""
+        with self._lock:
+            stats = self._stats[route]
+            stats['turns'] += 1
+            stats['total_secs'] += latency
+            stats['max_secs'] = max(stats['max_secs'], latency)
+
+        logging.debug(f"Routed to {route} ({reason}) in {latency:.2f}s")
+        if self.log_path:
+            entry = {
+                'time': time.time(),
+                'route': route,
+                'reason': reason,
+                'words': len(text.split()),
+                'latency': round(latency, 3),
+                'text': text,
+            }
+            try:
+                with self._lock, open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry) + "\n")
+            except OSError as e:
+                logging.warning(f"Could not write routing log: {e}")
+
+    def get_stats(self):
+        """Get per-route turn counts and latencies."""
+        with self._lock:
+            return {
+                route: {
+                    'turns': stats['turns'],
+                    'avg_secs': stats['total_secs'] / max(stats['turns'], 1),
+                    'max_secs': stats['max_secs'],
+                }
+                for route, stats in self._stats.items()
+            }
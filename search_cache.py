@@ -0,0 +1,223 @@
+"""Persistent TTL cache and result deduplication for DuckDuckGo searches."""
+
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any
+from agno.tools import Toolkit
+from agno.tools.duckduckgo import DuckDuckGoTools
+from config import SEARCH_CACHE_PATH, SEARCH_CACHE_TTL, NEWS_CACHE_TTL
+
+# Words that do not change what a query is about
+STOPWORDS = {
+    'a', 'an', 'the', 'of', 'on', 'in', 'for', 'to', 'about', 'and', 'is', 'are',
+    'what', 'whats', "what's", 'me', 'tell', 'give', 'show', 'please', 'some',
+}
+
+
+def normalize_query(query):
+    """Reduce a query to its sorted, de-duplicated content words."""
+    words = re.findall(r"[a-z0-9']+", query.lower())
+    content = sorted({w for w in words if w not in STOPWORDS})
+    return " ".join(content or words)
+
+
+class SearchCache:
+    """SQLite store of search results with per-entry expiry."""
+
+    def __init__(self, db_path=SEARCH_CACHE_PATH):
+        """Open (and create if needed) the cache database."""
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS search_cache (
+                key TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                max_results INTEGER NOT NULL,
+                results TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        ''')
+        self.conn.commit()
+
+    def get(self, key):
+        """Return ``(results, max_results, expired)`` for a key, or None."""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT results, max_results, expires_at FROM search_cache WHERE key = ?',
+                (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        results, max_results, expires_at = row
+        return json.loads(results), max_results, expires_at < time.time()
+
+    def put(self, key, query, max_results, results, ttl):
+        """Store results for a key for ``ttl`` seconds."""
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?, ?, ?, ?)',
+                (key, query, max_results, json.dumps(results), now, now + ttl)
+            )
+            self.conn.commit()
+
+    def purge_expired(self):
+        """Delete expired entries, returning how many were removed."""
+        with self._lock:
+            cursor = self.conn.execute('DELETE FROM search_cache WHERE expires_at < ?', (time.time(),))
+            self.conn.commit()
+            return cursor.rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM search_cache').fetchone()[0]
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            if self.conn:
+                self.conn.close()
+                self.conn = None
+
+
+class CachedDuckDuckGoTools(Toolkit):
+    """Drop-in replacement for DuckDuckGoTools that caches and deduplicates results.
+
+    Queries are keyed by their normalized content words, so rephrasings of a
+    follow-up question hit the cache. Results already returned earlier in the
+    same agent run (e.g. a news search followed by a web search) are dropped
+    from later answers; every run (hedged duplicates, speculative or
+    cancelled turns, retries) keeps its own record, so it never hides results
+    from the run that is answered. When DuckDuckGo fails (e.g. rate limiting)
+    an expired entry is served rather than nothing.
+    """
+
+    MAX_TRACKED_RUNS = 16  # runs whose returned URLs are remembered
+
+    def __init__(self, cache=None, search_ttl=SEARCH_CACHE_TTL, news_ttl=NEWS_CACHE_TTL, **kwargs):
+        """Initialize the toolkit.
+
+        Args:
+            cache: SearchCache to use (defaults to one at SEARCH_CACHE_PATH)
+            search_ttl: Seconds web search results stay fresh
+            news_ttl: Seconds news results stay fresh
+        """
+        self.ddg = DuckDuckGoTools()
+        self.cache = cache if cache is not None else SearchCache()
+        self.ttls = {'search': search_ttl, 'news': news_ttl}
+        self._lock = threading.Lock()
+        self._seen_urls = OrderedDict()  # agent run id -> URLs returned in that run
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.deduplicated = 0
+
+        super().__init__(
+            name="duckduckgo",
+            tools=[self.duckduckgo_search, self.duckduckgo_news],
+            **kwargs
+        )
+
+    def __deepcopy__(self, memo):
+        # Agent copies (e.g. speculative runs) share the cache; deduplication is kept per run
+        return self
+
+    def duckduckgo_search(self, query: str, max_results: int = 5, agent: Any = None) -> str:
+        """Use this function to search DuckDuckGo for a query.
+
+        Args:
+            query(str): The query to search for.
+            max_results (optional, default=5): The maximum number of results to return.
+
+        Returns:
+            The result from DuckDuckGo.
+        """
+        return self._search('search', query, max_results, self.ddg.duckduckgo_search, agent)
+
+    def duckduckgo_news(self, query: str, max_results: int = 5, agent: Any = None) -> str:
+        """Use this function to get the latest news from DuckDuckGo.
+
+        Args:
+            query(str): The query to search for.
+            max_results (optional, default=5): The maximum number of results to return.
+
+        Returns:
+            The latest news from DuckDuckGo.
+        """
+        return self._search('news', query, max_results, self.ddg.duckduckgo_news, agent)
+
+    def _search(self, kind, query, max_results, fetch, agent=None):
+        """Serve a search from the cache or DuckDuckGo and deduplicate the results.
+
+        ``agent`` is the calling Agno agent (injected by Agno); its run id scopes the deduplication.
+        """
+        key = f"{kind}:{normalize_query(query)}"
+        cached = self.cache.get(key)
+
+        results = None
+        if cached is not None:
+            cached_results, cached_max, expired = cached
+            if not expired and cached_max >= max_results:
+                results = cached_results[:max_results]
+                with self._lock:
+                    self.hits += 1
+
+        if results is None:
+            try:
+                results = json.loads(fetch(query=query, max_results=max_results))
+                self.cache.put(key, query, max_results, results, self.ttls[kind])
+                with self._lock:
+                    self.misses += 1
+            except Exception as e:
+                if cached is None:
+                    raise
+                logging.debug(f"DuckDuckGo {kind} failed, serving stale cache: {e}")
+                results = cached[0][:max_results]
+                with self._lock:
+                    self.stale_hits += 1
+
+        return json.dumps(self._deduplicate(results, getattr(agent, 'run_id', None)), indent=2)
+
+    def _deduplicate(self, results, run_id=None):
+        """Drop results already returned earlier in the same run (nothing is dropped without a run id)."""
+        if run_id is None:
+            return results
+        fresh = []
+        with self._lock:
+            seen = self._seen_urls.setdefault(run_id, set())
+            self._seen_urls.move_to_end(run_id)
+            while len(self._seen_urls) > self.MAX_TRACKED_RUNS:
+                self._seen_urls.popitem(last=False)
+            for result in results:
+                url = result.get('href') or result.get('url') if isinstance(result, dict) else None
+                if url and url in seen:
+                    continue
+                if url:
+                    seen.add(url)
+                fresh.append(result)
+            if not fresh:
+                # Everything was shown before; repeating beats returning nothing
+                return results
+            self.deduplicated += len(results) - len(fresh)
+        return fresh
+
+    def get_stats(self):
+        """Get cache statistics."""
+        lookups = self.hits + self.misses + self.stale_hits
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale_hits': self.stale_hits,
+            'deduplicated': self.deduplicated,
+            'hit_rate': (self.hits + self.stale_hits) / max(lookups, 1),
+            'entries': len(self.cache),
+        }
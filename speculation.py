@@ -0,0 +1,153 @@
+"""Speculative agent invocation on provisional end-of-speech."""
+
+import re
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait as futures_wait
+
+
+def normalize_transcript(text):
+    """Reduce a transcript to lowercase words for comparison."""
+    return " ".join(re.findall(r"[a-z0-9']+", text.lower()))
+
+
+class _Speculation:
+    """A reply being generated for one provisional transcript."""
+
+    def __init__(self, key, future, cancel):
+        self.key = key
+        self.future = future
+        self.cancel = cancel  # stops the model call once the speculation is dropped
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+
+
+class SpeculativeResponder:
+    """Starts agent generation on a pause and reuses it if the turn ends there.
+
+    ``speculate`` is called with the provisional transcript of a pause and
+    starts ``LUMAAgent.generate_reply`` in the background. ``cancel`` discards
+    it (aborting its model call) when the user keeps talking. ``claim`` is called with the final
+    transcript and returns the speculative reply if the transcripts match.
+    """
+
+    CANCEL_POLL_SECS = 0.05  # how often a cancellable claim checks its cancel event
+
+    def __init__(self, agent, min_words=2):
+        """Initialize the responder.
+
+        Args:
+            agent: LUMAAgent used to generate replies
+            min_words: Shortest provisional transcript worth speculating on
+        """
+        self.agent = agent
+        self.min_words = min_words
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="speculation")
+        self._lock = threading.Lock()
+        self._current = None
+
+        # Statistics
+        self.attempts = 0
+        self.hits = 0
+        self.misses = 0
+        self.cancelled = 0
+        self.wasted_calls = 0
+        self.latency_saved = 0.0
+
+    def speculate(self, transcript):
+        """Start generating a reply for a provisional transcript."""
+        key = normalize_transcript(transcript)
+        if len(key.split()) < self.min_words:
+            return
+        with self._lock:
+            if self._current is not None and self._current.key == key:
+                return
+            self._discard_locked()
+            cancel = threading.Event()
+            future = self._executor.submit(self._generate, transcript, cancel)
+            self._current = spec = _Speculation(key, future, cancel)
+            self.attempts += 1
+        future.add_done_callback(lambda _: setattr(spec, 'finished_at', time.perf_counter()))
+        logging.debug(f"Speculating on: {transcript!r}")
+
+    def _generate(self, transcript, cancel):
+        """Generate a reply off the audio thread."""
+        return self.agent.generate_reply(transcript, cancel=cancel)
+
+    def cancel(self):
+        """Discard the current speculation, the user kept talking."""
+        with self._lock:
+            if self._current is not None:
+                self.cancelled += 1
+            self._discard_locked()
+
+    def _discard_locked(self):
+        """Drop the current speculation and account for the wasted call."""
+        spec, self._current = self._current, None
+        if spec is not None and not spec.future.cancel():
+            # Already running: the LLM call is stopped, but what it used so far is paid for
+            spec.cancel.set()
+            self.wasted_calls += 1
+
+    def claim(self, transcript, timeout=None, cancel=None):
+        """Return the speculative reply for the final transcript, or None.
+
+        Args:
+            transcript: Final transcript of the turn
+            timeout: Longest time to wait for a speculation still in progress
+            cancel: Optional threading.Event; setting it stops the wait and the speculation
+        """
+        key = normalize_transcript(transcript)
+        with self._lock:
+            spec = self._current
+            if spec is None:
+                return None
+            if spec.key != key:
+                self.misses += 1
+                self._discard_locked()
+                return None
+            self._current = None
+
+        claimed_at = time.perf_counter()
+        if cancel is not None:
+            # Hand the turn's cancel event over to the speculation's model call
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not spec.future.done() and not cancel.is_set():
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                futures_wait([spec.future], timeout=self.CANCEL_POLL_SECS)
+            if cancel.is_set():
+                spec.cancel.set()
+                return None
+            timeout = 0.0
+        try:
+            reply = spec.future.result(timeout=timeout)
+        except Exception as e:
+            logging.debug(f"Speculative reply unusable: {e}")
+            self.misses += 1
+            return None
+
+        # Without speculation the reply would have taken the full generation time from now
+        duration = (spec.finished_at or time.perf_counter()) - spec.started_at
+        self.hits += 1
+        self.latency_saved += min(duration, claimed_at - spec.started_at)
+        return reply
+
+    def get_stats(self):
+        """Get speculation statistics."""
+        return {
+            'attempts': self.attempts,
+            'hits': self.hits,
+            'misses': self.misses,
+            'cancelled': self.cancelled,
+            'wasted_calls': self.wasted_calls,
+            'hit_rate': self.hits / max(self.attempts, 1),
+            'latency_saved_secs': self.latency_saved,
+            'avg_latency_saved_secs': self.latency_saved / max(self.hits, 1),
+        }
+
+    def cleanup(self):
+        """Stop the background workers."""
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -5,9 +5,7 @@ from datetime import datetime
 from rich.console import Console
 from rich.panel import Panel
 from rich.text import Text
-from rich.live import Live
 from rich.table import Table
-from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich import box
 from rich.layout import Layout
 from rich.align import Align
@@ -31,8 +29,6 @@ class TerminalStyle:
         self.console = Console()
         self.last_status = None
         self.last_status_time = 0
-        self.typing_indicator = None
-        self.live = None
 
     def print_header(self):
         """Print the chatbot header with ASCII art."""
@@ -104,6 +100,26 @@ class TerminalStyle:
         
         console.print(table)
 
+    def print_history_stats(self, stats):
+        """Print chat history storage statistics."""
+        table = Table(
+            title="Chat History",
+            box=box.SIMPLE,
+            show_header=True,
+            header_style="bold blue"
+        )
+        
+        table.add_column("Metric", style="cyan")
+        table.add_column("Value", style="green", justify="right")
+        
+        table.add_row("File Size", f"{stats['file_bytes'] / 1e6:.1f} MB")
+        table.add_row("Reclaimable", f"{stats['free_bytes'] / 1e6:.1f} MB")
+        table.add_row("Recent Messages", str(stats['hot_messages']))
+        table.add_row("Archived Messages", f"{stats['archived_messages']} ({stats['archived_days']} days)")
+        table.add_row("Archive Size", f"{stats['archive_bytes'] / 1e6:.1f} MB")
+        
+        console.print(table)
+
     def print_help(self):
         """Print help menu."""
         help_text = Text()
@@ -115,27 +131,14 @@ class TerminalStyle:
         help_text.append("/stats", style="bold yellow")
         help_text.append(" - Show session statistics\n")
         help_text.append("• ", style="bold green")
+        help_text.append("/profile [N]", style="bold yellow")
+        help_text.append(" - Write flamegraph profiles of the next N turns\n")
+        help_text.append("• ", style="bold green")
         help_text.append("/exit", style="bold yellow")
         help_text.append(" - Exit the program")
         
         console.print(Panel(help_text, title="Help Menu", border_style="cyan"))
 
-    def start_typing_indicator(self):
-        """Start the typing indicator animation."""
-        if self.live is None:
-            self.live = Live(
-                SpinnerColumn() + TextColumn("[blue]AI is thinking...[/blue]"),
-                console=self.console,
-                refresh_per_second=10
-            )
-            self.live.start()
-
-    def stop_typing_indicator(self):
-        """Stop the typing indicator animation."""
-        if self.live is not None:
-            self.live.stop()
-            self.live = None
-
     def clear_screen(self):
         """Clear the terminal screen."""
         self.console.clear()
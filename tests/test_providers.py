@@ -0,0 +1,216 @@
+"""ProviderPool hedging, failover and circuit breaking against local mock endpoints."""
+
+import time
+import asyncio
+import threading
+
+import pytest
+from agno.agent import Agent
+from agno.models.groq import Groq
+
+from benchmarks.mock_llm_server import MockLLMServer
+from providers import CircuitBreaker, Provider, ProviderPool, ProviderUnavailableError, RunCancelledError
+from router import ROUTE_LARGE
+
+
+@pytest.fixture
+def servers():
+    """Start mock endpoints by keyword (e.g. ``servers(first_token_ms=3000)``) and stop them afterwards."""
+    started = []
+
+    def start(**kwargs):
+        server = MockLLMServer(token_ms=1, **kwargs).start()
+        started.append(server)
+        return server
+
+    yield start
+    for server in started:
+        server.stop()
+
+
+def make_provider(name, server, breaker=None, hedge_delay=None):
+    """Provider answering from a mock endpoint (no SDK retries, so failures surface at once)."""
+    model = Groq(id="mock", api_key="mock", base_url=server.base_url, max_retries=0)
+    provider = Provider(name, {ROUTE_LARGE: Agent(model=model)}, breaker=breaker)
+    if hedge_delay is not None:
+        # Enough first-token samples for the p95 to replace HEDGE_DEFAULT_DELAY
+        provider.first_token_secs.extend([hedge_delay] * 10)
+    return provider
+
+
+def test_hedge_wins_over_slow_primary(servers):
+    slow = make_provider("slow", servers(first_token_ms=5000), hedge_delay=0.5)
+    fast = make_provider("fast", servers(first_token_ms=20))
+    pool = ProviderPool([slow, fast])
+
+    started = time.monotonic()
+    response, name = pool.run("hello", ROUTE_LARGE)
+
+    assert name == "fast"
+    assert response.content
+    assert time.monotonic() - started < 3.0
+    assert pool.hedges == 1
+    assert pool.secondary_wins == 1
+    assert slow.get_stats()['requests'] == 1
+    assert fast.get_stats()['successes'] == 1
+
+
+def test_no_hedge_when_disabled(servers):
+    slow = make_provider("slow", servers(first_token_ms=800), hedge_delay=0.5)
+    fast = make_provider("fast", servers(first_token_ms=20))
+    pool = ProviderPool([slow, fast], hedging=False)
+
+    _, name = pool.run("hello", ROUTE_LARGE)
+
+    assert name == "slow"
+    assert pool.hedges == 0
+    assert fast.get_stats()['requests'] == 0
+
+
+def test_failover_on_error(servers):
+    failing_server = servers(first_token_ms=20, fail_status=500)
+    failing = make_provider("failing", failing_server)
+    backup = make_provider("backup", servers(first_token_ms=20))
+    pool = ProviderPool([failing, backup])
+
+    response, name = pool.run("hello", ROUTE_LARGE)
+
+    assert name == "backup"
+    assert response.content
+    assert pool.failovers == 1
+    assert pool.hedges == 0
+    assert failing.get_stats()['failures'] == 1
+    assert failing_server.get_stats()['requests'] == 1
+
+
+def test_failover_restarts_the_hedge_timer(servers):
+    # The primary's hedge delay is long; after it fails, the slow secondary is hedged on its own delay
+    failing = make_provider("failing", servers(first_token_ms=20, fail_status=503), hedge_delay=6.0)
+    slow = make_provider("slow", servers(first_token_ms=5000), hedge_delay=0.5)
+    fast = make_provider("fast", servers(first_token_ms=20))
+    pool = ProviderPool([failing, slow, fast])
+
+    started = time.monotonic()
+    _, name = pool.run("hello", ROUTE_LARGE)
+
+    assert name == "fast"
+    assert time.monotonic() - started < 3.0
+    assert pool.failovers == 1
+    assert pool.hedges == 1
+
+
+def test_all_providers_failing_raises(servers):
+    first = make_provider("first", servers(first_token_ms=10, fail_status=500))
+    second = make_provider("second", servers(first_token_ms=10, fail_status=500))
+    pool = ProviderPool([first, second])
+
+    with pytest.raises(ProviderUnavailableError):
+        pool.run("hello", ROUTE_LARGE)
+    assert first.get_stats()['failures'] == 1
+    assert second.get_stats()['failures'] == 1
+
+
+def test_cancel_aborts_run(servers):
+    slow = make_provider("slow", servers(first_token_ms=5000))
+    pool = ProviderPool([slow], hedging=False)
+    cancel = threading.Event()
+    threading.Timer(0.3, cancel.set).start()
+
+    started = time.monotonic()
+    with pytest.raises(RunCancelledError):
+        pool.run("hello", ROUTE_LARGE, cancel=cancel)
+
+    assert time.monotonic() - started < 1.0
+    assert slow.get_stats()['failures'] == 0
+
+
+def test_open_breaker_skips_provider_until_reset(servers):
+    failing_server = servers(first_token_ms=10, fail_status=500)
+    failing = make_provider("failing", failing_server, breaker=CircuitBreaker(failure_threshold=1, reset_secs=0.5))
+    backup = make_provider("backup", servers(first_token_ms=10))
+    pool = ProviderPool([failing, backup])
+
+    pool.run("hello", ROUTE_LARGE)
+    assert failing.breaker.state == CircuitBreaker.OPEN
+
+    # While open, turns go straight to the backup
+    _, name = pool.run("hello", ROUTE_LARGE)
+    assert name == "backup"
+    assert failing_server.get_stats()['requests'] == 1
+
+    # After the reset window one trial request goes through; its failure reopens the circuit
+    time.sleep(0.6)
+    _, name = pool.run("hello", ROUTE_LARGE)
+    assert name == "backup"
+    assert failing_server.get_stats()['requests'] == 2
+    assert failing.breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_success_closes_breaker(servers):
+    breaker = CircuitBreaker(failure_threshold=2, reset_secs=0.2)
+    provider = make_provider("primary", servers(first_token_ms=10), breaker=breaker)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.3)
+    _, name = ProviderPool([provider]).run("hello", ROUTE_LARGE)
+
+    assert name == "primary"
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+def test_unlaunched_secondary_keeps_its_trial(servers):
+    # The secondary's circuit is past its reset, but the healthy primary answers alone
+    breaker = CircuitBreaker(failure_threshold=1, reset_secs=0.2)
+    primary = make_provider("primary", servers(first_token_ms=10))
+    secondary_server = servers(first_token_ms=10)
+    secondary = make_provider("secondary", secondary_server, breaker=breaker)
+    breaker.record_failure()
+    time.sleep(0.3)
+
+    pool = ProviderPool([primary, secondary])
+    _, name = pool.run("hello", ROUTE_LARGE)
+    assert name == "primary"
+    assert secondary_server.get_stats()['requests'] == 0
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.available()
+
+    # Still eligible: a failover to it is its half-open trial, which closes the circuit
+    primary.breaker.record_failure()
+    primary.breaker.record_failure()
+    primary.breaker.record_failure()
+    _, name = pool.run("hello", ROUTE_LARGE)
+    assert name == "secondary"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_counts_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_secs=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_async_hedge_and_failover(servers):
+    failing = make_provider("failing", servers(first_token_ms=20, fail_status=500), hedge_delay=6.0)
+    slow = make_provider("slow", servers(first_token_ms=5000), hedge_delay=0.5)
+    fast = make_provider("fast", servers(first_token_ms=20))
+    pool = ProviderPool([failing, slow, fast])
+
+    started = time.monotonic()
+    response, name = asyncio.run(pool.arun("hello", ROUTE_LARGE))
+
+    assert name == "fast"
+    assert response.content
+    assert time.monotonic() - started < 3.0
+    assert pool.failovers == 1
+    assert pool.hedges == 1
+    assert failing.get_stats()['failures'] == 1
@@ -1,27 +1,112 @@
 """Tool definitions for LUMA using Agno Toolkit."""
 
 import os
+import asyncio
+import functools
+import threading
+import contextvars
+from typing import List
+import aiohttp
 import requests
 from bs4 import BeautifulSoup
-from datetime import datetime
+from datetime import datetime, timedelta
 from agno.tools import Toolkit
+from config import (
+    BROWSE_TIMEOUT,
+    BROWSE_MAX_CHARS,
+    BROWSE_URLS_DEADLINE,
+    BROWSE_PER_HOST_LIMIT,
+    READ_FILE_MAX_CHARS,
+    PASSAGE_RANKING
+)
+from passages import PassageRanker
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+
+# Request of the turn being answered; a context variable so overlapping turns do not mix
+_turn_query = contextvars.ContextVar("turn_query", default="")
+
+
+def _run_sync(coro):
+    """Run a coroutine to completion from synchronous code.
+
+    Uses a private thread when the caller is already inside an event loop.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    result = {}
+    context = contextvars.copy_context()
+    def runner():
+        try:
+            result['value'] = context.run(asyncio.run, coro)
+        except BaseException as e:
+            result['error'] = e
+    thread = threading.Thread(target=runner, daemon=True)
+    thread.start()
+    thread.join()
+    if 'error' in result:
+        raise result['error']
+    return result['value']
 
 
 class LUMATools(Toolkit):
     """LUMA's agentic tool collection using Agno Toolkit."""
     
-    def __init__(self, **kwargs):
+    def __init__(self, db=None, async_tools=False, **kwargs):
+        """Initialize the toolkit.
+        
+        Args:
+            db: MessageDatabase searched by search_history (the tool is omitted without one)
+            async_tools: Register the coroutine variants (for agents only run with Agno's arun)
+        """
+        self.db = db
+        self.ranker = PassageRanker() if PASSAGE_RANKING else None
+        tools = [
+            self.browse_url,
+            self.browse_urls,
+            self.read_file,
+            self.list_directory,
+            self.get_current_time
+        ]
+        if db is not None:
+            tools.append(self.search_history)
+        if async_tools:
+            # Under arun, sync tools run in worker threads that a cancelled turn cannot stop
+            tools = [self._async_tool(tool, getattr(self, f"a{tool.__name__}")) for tool in tools]
         super().__init__(
             name="luma_tools",
-            tools=[
-                self.browse_url,
-                self.read_file,
-                self.list_directory,
-                self.get_current_time
-            ],
+            tools=tools,
             **kwargs
         )
     
+    def __deepcopy__(self, memo):
+        # Agent copies share the database connection
+        return self
+    
+    @staticmethod
+    def _async_tool(tool, coroutine_function):
+        """Expose a coroutine variant under the name, docstring and parameters of its sync tool."""
+        @functools.wraps(tool)
+        async def async_tool(**kwargs):
+            return await coroutine_function(**kwargs)
+        return async_tool
+    
+    @staticmethod
+    def set_query(query: str):
+        """Set the request that long tool outputs are ranked against (for the current context)."""
+        _turn_query.set(query)
+    
+    def _select(self, text: str, limit: int) -> str:
+        """Keep the passages most relevant to the turn's request, or the first ``limit`` characters."""
+        if self.ranker is None:
+            return self._truncate(text, limit)
+        return self.ranker.select(text, _turn_query.get(), limit)
+    
     def browse_url(self, url: str) -> str:
         """Browse and extract content from a specific URL.
         
@@ -32,27 +117,94 @@ class LUMATools(Toolkit):
             str: Extracted text content from the URL
         """
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }
-            response = requests.get(url, headers=headers, timeout=10)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
+            response = requests.get(url, headers=HEADERS, timeout=BROWSE_TIMEOUT)
+            return self._select(self._extract_text(response.text), BROWSE_MAX_CHARS)
+        except Exception as e:
+            return f"Error browsing URL: {str(e)}"
+    
+    def browse_urls(self, urls: List[str]) -> str:
+        """Browse several URLs at once and extract their content concurrently.
+        
+        Prefer this over calling browse_url repeatedly when reading multiple search results.
+        Pages that do not load in time are skipped.
+        
+        Args:
+            urls (List[str]): The URLs to browse
             
-            # Get text
-            text = soup.get_text()
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
+        Returns:
+            str: Extracted text content of each page that finished in time
+        """
+        try:
+            return _run_sync(self.abrowse_urls(urls))
+        except Exception as e:
+            return f"Error browsing URLs: {str(e)}"
+    
+    async def abrowse_url(self, url: str, session: aiohttp.ClientSession = None) -> str:
+        """Async variant of browse_url."""
+        try:
+            if session is None:
+                timeout = aiohttp.ClientTimeout(total=BROWSE_TIMEOUT)
+                async with aiohttp.ClientSession(headers=HEADERS, timeout=timeout) as own_session:
+                    return await self.abrowse_url(url, own_session)
             
-            # Limit to first 1000 characters
-            return text[:1000] + "..." if len(text) > 1000 else text
+            async with session.get(url) as response:
+                html = await response.text(errors='replace')
+            # Parsing and ranking are CPU-bound, keep them off the event loop
+            text = await asyncio.to_thread(self._extract_text, html)
+            return await asyncio.to_thread(self._select, text, BROWSE_MAX_CHARS)
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             return f"Error browsing URL: {str(e)}"
     
+    async def abrowse_urls(self, urls: List[str], deadline: float = BROWSE_URLS_DEADLINE) -> str:
+        """Async variant of browse_urls.
+        
+        Fetches all pages concurrently with at most BROWSE_PER_HOST_LIMIT
+        connections per host and returns whatever finished within the deadline.
+        """
+        urls = list(dict.fromkeys(u for u in urls if u))  # drop duplicates, keep order
+        if not urls:
+            return "No URLs given"
+        
+        connector = aiohttp.TCPConnector(limit_per_host=BROWSE_PER_HOST_LIMIT)
+        timeout = aiohttp.ClientTimeout(total=BROWSE_TIMEOUT)
+        async with aiohttp.ClientSession(headers=HEADERS, timeout=timeout, connector=connector) as session:
+            tasks = {asyncio.ensure_future(self.abrowse_url(url, session)): url for url in urls}
+            done, pending = await asyncio.wait(tasks, timeout=deadline)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        
+        sections = []
+        for task, url in tasks.items():
+            if task in done and not task.cancelled():
+                sections.append(f"[{url}]\n{task.result()}")
+            else:
+                sections.append(f"[{url}]\nSkipped: did not load within {deadline:.0f}s")
+        return "\n\n".join(sections)
+    
+    @staticmethod
+    def _extract_text(html: str) -> str:
+        """Extract readable text from an HTML document."""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Remove script and style elements
+        for script in soup(["script", "style"]):
+            script.decompose()
+        
+        # Get text
+        text = soup.get_text()
+        lines = (line.strip() for line in text.splitlines())
+        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+        return ' '.join(chunk for chunk in chunks if chunk)
+    
+    @staticmethod
+    def _truncate(text: str, limit: int) -> str:
+        """Limit text to the first ``limit`` characters."""
+        return text[:limit] + "..." if len(text) > limit else text
+    
     def read_file(self, filepath: str) -> str:
         """Read contents of a file from the local system.
         
@@ -65,11 +217,15 @@ class LUMATools(Toolkit):
         try:
             with open(filepath, 'r', encoding='utf-8') as f:
                 content = f.read()
-            # Limit to first 2000 characters
-            return content[:2000] + "..." if len(content) > 2000 else content
+            # Limit to the most relevant READ_FILE_MAX_CHARS characters
+            return self._select(content, READ_FILE_MAX_CHARS)
         except Exception as e:
             return f"Error reading file: {str(e)}"
     
+    async def aread_file(self, filepath: str) -> str:
+        """Async variant of read_file."""
+        return await asyncio.to_thread(self.read_file, filepath)
+    
     def list_directory(self, path: str = ".") -> str:
         """List files and folders in a directory.
         
@@ -96,6 +252,10 @@ class LUMATools(Toolkit):
         except Exception as e:
             return f"Error listing directory: {str(e)}"
     
+    async def alist_directory(self, path: str = ".") -> str:
+        """Async variant of list_directory."""
+        return await asyncio.to_thread(self.list_directory, path)
+    
     def get_current_time(self) -> str:
         """Get the current date and time.
         
@@ -103,3 +263,39 @@ class LUMATools(Toolkit):
             str: Current date and time
         """
         return datetime.now().strftime("%A, %B %d, %Y at %I:%M %p")
+    
+    async def aget_current_time(self) -> str:
+        """Async variant of get_current_time."""
+        return self.get_current_time()
+    
+    def search_history(self, query: str, start_date: str = "", end_date: str = "", limit: int = 5) -> str:
+        """Search past conversations with the user, e.g. "what did I say about X last week?".
+        
+        Older conversations are archived: they only match the exact words of the query.
+        
+        Args:
+            query (str): Words to look for in past messages
+            start_date (str): Only messages on or after this date (YYYY-MM-DD), empty for no limit
+            end_date (str): Only messages on or before this date (YYYY-MM-DD), empty for no limit
+            limit (int): Maximum number of messages to return
+            
+        Returns:
+            str: Matching messages with their date and speaker, best matches first
+        """
+        try:
+            until = None
+            if end_date:
+                until = (datetime.fromisoformat(end_date) + timedelta(days=1)).date().isoformat()
+            results = self.db.search_messages(query, limit=limit, since=start_date or None, until=until)
+            if not results:
+                return "No matching messages found"
+            return "\n".join(
+                f"[{r['timestamp'][:16].replace('T', ' ')}] {r['role']}: {r['snippet']}"
+                for r in results
+            )
+        except Exception as e:
+            return f"Error searching history: {str(e)}"
+    
+    async def asearch_history(self, query: str, start_date: str = "", end_date: str = "", limit: int = 5) -> str:
+        """Async variant of search_history."""
+        return await asyncio.to_thread(self.search_history, query, start_date, end_date, limit)
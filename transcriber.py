@@ -6,6 +6,7 @@ import torch
 import warnings
 from moonshine_onnx import MoonshineOnnxModel, load_tokenizer
 from config import DEFAULT_MODEL
+from ui_events import ui
 import logging
 
 # Suppress warnings
@@ -28,7 +29,7 @@ class Transcriber:
         
         # Warmup model silently
         self.__call__(np.zeros(int(rate), dtype=np.float32))
-        print("✅ Transcription engine ready")
+        ui.success("Transcription engine ready")
 
     def __call__(self, speech):
         """Transcribe speech to text."""
@@ -1,82 +1,418 @@
-"""Text-to-Speech handler using edge-tts with pygame for playback."""
+"""Text-to-Speech handler with pluggable synthesis backends and pygame playback."""
 
+import io
+import os
+import re
+import abc
+import time
+import shutil
 import asyncio
+import logging
 import tempfile
-import os
-import edge_tts
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import pygame
-import logging
+from config import (
+    TTS_SPEED,
+    TTS_VOICE,
+    TTS_BACKEND,
+    TTS_FALLBACKS,
+    TTS_TIMEOUT,
+    TTS_RETRY_SECS,
+    EDGE_TTS_VOICE
+)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sentences(text, min_chars=40):
+    """Split text into sentences, merging ones shorter than ``min_chars`` into the next."""
+    sentences = []
+    for sentence in _SENTENCE_END.split(text.strip()):
+        if sentences and len(sentences[-1]) < min_chars:
+            sentences[-1] = f"{sentences[-1]} {sentence}"
+        else:
+            sentences.append(sentence)
+    return sentences
+
+
+class TTSBackend(abc.ABC):
+    """Turns text into an encoded audio clip.
+
+    Backends yield the clip in chunks as the engine produces it, so callers
+    can measure (or start buffering at) the first audio. ``audio_format`` is
+    the pygame name hint of the encoding ("mp3" or "wav").
+    """
+
+    name = None
+    audio_format = None
+
+    @classmethod
+    def available(cls):
+        """Whether the engine is installed on this machine."""
+        return True
+
+    @abc.abstractmethod
+    def stream(self, text):
+        """Yield encoded audio chunks for a text."""
+
+    def synthesize(self, text):
+        """Return the complete encoded clip for a text."""
+        return b"".join(self.stream(text))
+
+    async def astream(self, text):
+        """Async variant of stream; blocking engines run in a worker thread."""
+        chunks = self.stream(text)
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+
+
+class EdgeTTSBackend(TTSBackend):
+    """Microsoft Edge online voices (best quality, needs the network)."""
+
+    name = "edge"
+    audio_format = "mp3"
+
+    def __init__(self, voice=EDGE_TTS_VOICE):
+        self.voice = voice
+
+    @classmethod
+    def available(cls):
+        try:
+            import edge_tts  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def stream(self, text):
+        import edge_tts
+
+        communicate = edge_tts.Communicate(text, self.voice)
+        loop = asyncio.new_event_loop()
+        chunks = communicate.stream().__aiter__()
+        try:
+            while True:
+                try:
+                    chunk = loop.run_until_complete(chunks.__anext__())
+                except StopAsyncIteration:
+                    break
+                if chunk["type"] == "audio":
+                    yield chunk["data"]
+        finally:
+            loop.run_until_complete(chunks.aclose())
+            loop.close()
+
+    async def astream(self, text):
+        # Native async: streams on the caller's loop instead of a private one
+        import edge_tts
+
+        communicate = edge_tts.Communicate(text, self.voice)
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                yield chunk["data"]
+
+
+class EspeakBackend(TTSBackend):
+    """Offline eSpeak NG synthesizer, WAV read from its stdout as it is produced."""
+
+    name = "espeak"
+    audio_format = "wav"
+
+    def __init__(self, voice=TTS_VOICE, speed=TTS_SPEED):
+        self.voice = voice
+        self.words_per_minute = int(175 * speed)
+
+    @staticmethod
+    def _binary():
+        return shutil.which("espeak-ng") or shutil.which("espeak")
+
+    @classmethod
+    def available(cls):
+        return cls._binary() is not None
+
+    def stream(self, text):
+        # The text goes through stdin so it is never parsed as options
+        process = subprocess.Popen(
+            [self._binary(), "--stdout", "-v", self.voice, "-s", str(self.words_per_minute)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        process.stdin.write(text.encode("utf-8"))
+        process.stdin.close()
+        try:
+            while True:
+                chunk = process.stdout.read1(16384)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            process.stdout.close()
+            if process.wait() != 0:
+                raise RuntimeError(f"espeak exited with code {process.returncode}")
+
+
+class Pyttsx3Backend(TTSBackend):
+    """Offline system voices through pyttsx3 (SAPI5, NSSpeechSynthesizer or eSpeak)."""
+
+    name = "pyttsx3"
+    audio_format = "wav"
+
+    def __init__(self, speed=TTS_SPEED):
+        self.speed = speed
+        self._engine = None
+        self._lock = threading.Lock()  # the engine is not thread-safe
+
+    @classmethod
+    def available(cls):
+        try:
+            import pyttsx3  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def stream(self, text):
+        import pyttsx3
+
+        with self._lock:
+            if self._engine is None:
+                self._engine = pyttsx3.init()
+                self._engine.setProperty("rate", int(self._engine.getProperty("rate") * self.speed))
+            fd, path = tempfile.mkstemp(suffix=".wav")
+            os.close(fd)
+            try:
+                # pyttsx3 can only render to a file, in one go
+                self._engine.save_to_file(text, path)
+                self._engine.runAndWait()
+                with open(path, "rb") as f:
+                    data = f.read()
+            finally:
+                os.unlink(path)
+        yield data
+
+
+BACKENDS = {backend.name: backend for backend in (EdgeTTSBackend, EspeakBackend, Pyttsx3Backend)}
+
+
+def create_backends(names):
+    """Instantiate the installed backends among ``names``, keeping their order."""
+    backends = []
+    for name in dict.fromkeys(names):
+        backend_class = BACKENDS.get(name)
+        if backend_class is None:
+            logging.warning(f"Unknown TTS backend: {name}")
+        elif backend_class.available():
+            backends.append(backend_class())
+        else:
+            logging.debug(f"TTS backend {name} is not installed")
+    return backends
 
 
 class TTSHandler:
-    """Handles text-to-speech using Microsoft Edge TTS (lightweight, no API key needed)."""
-    
-    def __init__(self):
-        """Initialize TTS handler."""
+    """Speaks text with the configured backend, falling back to the next one on failures."""
+
+    def __init__(self, backend=TTS_BACKEND, fallbacks=TTS_FALLBACKS, timeout=TTS_TIMEOUT):
+        """Initialize TTS handler.
+
+        Args:
+            backend: Preferred backend name ("edge", "espeak" or "pyttsx3")
+            fallbacks: Backends tried in order when the preferred one fails or times out
+            timeout: Longest time a backend may take to synthesize a clip
+        """
         self.is_speaking = False
-        self.voice = "en-US-AriaNeural"  # Natural female voice
-        
+        self.timeout = timeout
+        self.backends = create_backends([backend, *fallbacks])
+        if not self.backends:
+            logging.warning("No TTS backend available")
+        # One worker per backend: a hung engine only blocks its own later calls, never the fallbacks
+        self._executors = {
+            b.name: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"tts-{b.name}") for b in self.backends
+        }
+        self._failed_at = {}  # backend name -> time of its last failure
+
+        # Statistics
+        self.spoken = {}
+        self.fallbacks = 0
+
         # Initialize pygame mixer for audio playback (suppress pygame logs)
         os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "1"
         try:
             pygame.mixer.init()
-            logging.debug("TTS engine ready")
+            logging.debug(f"TTS engine ready ({', '.join(b.name for b in self.backends)})")
         except Exception as e:
             logging.warning(f"TTS initialization error: {e}")
-    
+
     def speak(self, text: str):
-        """Convert text to speech using edge-tts."""
+        """Synthesize text and play it, blocking until playback ends."""
         if not text or not text.strip():
             return
-        
+
         try:
             self.is_speaking = True
-            
-            # Generate speech using edge-tts
-            asyncio.run(self._async_speak(text))
-            
-            self.is_speaking = False
+            clip = self.synthesize(text)
+            if clip is not None:
+                self._play(*clip)
         except Exception as e:
-            self.is_speaking = False
             logging.warning(f"TTS Error: {e}")
-    
-    async def _async_speak(self, text: str):
-        """Async method to generate and play speech."""
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as tmp_file:
-            tmp_path = tmp_file.name
-        
+        finally:
+            self.is_speaking = False
+
+    async def aspeak(self, text: str):
+        """Async variant of speak: synthesis and playback wait on the event loop.
+
+        The text is spoken sentence by sentence, each one synthesized while
+        the previous one plays, so the first audio only waits for the first
+        sentence. Cancelling the calling task stops playback.
+        """
+        if not text or not text.strip():
+            return
+
+        sentences = split_sentences(text)
+        upcoming = None
         try:
-            # Generate speech with edge-tts
-            communicate = edge_tts.Communicate(text, self.voice)
-            await communicate.save(tmp_path)
-            
-            # Play with pygame
+            self.is_speaking = True
+            upcoming = asyncio.ensure_future(self.asynthesize(sentences[0]))
+            for index in range(len(sentences)):
+                clip = await upcoming
+                upcoming = None
+                if index + 1 < len(sentences):
+                    upcoming = asyncio.ensure_future(self.asynthesize(sentences[index + 1]))
+                if clip is not None:
+                    await self._aplay(*clip)
+        except Exception as e:
+            logging.warning(f"TTS Error: {e}")
+        finally:
+            if upcoming is not None:
+                upcoming.cancel()
+            self.is_speaking = False
+
+    def _ordered_backends(self):
+        """Backends in preference order, recently failed ones last.
+
+        An outage then costs one timeout, not one per reply.
+        """
+        now = time.monotonic()
+        healthy = [b for b in self.backends
+                   if b.name not in self._failed_at or now - self._failed_at[b.name] >= TTS_RETRY_SECS]
+        return healthy + [b for b in self.backends if b not in healthy]
+
+    def _record_success(self, backend, index):
+        self._failed_at.pop(backend.name, None)
+        self.spoken[backend.name] = self.spoken.get(backend.name, 0) + 1
+        if index > 0:
+            self.fallbacks += 1
+
+    @staticmethod
+    def _complete(backend, text):
+        """Synthesize a whole clip, failing on an empty one."""
+        audio = backend.synthesize(text)
+        if not audio:
+            raise RuntimeError("no audio produced")
+        return audio
+
+    def synthesize(self, text: str):
+        """Return ``(audio, format)`` from the first backend that synthesizes the text in time, or None.
+
+        The timeout covers the whole clip. A backend that misses it keeps its
+        worker until the engine returns, but the fallbacks run on their own.
+        """
+        for index, backend in enumerate(self._ordered_backends()):
+            future = self._executors[backend.name].submit(self._complete, backend, text)
             try:
-                pygame.mixer.music.load(tmp_path)
-                pygame.mixer.music.play()
+                audio = future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                logging.warning(f"TTS backend {backend.name} did not finish within {self.timeout}s")
+                self._failed_at[backend.name] = time.monotonic()
+                future.cancel()  # still queued behind an earlier hung call
+                continue
             except Exception as e:
-                logging.warning(f"Failed to play TTS audio: {e}")
-                return
-            
-            # Wait for playback to finish
+                logging.warning(f"TTS backend {backend.name} failed: {e}")
+                self._failed_at[backend.name] = time.monotonic()
+                continue
+
+            self._record_success(backend, index)
+            return audio, backend.audio_format
+        return None
+
+    async def _acomplete(self, backend, text):
+        """Async variant of _complete; blocking engines run on the backend's own worker."""
+        if type(backend).astream is TTSBackend.astream:
+            future = self._executors[backend.name].submit(self._complete, backend, text)
+            return await asyncio.wrap_future(future)
+        audio = b"".join([chunk async for chunk in backend.astream(text)])
+        if not audio:
+            raise RuntimeError("no audio produced")
+        return audio
+
+    async def asynthesize(self, text: str):
+        """Async variant of synthesize."""
+        for index, backend in enumerate(self._ordered_backends()):
+            try:
+                audio = await asyncio.wait_for(self._acomplete(backend, text), self.timeout)
+            except asyncio.TimeoutError:
+                logging.warning(f"TTS backend {backend.name} did not finish within {self.timeout}s")
+                self._failed_at[backend.name] = time.monotonic()
+                continue
+            except Exception as e:
+                logging.warning(f"TTS backend {backend.name} failed: {e}")
+                self._failed_at[backend.name] = time.monotonic()
+                continue
+
+            self._record_success(backend, index)
+            return audio, backend.audio_format
+        return None
+
+    def _play(self, audio, audio_format):
+        """Play an encoded clip from memory and wait for it to finish."""
+        if not self._start_playback(audio, audio_format):
+            return
+
+        # Wait for playback to finish
+        while pygame.mixer.music.get_busy():
+            time.sleep(0.1)
+        self._unload()
+
+    async def _aplay(self, audio, audio_format):
+        """Async variant of _play."""
+        if not self._start_playback(audio, audio_format):
+            return
+        try:
             while pygame.mixer.music.get_busy():
-                await asyncio.sleep(0.1)
-            
+                await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            pygame.mixer.music.stop()
+            raise
         finally:
-            # Clean up temp file
+            self._unload()
+
+    def _start_playback(self, audio, audio_format):
+        """Load an encoded clip from memory and start playing it."""
+        try:
+            pygame.mixer.music.load(io.BytesIO(audio), audio_format)
+            pygame.mixer.music.play()
+            return True
+        except Exception as e:
+            logging.warning(f"Failed to play TTS audio: {e}")
+            return False
+
+    def _unload(self):
+        """Release the in-memory clip."""
+        if hasattr(pygame.mixer.music, 'unload'):
             try:
-                # Unload if supported
-                if hasattr(pygame.mixer.music, 'unload'):
-                    try:
-                        pygame.mixer.music.unload()
-                    except Exception:
-                        pass
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
+                pygame.mixer.music.unload()
             except Exception:
                 pass
-    
+
+    def get_stats(self):
+        """Get per-backend usage statistics."""
+        return {
+            'backends': [b.name for b in self.backends],
+            'spoken': dict(self.spoken),
+            'fallbacks': self.fallbacks,
+        }
+
     def stop(self):
         """Stop current speech."""
         try:
@@ -85,11 +421,13 @@ class TTSHandler:
             self.is_speaking = False
         except Exception as e:
             logging.warning(f"Error stopping TTS: {e}")
-    
+
     def cleanup(self):
         """Clean up TTS resources."""
         try:
             self.stop()
+            for executor in self._executors.values():
+                executor.shutdown(wait=False, cancel_futures=True)
             if pygame.mixer.get_init():
                 pygame.mixer.quit()
         except Exception as e:
@@ -0,0 +1,186 @@
+"""Assembly of finalized speech segments into agent turns."""
+
+import time
+import logging
+import threading
+from endpointer import completeness
+
+
+class _InFlight:
+    """A turn whose reply is being generated."""
+
+    def __init__(self, text):
+        self.text = text
+        self.cancelled = threading.Event()
+
+
+class TurnAssembler:
+    """Merges back-to-back segments into one request and answers it on a worker thread.
+
+    Finalized segments are held for a short window that grows when the last
+    one sounds unfinished, and for as long as the user is speaking again.
+    Everything collected is sent to the agent as a single request. A segment
+    arriving while a reply is still being generated cancels that reply; its
+    text is merged with the new segment and asked again, so the user gets
+    one answer instead of one per fragment. The stale reply's model call is
+    aborted through the cancel event handed to ``generate``.
+    """
+
+    def __init__(self, generate, deliver, hold_min_secs=0.3, hold_max_secs=1.5, max_wait_secs=30.0,
+                 on_idle=None):
+        """Initialize the assembler and start its worker thread.
+
+        Args:
+            generate: Called with the merged text and a threading.Event that is set when the
+                reply goes stale (so the model call can stop), returns the reply (or None to skip delivery)
+            deliver: Called with the merged text and its reply once it is no longer stale
+            hold_min_secs: Hold after a segment that sounds complete
+            hold_max_secs: Hold after a segment that sounds unfinished
+            max_wait_secs: Longest hold while the user keeps speaking
+            on_idle: Called when every turn has been delivered or dropped
+        """
+        self.generate = generate
+        self.deliver = deliver
+        self.on_idle = on_idle
+        self.hold_min_secs = hold_min_secs
+        self.hold_max_secs = hold_max_secs
+        self.max_wait_secs = max_wait_secs
+
+        self._pending = []
+        self._last_segment_at = 0.0
+        self._speaking_since = None
+        self._inflight = None
+        self._active = False  # a collected turn is being generated or delivered
+        self._running = True
+        self._changed = threading.Condition()
+
+        # Statistics
+        self.segments = 0
+        self.requests = 0
+        self.delivered = 0
+        self.cancelled = 0
+
+        self._worker = threading.Thread(target=self._run, name="turn-assembler", daemon=True)
+        self._worker.start()
+
+    def speech_started(self):
+        """The user started speaking: hold pending segments until the new one is finalized."""
+        with self._changed:
+            self._speaking_since = time.monotonic()
+            self._changed.notify_all()
+
+    def speech_ended(self):
+        """The segment being spoken was discarded (too short, no wake word or empty)."""
+        with self._changed:
+            self._speaking_since = None
+            idle = not self._pending and not self._active
+            self._changed.notify_all()
+        if idle and self.on_idle is not None:
+            self.on_idle()
+
+    @property
+    def busy(self):
+        """Whether a turn is held, being generated or being delivered."""
+        with self._changed:
+            return bool(self._pending) or self._active
+
+    def submit(self, text):
+        """Add a finalized segment's transcript."""
+        with self._changed:
+            self._pending.append(text)
+            self._last_segment_at = time.monotonic()
+            self._speaking_since = None
+            self.segments += 1
+            if self._inflight is not None and not self._inflight.cancelled.is_set():
+                # The reply being generated no longer answers everything the user said
+                self._inflight.cancelled.set()
+            self._changed.notify_all()
+
+    def hold_secs(self, text):
+        """Time to wait for another segment after ``text``."""
+        return self.hold_min_secs + (1.0 - completeness(text)) * (self.hold_max_secs - self.hold_min_secs)
+
+    def _collect(self):
+        """Wait for segments and return them once the hold window has passed."""
+        with self._changed:
+            while self._running:
+                now = time.monotonic()
+                if not self._pending:
+                    self._changed.wait()
+                    continue
+                if self._speaking_since is not None and now - self._speaking_since < self.max_wait_secs:
+                    # Wait for the segment being spoken (or the speaking deadline)
+                    self._changed.wait(self.max_wait_secs - (now - self._speaking_since))
+                    continue
+                deadline = self._last_segment_at + self.hold_secs(self._pending[-1])
+                if now < deadline:
+                    self._changed.wait(deadline - now)
+                    continue
+                segments, self._pending = self._pending, []
+                self._speaking_since = None
+                self._active = True
+                return segments
+        return None
+
+    def _run(self):
+        """Generate and deliver replies for assembled turns."""
+        while True:
+            segments = self._collect()
+            if segments is None:
+                return
+            try:
+                self._answer(segments)
+            finally:
+                with self._changed:
+                    self._active = False
+                    idle = not self._pending
+                if idle and self.on_idle is not None:
+                    self.on_idle()
+
+    def _answer(self, segments):
+        """Generate the reply to collected segments and deliver it unless it went stale."""
+        text = " ".join(s.strip() for s in segments)
+        inflight = _InFlight(text)
+        with self._changed:
+            self._inflight = inflight
+        self.requests += 1
+        if len(segments) > 1:
+            logging.debug(f"Merged {len(segments)} segments into one turn: {text!r}")
+
+        try:
+            reply = self.generate(text, inflight.cancelled)
+        except Exception as e:
+            if not inflight.cancelled.is_set():
+                logging.warning(f"Turn generation failed: {e}")
+            reply = None
+
+        with self._changed:
+            self._inflight = None
+            if inflight.cancelled.is_set():
+                # Ask again together with what the user added meanwhile
+                self._pending.insert(0, text)
+                self.cancelled += 1
+                return
+        if reply is not None:
+            try:
+                self.deliver(text, reply)
+                self.delivered += 1
+            except Exception as e:
+                logging.warning(f"Turn delivery failed: {e}")
+
+    def get_stats(self):
+        """Get turn assembly statistics."""
+        return {
+            'segments': self.segments,
+            'requests': self.requests,
+            'delivered': self.delivered,
+            'cancelled_replies': self.cancelled,
+            'segments_per_turn': self.segments / max(self.delivered, 1),
+            'llm_calls_saved': max(0, self.segments - self.requests),
+        }
+
+    def cleanup(self):
+        """Stop the worker thread (a reply in progress is abandoned)."""
+        with self._changed:
+            self._running = False
+            self._changed.notify_all()
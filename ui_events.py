@@ -0,0 +1,179 @@
+"""UI event bus decoupling terminal rendering from the audio and agent threads."""
+
+import time
+import logging
+import itertools
+import threading
+from collections import deque
+from rich.text import Text
+from terminal_style import terminal, console
+from config import UI_REFRESH_HZ, UI_HEADLESS
+
+SPINNER_FRAMES = "⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏"
+
+
+class UIEventBus:
+    """Collects status events from pipeline stages and renders them on one thread.
+
+    Publishing never touches the terminal: status updates only replace the
+    latest status (intermediate ones are coalesced away) and messages are
+    appended to a bounded queue. A single renderer thread draws at most
+    ``refresh_hz`` frames per second, so slow terminals or SSH sessions
+    cannot stall audio processing. In headless mode nothing is rendered.
+    """
+
+    def __init__(self, refresh_hz=UI_REFRESH_HZ, headless=UI_HEADLESS, max_pending=256):
+        """Initialize the bus.
+
+        Args:
+            refresh_hz: Maximum number of frames rendered per second
+            headless: Drop all events instead of rendering them
+            max_pending: Messages kept while the renderer is behind (oldest are dropped)
+        """
+        self.interval = 1.0 / refresh_hz
+        self.headless = headless
+        self._events = deque(maxlen=max_pending)
+        self._status = (0, None, None, False)  # (version, text, style, spinner)
+        self._versions = itertools.count(1)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Renderer state
+        self._drawn_version = 0
+        self._status_visible = False
+        self._status_width = 0
+        self._frame = 0
+
+        # Statistics
+        self.published = 0
+        self.rendered = 0
+        self.frames = 0
+
+    def start(self):
+        """Start the renderer thread (no-op in headless mode)."""
+        if self.headless or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._render_loop, name="ui-renderer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Render what is still pending and stop the renderer thread."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=2)
+        self._thread = None
+        self._render(draw_status=False)
+        self._clear_status()
+
+    def status(self, text, style="yellow", spinner=False):
+        """Replace the status line (coalesced: only the latest one is drawn).
+
+        Args:
+            text: Status text, e.g. "🎤 Listening..."
+            style: Rich style of the text
+            spinner: Animate a spinner in front of the text while it is shown
+        """
+        if self.headless:
+            return
+        self._status = (next(self._versions), text, style, spinner)
+        self.published += 1
+        self._wake.set()
+
+    def message(self, speaker, text):
+        """Print a conversation message, e.g. the transcript or the reply."""
+        self._publish(('message', speaker, text))
+
+    def success(self, text):
+        """Print a success message."""
+        self._publish(('call', terminal.print_success, (text,)))
+
+    def error(self, text):
+        """Print an error message (logged instead when headless, so it is never lost)."""
+        if self.headless:
+            logging.warning(text)
+            return
+        self._publish(('call', terminal.print_error, (text,)))
+
+    def call(self, render, *args):
+        """Run a rendering function (e.g. ``terminal.print_stats``) on the renderer thread."""
+        self._publish(('call', render, args))
+
+    def _publish(self, event):
+        if self.headless:
+            return
+        self._events.append(event)
+        self.published += 1
+        self._wake.set()
+
+    def _render_loop(self):
+        """Draw pending events, at most once per refresh interval."""
+        while not self._stop.is_set():
+            # Sleep until something is published, or keep ticking while a spinner runs
+            spinning = self._status[3] and self._status[1]
+            self._wake.wait(self.interval if spinning else None)
+            self._wake.clear()
+            started = time.perf_counter()
+            try:
+                self._render()
+            except Exception as e:
+                logging.debug(f"UI render failed: {e}")
+            # Anything published during the rest of the interval is coalesced into the next frame
+            self._stop.wait(max(0.0, self.interval - (time.perf_counter() - started)))
+
+    def _render(self, draw_status=True):
+        """Draw queued messages in order, then the latest status line."""
+        self.frames += 1
+        while self._events:
+            event = self._events.popleft()
+            self._clear_status()
+            if event[0] == 'message':
+                _, speaker, text = event
+                console.print(f"\n{speaker}: {text}\n", highlight=False)
+            else:
+                _, render, args = event
+                render(*args)
+            self.rendered += 1
+
+        if not draw_status:
+            return
+        version, text, style, spinner = self._status
+        if text is None or (version == self._drawn_version and self._status_visible and not spinner):
+            return
+        line = Text()
+        if spinner:
+            self._frame = (self._frame + 1) % len(SPINNER_FRAMES)
+            line.append(f"{SPINNER_FRAMES[self._frame]} ", style=f"{style} bold")
+        line.append(text, style=style)
+        # Pad over the remains of a longer previous status
+        width = line.cell_len
+        line.append(" " * max(0, self._status_width - width))
+        console.print(line, end="\r")
+        self._status_width = width
+        self._status_visible = True
+        if version != self._drawn_version:
+            self.rendered += 1
+            self._drawn_version = version
+
+    def _clear_status(self):
+        """Blank the status line before printing regular output over it."""
+        if self._status_width:
+            console.print(" " * self._status_width, end="\r")
+            self._status_width = 0
+        self._status_visible = False
+
+    def get_stats(self):
+        """Get rendering statistics."""
+        return {
+            'published': self.published,
+            'rendered': self.rendered,
+            'coalesced': max(0, self.published - self.rendered - len(self._events)),
+            'frames': self.frames,
+        }
+
+
+# Create a global instance
+ui = UIEventBus()
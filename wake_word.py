@@ -0,0 +1,207 @@
+"""Wake-word and minimum-length gate between the VAD and full transcription."""
+
+import re
+import time
+import logging
+from difflib import SequenceMatcher
+import numpy as np
+from config import SAMPLING_RATE, CHUNK_SIZE
+from energy_gate import EnergyGate
+from speculation import normalize_transcript
+
+
+class WakeWordGate:
+    """Drops VAD segments that are too short or do not start with the wake phrase.
+
+    Keyword spotting reuses the Moonshine model on only the first
+    ``window_secs`` of a segment and fuzzy-matches the first words against
+    the wake phrase, so background speech (TV, nearby conversations) costs
+    one short inference instead of a full transcription and an LLM call.
+    A segment holding only the wake phrase ("Hey Luma." <pause>) arms the
+    gate: the next segment starting within ``follow_up_secs`` is accepted
+    without it. ``screen`` runs the same tests on speech still being spoken,
+    so pauses are only transcribed once the segment is known to be answered.
+    """
+
+    def __init__(self, transcriber, phrase="", window_secs=1.5, min_speech_secs=0.5,
+                 threshold=0.75, follow_up_secs=5.0, rate=SAMPLING_RATE):
+        """Initialize the gate.
+
+        Args:
+            transcriber: Transcriber used to spot the wake phrase
+            phrase: Wake phrase (e.g. "hey luma"); empty only enforces the minimum length
+            window_secs: Length of the segment start that is transcribed for spotting
+            min_speech_secs: Shortest voiced duration that is forwarded
+            threshold: Similarity (0-1) the first words need to match the phrase
+            follow_up_secs: How long after a bare wake phrase the next segment may start
+            rate: Sampling rate of the segments
+        """
+        self.transcriber = transcriber
+        self.phrase = normalize_transcript(phrase)
+        self.window_secs = window_secs
+        self.min_speech_secs = min_speech_secs
+        self.threshold = threshold
+        self.follow_up_secs = follow_up_secs
+        self.rate = rate
+        self._armed_until = 0.0
+        self._spotted = None  # (window, transcript) of the last spotting inference
+
+        # Statistics
+        self.segments = 0
+        self.accepted = 0
+        self.too_short = 0
+        self.no_wake_word = 0
+        self.follow_ups = 0
+        self.asr_calls_avoided = 0
+        self.spotting_secs = 0.0
+        self.audio_secs_skipped = 0.0
+
+    def voiced_span(self, speech, floor_margin_db=30.0):
+        """Start and end (seconds into the buffer) of the chunks within ``floor_margin_db`` of the peak level."""
+        levels = [EnergyGate.measure(speech[i:i + CHUNK_SIZE])[0]
+                  for i in range(0, len(speech) - CHUNK_SIZE + 1, CHUNK_SIZE)]
+        if not levels:
+            return 0.0, 0.0
+        threshold = max(levels) - floor_margin_db
+        loud = [i for i, level in enumerate(levels) if level > threshold]
+        return loud[0] * CHUNK_SIZE / self.rate, (loud[-1] + 1) * CHUNK_SIZE / self.rate
+
+    def voiced_secs(self, speech, floor_margin_db=30.0):
+        """Duration from the first to the last chunk within ``floor_margin_db`` of the peak level.
+
+        The buffer also holds the VAD lookback and trailing silence, which
+        must not count towards the minimum length.
+        """
+        start, end = self.voiced_span(speech, floor_margin_db)
+        return end - start
+
+    def match(self, text):
+        """Return the number of leading words forming the wake phrase, or 0 if absent."""
+        if not self.phrase:
+            return 0
+        words = normalize_transcript(text).split()
+        size = len(self.phrase.split())
+        best, best_end = 0.0, 0
+        # Allow one filler word before the phrase ("ok hey luma") and ASR splits/merges
+        for start in (0, 1):
+            for end in range(start + max(1, size - 1), min(len(words), start + size + 1) + 1):
+                ratio = SequenceMatcher(None, " ".join(words[start:end]), self.phrase).ratio()
+                if ratio > best:
+                    best, best_end = ratio, end
+        return best_end if best >= self.threshold else 0
+
+    @property
+    def armed(self):
+        """Whether a bare wake phrase was just heard, so speech needs no wake phrase."""
+        return time.monotonic() < self._armed_until
+
+    def _follows_wake_phrase(self, duration):
+        """Whether a segment of ``duration`` seconds ending now started within the follow-up window."""
+        return time.monotonic() - duration < self._armed_until
+
+    def _spot(self, speech):
+        """Transcribe the spotting window of a segment.
+
+        The result is reused while the window is unchanged: every pause of a
+        segment and its final buffer start with the same audio.
+        """
+        window = speech[:int(self.window_secs * self.rate)]
+        spotted = self._spotted
+        if spotted is not None and len(spotted[0]) == len(window) and np.array_equal(spotted[0], window):
+            return spotted[1]
+        started = time.perf_counter()
+        heard = self.transcriber(window)
+        self.spotting_secs += time.perf_counter() - started
+        self._spotted = (window.copy(), heard)
+        return heard
+
+    def screen(self, speech):
+        """Cheaply decide whether speech still being spoken would pass ``check`` (no statistics).
+
+        Only the spotting window is transcribed, so background speech is
+        never fully transcribed at its pauses.
+        """
+        if self.voiced_secs(speech) < self.min_speech_secs:
+            return False
+        if not self.phrase or self._follows_wake_phrase(len(speech) / self.rate):
+            return True
+        return bool(self.match(self._spot(speech)))
+
+    def strip(self, text):
+        """Remove the wake phrase from the start of a transcript."""
+        end = self.match(text)
+        if not end:
+            return text
+        # Cut after the same words normalize_transcript saw, keeping the original casing
+        words = list(re.finditer(r"[a-z0-9']+", text.lower()))
+        return text[words[end - 1].end():].lstrip(" ,.!?-")
+
+    def check(self, speech, transcript=None):
+        """Decide whether a segment is forwarded.
+
+        Args:
+            speech: Audio of the segment
+            transcript: Transcript already computed for the segment, if any
+
+        Returns:
+            ``(accepted, transcript)``; the transcript is the one given, or the
+            spotting transcript when the window covered the whole segment
+        """
+        self.segments += 1
+        duration = len(speech) / self.rate
+
+        if self.voiced_secs(speech) < self.min_speech_secs:
+            self.too_short += 1
+            self.audio_secs_skipped += duration
+            if transcript is None:
+                self.asr_calls_avoided += 1
+            logging.debug(f"Dropped a {duration:.2f}s segment: too short")
+            return False, None
+
+        # Started within the follow-up window of a bare wake phrase
+        if self.phrase and self._follows_wake_phrase(duration):
+            self._armed_until = 0.0
+            self.follow_ups += 1
+            self.accepted += 1
+            return True, transcript
+
+        if self.phrase:
+            spotted = transcript is None
+            if spotted:
+                heard = self._spot(speech)
+                if self.voiced_span(speech)[1] <= self.window_secs:
+                    # Everything voiced is inside the window, the rest is trailing silence
+                    transcript = heard
+            else:
+                heard = transcript
+
+            if not self.match(heard):
+                self.no_wake_word += 1
+                self.audio_secs_skipped += duration
+                if spotted and transcript is None:
+                    # Only the short spotting window was transcribed
+                    self.asr_calls_avoided += 1
+                logging.debug(f"Dropped a segment without the wake word: {heard!r}")
+                return False, None
+
+            if transcript is not None and not self.strip(transcript).strip():
+                # Only the wake phrase: the request follows in the next segment
+                self._armed_until = time.monotonic() + self.follow_up_secs
+
+        self.accepted += 1
+        return True, transcript
+
+    def get_stats(self):
+        """Get gating statistics, including the ASR and LLM work avoided."""
+        dropped = self.too_short + self.no_wake_word
+        return {
+            'segments': self.segments,
+            'accepted': self.accepted,
+            'too_short': self.too_short,
+            'no_wake_word': self.no_wake_word,
+            'follow_ups': self.follow_ups,
+            'asr_calls_avoided': self.asr_calls_avoided,
+            'llm_calls_avoided': dropped,
+            'audio_secs_skipped': self.audio_secs_skipped,
+            'spotting_secs': self.spotting_secs,
+        }
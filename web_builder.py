@@ -1,120 +1,121 @@
 """LUMA Web Builder Server
-Handles the web interface for generating LUMA executables with custom API keys."""
+Handles the web interface for generating LUMA executables with custom API keys.
 
-from flask import Flask, request, send_file, render_template
-import os
-import tempfile
-import subprocess
-from pathlib import Path
+Builds run asynchronously on a bounded worker pool:
 
-app = Flask(__name__, 
+    POST /jobs                  -> submit a build, returns its job id
+    GET  /jobs/<id>             -> status, progress and queue position
+    GET  /jobs/<id>/logs        -> streamed build log (text/plain)
+    GET  /jobs/<id>/download    -> the generated executable
+
+POST /generate (deprecated) keeps its original contract for existing
+clients: it queues a build, waits for it and sends the executable.
+"""
+
+from flask import Flask, Response, request, send_file, jsonify, url_for
+from build_jobs import BuildQueue, BuildJob, QueueFullError
+from config import BUILD_MAX_WORKERS, BUILD_MAX_QUEUED, BUILD_ARTIFACT_TTL
+
+app = Flask(__name__,
             static_folder='web',
             static_url_path='')
 
+build_queue = BuildQueue(
+    max_workers=BUILD_MAX_WORKERS,
+    max_queued=BUILD_MAX_QUEUED,
+    artifact_ttl=BUILD_ARTIFACT_TTL
+)
+
 @app.route('/')
 def index():
     """Serve the configuration page."""
     return app.send_static_file('index.html')
 
+def _submit_from_request():
+    """Queue a build for the posted API keys; returns ``(job, None)`` or ``(None, error_response)``."""
+    data = request.get_json(silent=True) or {}
+    groq_key = data.get('groqKey')
+    google_key = data.get('googleKey', '')  # Optional
+
+    if not groq_key:
+        return None, ('GROQ API key is required', 400)
+
+    try:
+        return build_queue.submit(groq_key, google_key), None
+    except QueueFullError as e:
+        return None, (str(e), 503)
+
 @app.route('/generate', methods=['POST'])
 def generate_exe():
-    """Generate a customized LUMA executable."""
-    try:
-        # Get API keys from request
-        data = request.get_json()
-        groq_key = data.get('groqKey')
-        google_key = data.get('googleKey', '')  # Optional
-        
-        if not groq_key:
-            return 'GROQ API key is required', 400
-            
-        # Create temporary build config
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Create build_config.py with API keys
-            build_config_content = f'''"""Build configuration with embedded API keys."""
-GROQ_API_KEY = "{groq_key}"
-GEMINI_API_KEY = "{google_key}"
-'''
-            build_config_path = Path(temp_dir) / 'build_config.py'
-            with open(build_config_path, 'w') as f:
-                f.write(build_config_content)
-            
-            # Copy necessary files to temp directory
-            project_files = [
-                'main.py', 'agent.py', 'audio_processor.py',
-                'config.py', 'transcriber.py', 'tts_handler.py',
-                'tools.py', 'terminal_style.py', 'database.py',
-                'requirements.txt'
-            ]
-            
-            for file in project_files:
-                if os.path.exists(file):
-                    with open(file, 'r') as src, open(Path(temp_dir) / file, 'w') as dst:
-                        dst.write(src.read())
-            
-            # Create PyInstaller spec
-            spec_content = f'''# -*- mode: python ; coding: utf-8 -*-
-
-block_cipher = None
-
-a = Analysis(['main.py'],
-             pathex=[r'{temp_dir}'],
-             binaries=[],
-             datas=[('build_config.py', '.')],
-             hiddenimports=['build_config'],
-             hookspath=[],
-             runtime_hooks=[],
-             excludes=[],
-             win_no_prefer_redirects=False,
-             win_private_assemblies=False,
-             cipher=block_cipher,
-             noarchive=False)
-
-pyz = PYZ(a.pure, a.zipped_data,
-          cipher=block_cipher)
-
-exe = EXE(pyz,
-          a.scripts,
-          a.binaries,
-          a.zipfiles,
-          a.datas,
-          [],
-          name='LUMA',
-          debug=False,
-          bootloader_ignore_signals=False,
-          strip=False,
-          upx=True,
-          upx_exclude=[],
-          runtime_tmpdir=None,
-          console=False)
-'''
-            
-            spec_path = Path(temp_dir) / 'LUMA.spec'
-            with open(spec_path, 'w') as f:
-                f.write(spec_content)
-            
-            # Run PyInstaller
-            subprocess.run([
-                'pyinstaller',
-                '--clean',
-                '--workpath', str(Path(temp_dir) / 'build'),
-                '--distpath', str(Path(temp_dir) / 'dist'),
-                str(spec_path)
-            ], cwd=temp_dir, check=True)
-            
-            # Send the generated executable
-            exe_path = Path(temp_dir) / 'dist' / 'LUMA.exe'
-            if exe_path.exists():
-                return send_file(
-                    exe_path,
-                    as_attachment=True,
-                    download_name='LUMA.exe'
-                )
-            else:
-                return 'Failed to generate executable', 500
-    
-    except Exception as e:
-        return f'Error: {str(e)}', 500
+    """Generate a customized LUMA executable and send it once built.
+
+    Deprecated: the request blocks for the whole build. Use POST /jobs instead.
+    """
+    job, error = _submit_from_request()
+    if error:
+        return error
+
+    job = build_queue.wait(job.id)
+    if job.status != BuildJob.SUCCEEDED or job.artifact_path is None:
+        return f'Error: {job.error or "Failed to generate executable"}', 500
+    response = send_file(
+        job.artifact_path,
+        as_attachment=True,
+        download_name='LUMA.exe'
+    )
+    response.headers['Deprecation'] = 'true'
+    response.headers['Link'] = f'<{url_for("submit_job")}>; rel="successor-version"'
+    return response
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Queue a customized LUMA executable build."""
+    job, error = _submit_from_request()
+    if error:
+        return error
+
+    status = build_queue.status(job.id)
+    status['status_url'] = url_for('job_status', job_id=job.id)
+    status['logs_url'] = url_for('job_logs', job_id=job.id)
+    status['download_url'] = url_for('job_download', job_id=job.id)
+    return jsonify(status), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Report the status, progress and queue position of a build."""
+    status = build_queue.status(job_id)
+    if status is None:
+        return 'Unknown job', 404
+    return jsonify(status)
+
+@app.route('/jobs/<job_id>/logs', methods=['GET'])
+def job_logs(job_id):
+    """Stream the build log until the job finishes."""
+    if build_queue.get(job_id) is None:
+        return 'Unknown job', 404
+    start = request.args.get('start', 0, type=int)
+    lines = build_queue.stream_logs(job_id, start=start)
+    return Response((f"{line}\n" for line in lines), mimetype='text/plain')
+
+@app.route('/jobs/<job_id>/download', methods=['GET'])
+def job_download(job_id):
+    """Send the generated executable of a finished build."""
+    job = build_queue.get(job_id)
+    if job is None:
+        return 'Unknown job', 404
+    if job.status == BuildJob.EXPIRED:
+        return 'Build artifact has expired', 410
+    if job.status == BuildJob.FAILED:
+        return f'Build failed: {job.error}', 500
+    if job.status != BuildJob.SUCCEEDED or job.artifact_path is None:
+        return 'Build not finished yet', 409
+
+    return send_file(
+        job.artifact_path,
+        as_attachment=True,
+        download_name='LUMA.exe'
+    )
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    # The reloader would start a second worker pool
+    app.run(debug=True, threaded=True, use_reloader=False)